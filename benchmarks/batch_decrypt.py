@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Throughput benchmark for xk.batch.decrypt_many.
+
+Reports dumps/second for vectorized batch decryption and for decrypting the same dumps one EEPROMData at a time with
+each available crypto backend. Requires numpy.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from xk import backend
+from xk import batch
+from xk import eeprom
+
+# pylint: enable=wrong-import-position
+
+
+def _make_dumps(count: int) -> bytes:
+    """Returns `count` concatenated synthetic dumps spread evenly across the decryptable versions."""
+    crypto = backend.get_backend()
+    dumps = []
+    for i in range(count):
+        data = eeprom.EEPROMData.from_buffer_copy(os.urandom(eeprom.EEPROM_SIZE))
+        data.crypto_backend = crypto
+        data._encrypted = False
+        data.encrypt(eeprom.DECRYPT_VERSIONS[i % len(eeprom.DECRYPT_VERSIONS)])
+        dumps.append(bytes(data))
+    return b"".join(dumps)
+
+
+def _best_time(function, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _decrypt_each(buffer: bytes, crypto: backend.CryptoBackend):
+    for offset in range(0, len(buffer), eeprom.EEPROM_SIZE):
+        data = eeprom.EEPROMData.from_buffer_copy(buffer, offset)
+        data.crypto_backend = crypto
+        data.decrypt(probe=eeprom.VersionProbe("fixed"))
+
+
+def _main(args):
+    buffer = _make_dumps(args.count)
+
+    _, versions = batch.decrypt_many(buffer)
+    if (versions == eeprom.XBOX_VERSION.V_NONE).any():
+        print("Batch decryption failed!")
+        return 1
+
+    elapsed = _best_time(lambda: batch.decrypt_many(buffer), args.repeat)
+    print(f"{'batch':>10}: {args.count / elapsed:12.0f} dumps/s")
+
+    for name in backend.available_backends():
+        crypto = backend.get_backend(name)
+        elapsed = _best_time(lambda: _decrypt_each(buffer, crypto), args.repeat)
+        print(f"{name:>10}: {args.count / elapsed:12.0f} dumps/s")
+    return 0
+
+
+if __name__ == "__main__":
+
+    def _parse_args():
+        parser = argparse.ArgumentParser()
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=3000,
+            help="Number of synthetic dumps to decrypt per timing run.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of timing runs; the fastest is reported.",
+        )
+        return parser.parse_args()
+
+    sys.exit(_main(_parse_args()))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Scaling benchmark for xk.engine.Engine.
+
+Reports dumps/second and the speedup over a single worker when decrypting the same synthetic dumps with increasing
+numbers of threads and processes. Thread scaling is only expected on free-threaded CPython builds.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from xk import backend
+from xk import eeprom
+from xk import engine
+
+# pylint: enable=wrong-import-position
+
+
+def _make_dumps(count: int, crypto: backend.CryptoBackend):
+    """Returns `count` synthetic dumps spread evenly across the decryptable versions."""
+    return [
+        eeprom.encrypt_buffer(
+            os.urandom(eeprom.EEPROM_SIZE),
+            eeprom.DECRYPT_VERSIONS[i % len(eeprom.DECRYPT_VERSIONS)],
+            crypto,
+        )
+        for i in range(count)
+    ]
+
+
+def _best_time(e: engine.Engine, dumps, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for version, _ in e.decrypt(dumps):
+            if version == eeprom.XBOX_VERSION.V_NONE:
+                raise Exception("Decryption failed")
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _main(args):
+    crypto = backend.get_backend(args.crypto_backend)
+    dumps = _make_dumps(args.count, crypto)
+    print(
+        f"backend={crypto.name} free_threaded={engine.FREE_THREADED} cpus={os.cpu_count()}"
+    )
+
+    for mode in args.modes:
+        baseline = None
+        for workers in args.workers:
+            with engine.Engine(workers, mode, crypto, args.chunk_size) as e:
+                # Start the pool before timing.
+                list(e.decrypt(dumps[:workers]))
+                elapsed = _best_time(e, dumps, args.repeat)
+            rate = args.count / elapsed
+            baseline = baseline or rate
+            print(
+                f"{mode:>8} x{workers:<3}: {rate:12.0f} dumps/s {rate / baseline:6.2f}x"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+
+    def _parse_args():
+        cpus = os.cpu_count() or 1
+        default_workers = sorted({1, 2, 4, 8, 16, 32, cpus} & set(range(1, cpus + 1)))
+
+        parser = argparse.ArgumentParser()
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=3000,
+            help="Number of synthetic dumps to decrypt per timing run.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of timing runs; the fastest is reported.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=lambda value: [int(count) for count in value.split(",")],
+            default=default_workers,
+            help="Comma-separated worker counts to measure (defaults to powers of two up to the CPU count).",
+        )
+        parser.add_argument(
+            "--modes",
+            type=lambda value: value.split(","),
+            default=["thread", "process"],
+            help="Comma-separated engine modes to measure.",
+        )
+        parser.add_argument(
+            "--chunk_size",
+            type=int,
+            default=engine.DEFAULT_CHUNK_SIZE,
+            help="Number of dumps handed to a worker at a time.",
+        )
+        parser.add_argument(
+            "--crypto_backend",
+            choices=["auto"] + backend.registered_backends(),
+            help="Implementation to use for SHA1/RC4.",
+        )
+        return parser.parse_args()
+
+    sys.exit(_main(_parse_args()))
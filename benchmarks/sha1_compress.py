@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the SHA1 compression function used by xk.sha1.
+
+Reports blocks/second for the current implementation and for the previous loop-based implementation, which is
+reproduced below so that the comparison does not depend on checking out an older revision.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from xk import sha1  # pylint: disable=wrong-import-position
+
+_STATE = (0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476, 0xC3D2E1F0)
+_WORDS = tuple(range(0x01020304, 0x01020304 + 16))
+
+
+def _circular_shift(bits, word):
+    value = (word << bits) & 0xFFFFFFFF
+    value |= (word >> (32 - bits)) & 0xFFFFFFFF
+    return value
+
+
+def _legacy_compress(state, words):
+    """The compression function prior to unrolling, kept as the "before" reference."""
+    K = [0x5A827999, 0x6ED9EBA1, 0x8F1BBCDC, 0xCA62C1D6]
+
+    W = list(words)
+    for t in range(16, 80):
+        W.append(_circular_shift(1, W[t - 3] ^ W[t - 8] ^ W[t - 14] ^ W[t - 16]))
+
+    A, B, C, D, E = state
+
+    for t in range(20):
+        temp = _circular_shift(5, A) + ((B & C) | ((~B) & D)) + E + W[t] + K[0]
+        temp &= 0xFFFFFFFF
+        E = D
+        D = C
+        C = _circular_shift(30, B)
+
+        B = A
+        A = temp
+
+    for t in range(20, 40):
+        temp = _circular_shift(5, A) + (B ^ C ^ D) + E + W[t] + K[1]
+        temp &= 0xFFFFFFFF
+        E = D
+        D = C
+        C = _circular_shift(30, B)
+        B = A
+        A = temp
+
+    for t in range(40, 60):
+        temp = _circular_shift(5, A) + ((B & C) | (B & D) | (C & D)) + E + W[t] + K[2]
+        temp &= 0xFFFFFFFF
+        E = D
+        D = C
+        C = _circular_shift(30, B)
+        B = A
+        A = temp
+
+    for t in range(60, 80):
+        temp = _circular_shift(5, A) + (B ^ C ^ D) + E + W[t] + K[3]
+        temp &= 0xFFFFFFFF
+        E = D
+        D = C
+        C = _circular_shift(30, B)
+        B = A
+        A = temp
+
+    return (
+        (state[0] + A) & 0xFFFFFFFF,
+        (state[1] + B) & 0xFFFFFFFF,
+        (state[2] + C) & 0xFFFFFFFF,
+        (state[3] + D) & 0xFFFFFFFF,
+        (state[4] + E) & 0xFFFFFFFF,
+    )
+
+
+def _blocks_per_second(compress, repeat: int, number: int) -> float:
+    timer = timeit.Timer(lambda: compress(_STATE, _WORDS))
+    return number / min(timer.repeat(repeat=repeat, number=number))
+
+
+def _main(args):
+    if _legacy_compress(_STATE, _WORDS) != sha1._compress(_STATE, _WORDS):
+        print("Implementations disagree!")
+        return 1
+
+    before = _blocks_per_second(_legacy_compress, args.repeat, args.number)
+    after = _blocks_per_second(sha1._compress, args.repeat, args.number)
+    print(f"before: {before:12.0f} blocks/s")
+    print(f"after:  {after:12.0f} blocks/s")
+    print(f"speedup: {after / before:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+
+    def _parse_args():
+        parser = argparse.ArgumentParser()
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=5000,
+            help="Number of blocks compressed per timing run.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of timing runs; the fastest is reported.",
+        )
+        return parser.parse_args()
+
+    sys.exit(_main(_parse_args()))
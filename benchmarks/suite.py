@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""Reproducible benchmark suite for the xk crypto primitives and EEPROM round trips.
+
+Every benchmark runs on synthetic data generated from a fixed seed. Each is calibrated to run for at least
+--min_time seconds per timing run, and the fastest of --repeat runs is reported as seconds per operation. Results are
+written as JSON, and may be compared against a stored baseline (by default benchmarks/baseline.json): benchmarks that
+slowed down by more than --threshold are reported as regressions and cause a non-zero exit status.
+
+Baselines are only comparable when taken on the same machine with the same Python and crypto backend; a warning is
+printed when the recorded environment differs. Use --write_baseline to refresh the stored baseline.
+
+The corpus benchmarks require numpy and are skipped without it.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from xk import backend
+from xk import corpus
+from xk import crc
+from xk import eeprom
+from xk import rc4
+from xk import sha1
+
+try:
+    import numpy as np
+
+    from xk import batch
+    from xk import columnar
+except ImportError:
+    np = None
+
+# pylint: enable=wrong-import-position
+
+SCHEMA_VERSION = 1
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+_SEED = 0x5842
+
+
+def _random_bytes(rng: random.Random, length: int) -> bytes:
+    return rng.getrandbits(length * 8).to_bytes(length, "little")
+
+
+def _make_dump(rng: random.Random, version: eeprom.XBOX_VERSION, crypto) -> bytes:
+    """Returns a synthetic encrypted dump with a valid region, so that it decrypts as `version`."""
+    plain = bytearray(_random_bytes(rng, eeprom.EEPROM_SIZE))
+    plain[0x2C:0x30] = eeprom.XBE_REGION.NORTH_AMERICA.value.to_bytes(4, "little")
+    return eeprom.encrypt_buffer(plain, version, crypto)
+
+
+def _time(function, min_time: float, repeat: int) -> dict:
+    """Returns timing statistics of `function`, calibrating the number of calls per run to last at least `min_time`."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    runs = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        runs.append((time.perf_counter() - start) / loops)
+    runs.sort()
+    return {"seconds": runs[0], "median": runs[len(runs) // 2], "loops": loops}
+
+
+def _primitive_benchmarks(crypto, rng: random.Random) -> dict:
+    """Returns the benchmarks of the individual primitives, by name."""
+    benchmarks = {}
+
+    checksum2_region = _random_bytes(
+        rng, eeprom.CHECKSUM2_RANGE[1] - eeprom.CHECKSUM2_RANGE[0]
+    )
+    checksum3_region = _random_bytes(
+        rng, eeprom.CHECKSUM3_RANGE[1] - eeprom.CHECKSUM3_RANGE[0]
+    )
+    benchmarks["quick_crc.checksum2"] = lambda: crc.quick_crc(checksum2_region)
+    benchmarks["quick_crc.checksum3"] = lambda: crc.quick_crc(checksum3_region)
+
+    key = _random_bytes(rng, 20)
+    secrets = _random_bytes(rng, 28)
+    dump = _random_bytes(rng, eeprom.EEPROM_SIZE)
+    stream = rc4.RC4(key)
+    benchmarks["rc4.ksa"] = lambda: rc4.RC4(key)
+    benchmarks["rc4.apply.28"] = lambda: stream.apply(secrets)
+    benchmarks["rc4.apply.256"] = lambda: stream.apply(dump)
+
+    hasher = sha1.SHA1()
+    hmac = _random_bytes(rng, 20)
+    benchmarks["sha1.xbox_hmac_sha1.20"] = lambda: hasher.xbox_hmac_sha1(0x0B, hmac)
+    benchmarks["sha1.xbox_hmac_sha1.28"] = lambda: hasher.xbox_hmac_sha1(0x0B, secrets)
+
+    # Decryption always probes in the fixed V1_0, V1_1, V1_6 order, so later versions measure the failed attempts.
+    probe = eeprom.VersionProbe("fixed")
+    for version in eeprom.DECRYPT_VERSIONS:
+        dump = _make_dump(rng, version, crypto)
+
+        def decrypt(dump=dump):
+            data = eeprom.EEPROMData.from_buffer_copy(dump)
+            data.crypto_backend = crypto
+            data.decrypt(probe=probe)
+
+        benchmarks[f"eeprom.decrypt.{version.name}"] = decrypt
+
+    dump = _make_dump(rng, eeprom.XBOX_VERSION.V1_1, crypto)
+
+    def round_trip():
+        e = eeprom.EEPROM(crypto_backend=crypto)
+        e.read_from_buffer(dump, version_hint=eeprom.XBOX_VERSION.V1_1)
+        e.dts_flag = not e.dts_flag
+        e.encrypt()
+
+    def full_round_trip():
+        version, decrypted = eeprom.decrypt_buffer(
+            dump, eeprom.XBOX_VERSION.V1_1, crypto, probe
+        )
+        eeprom.encrypt_buffer(decrypted, version, crypto)
+
+    benchmarks["eeprom.edit_round_trip"] = round_trip
+    benchmarks["eeprom.full_round_trip"] = full_round_trip
+    return benchmarks
+
+
+def _make_corpus_dumps(count: int) -> bytes:
+    """Returns `count` concatenated synthetic dumps spread across the decryptable versions, built with batch APIs."""
+    generator = np.random.default_rng(_SEED)
+    plain = generator.integers(0, 256, (count, eeprom.EEPROM_SIZE), dtype=np.uint8)
+    plain[:, 0x2C:0x30] = np.frombuffer(
+        eeprom.XBE_REGION.EURO_AUSTRALIA.value.to_bytes(4, "little"), dtype=np.uint8
+    )
+    versions = np.resize(np.array(eeprom.DECRYPT_VERSIONS, dtype=np.uint8), count)
+    return columnar.as_bytes(batch.encrypt_many(plain, versions)).tobytes()
+
+
+def _run_corpus_benchmarks(sizes, directory: str, min_time: float, repeat: int) -> dict:
+    """Times building a corpus of each size and decrypting, editing, and re-encrypting all of its records."""
+    results = {}
+    dts = columnar.AUDIO_FLAGS["DTS"]
+    for count in sizes:
+        dumps = _make_corpus_dumps(count)
+        path = os.path.join(directory, f"corpus-{count}.bin")
+
+        def build(dumps=dumps, path=path, count=count):
+            corpus.build(
+                path,
+                (
+                    dumps[offset : offset + eeprom.EEPROM_SIZE]
+                    for offset in range(
+                        0, count * eeprom.EEPROM_SIZE, eeprom.EEPROM_SIZE
+                    )
+                ),
+            )
+
+        def process(path=path):
+            with corpus.Corpus(path) as c:
+                records, versions = batch.decrypt_many(c.records())
+            if (versions == eeprom.XBOX_VERSION.V_NONE).any():
+                raise Exception("Corpus decryption failed")
+            records["AudioFlags"] ^= dts
+            batch.encrypt_many(records, versions)
+
+        for name, function in (
+            (f"corpus.build.{count}", build),
+            (f"corpus.process.{count}", process),
+        ):
+            results[name] = _time(function, min_time, repeat)
+            results[name]["items"] = count
+    return results
+
+
+def _metadata(crypto) -> dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpu_count": os.cpu_count(),
+        "crypto_backend": crypto.name,
+        "numpy": np.__version__ if np is not None else None,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Returns (name, baseline seconds, current seconds, ratio) for the benchmarks slower than baseline by more than
+    `threshold` (e.g., 0.1 for 10%)."""
+    regressions = []
+    for name, result in results["results"].items():
+        reference = baseline["results"].get(name)
+        if not reference:
+            continue
+        ratio = result["seconds"] / reference["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append((name, reference["seconds"], result["seconds"], ratio))
+    return regressions
+
+
+def _format_rate(result: dict) -> str:
+    items = result.get("items", 1)
+    return (
+        f"{items / result['seconds']:14.0f} {'dumps' if 'items' in result else 'ops'}/s"
+    )
+
+
+def _main(args) -> int:
+    crypto = backend.get_backend(args.crypto_backend)
+    rng = random.Random(_SEED)
+
+    results = {}
+    for name, function in _primitive_benchmarks(crypto, rng).items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = _time(function, args.min_time, args.repeat)
+        print(
+            f"{name:<32} {results[name]['seconds'] * 1e6:12.2f} us {_format_rate(results[name])}",
+            file=sys.stderr,
+        )
+
+    sizes = [] if args.filter and "corpus" not in args.filter else args.corpus_sizes
+    if np is None:
+        if sizes:
+            print(
+                "numpy is not installed; skipping the corpus benchmarks",
+                file=sys.stderr,
+            )
+    elif sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            corpus_results = _run_corpus_benchmarks(
+                sizes, directory, args.min_time, args.repeat
+            )
+        for name, result in corpus_results.items():
+            results[name] = result
+            print(
+                f"{name:<32} {result['seconds'] * 1e3:12.2f} ms {_format_rate(result)}",
+                file=sys.stderr,
+            )
+
+    report = {
+        "schema": SCHEMA_VERSION,
+        "metadata": _metadata(crypto),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as outfile:
+            outfile.write(text)
+    else:
+        sys.stdout.write(text)
+
+    if args.write_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as outfile:
+            outfile.write(text)
+        return 0
+
+    if args.no_compare or not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding="utf-8") as infile:
+        baseline = json.load(infile)
+    if baseline.get("schema") != SCHEMA_VERSION:
+        print(
+            f"{args.baseline} has an unsupported schema; not comparing", file=sys.stderr
+        )
+        return 0
+    if baseline["metadata"] != report["metadata"]:
+        print(
+            f"Warning: {args.baseline} was recorded in a different environment: {baseline['metadata']}",
+            file=sys.stderr,
+        )
+
+    regressions = compare(report, baseline, args.threshold)
+    for name, reference, current, ratio in regressions:
+        print(
+            f"REGRESSION {name}: {reference * 1e6:.2f} us -> {current * 1e6:.2f} us ({ratio:.2f}x)",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+
+    def _parse_args():
+        parser = argparse.ArgumentParser()
+        parser.add_argument(
+            "-o",
+            "--output",
+            metavar="filename",
+            help="Write the JSON results here instead of to stdout.",
+        )
+        parser.add_argument(
+            "--baseline",
+            metavar="filename",
+            default=DEFAULT_BASELINE,
+            help="Baseline results to compare against.",
+        )
+        parser.add_argument(
+            "--write_baseline",
+            action="store_true",
+            help="Store the results as the new baseline instead of comparing against it.",
+        )
+        parser.add_argument(
+            "--no_compare",
+            action="store_true",
+            help="Do not compare against the baseline.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.20,
+            help="Relative slowdown beyond which a benchmark is reported as a regression.",
+        )
+        parser.add_argument(
+            "--min_time",
+            type=float,
+            default=0.2,
+            help="Minimum duration, in seconds, of each timing run.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of timing runs; the fastest is reported.",
+        )
+        parser.add_argument(
+            "--corpus_sizes",
+            type=lambda value: [int(count) for count in value.split(",") if count],
+            default=[1000, 100000],
+            help="Comma-separated numbers of dumps for the corpus benchmarks; empty to skip them.",
+        )
+        parser.add_argument(
+            "--filter",
+            help="Only run the benchmarks whose names contain this text.",
+        )
+        parser.add_argument(
+            "--crypto_backend",
+            choices=backend.registered_backends(),
+            default="python",
+            help="Implementation to use for SHA1/RC4. The pure-Python reference is the default, since it is "
+            "available everywhere.",
+        )
+        args = parser.parse_args()
+        if args.repeat < 1 or args.min_time <= 0 or args.threshold < 0:
+            parser.error(
+                "--repeat and --min_time must be positive and --threshold must not be negative"
+            )
+        return args
+
+    sys.exit(_main(_parse_args()))
@@ -0,0 +1,198 @@
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import unittest
+
+from xk import eeprom
+from .xk.helpers import TempDirTestCase
+from .xk.helpers import make_encrypted_eeprom
+
+XBEEPROM = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "xbeeprom.py"
+)
+
+
+class CommandLineTestCase(TempDirTestCase):
+    def _run(self, *args, stdin: bytes = b"") -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, XBEEPROM, *args],
+            input=stdin,
+            capture_output=True,
+            check=False,
+        )
+
+    def test_stream_conflicts(self):
+        for args in (["--batch"], ["--archive"], ["--in_place"], ["--offset", "16"]):
+            with self.subTest(args=args):
+                result = self._run("--stream", *args)
+                self.assertEqual(2, result.returncode)
+                self.assertIn(b"--stream cannot be combined", result.stderr)
+
+    def test_stream_null_skips_unreadable_paths(self):
+        dumps = [
+            make_encrypted_eeprom(version)
+            for version in (eeprom.XBOX_VERSION.V1_0, eeprom.XBOX_VERSION.V1_6)
+        ]
+        paths = [
+            self.write_file("first.bin", dumps[0]),
+            os.path.join(self.tempdir, "missing.bin"),
+            self.write_file("short.bin", dumps[1][:16]),
+            self.write_file("second.bin", dumps[1]),
+        ]
+
+        result = self._run(
+            "--stream", "-0", stdin=b"\0".join(path.encode() for path in paths)
+        )
+        self.assertEqual(1, result.returncode)
+        # The unreadable paths are reported and left out of the output.
+        self.assertEqual(b"".join(dumps), result.stdout)
+        self.assertIn(b"missing.bin", result.stderr)
+        self.assertIn(b"short.bin", result.stderr)
+
+        result = self._run(
+            "--stream", "-0", stdin=b"\0".join(path.encode() for path in paths[::3])
+        )
+        self.assertEqual(0, result.returncode)
+        self.assertEqual(b"".join(dumps), result.stdout)
+
+
+class BatchTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.output_dir = os.path.join(self.tempdir, "out")
+
+    def _run(self, *args) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, XBEEPROM, "--enable_dts", *args],
+            capture_output=True,
+            check=False,
+        )
+
+    @staticmethod
+    def _edited(dump: bytes) -> bytes:
+        e = eeprom.EEPROM()
+        e.read_from_buffer(dump)
+        e.dts_flag = True
+        return bytes(e.encrypt())
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, "rb") as infile:
+            return infile.read()
+
+    def _read_output(self, *parts) -> bytes:
+        return self._read(os.path.join(self.output_dir, *parts))
+
+    def _write_tar(self, name: str, members) -> str:
+        path = os.path.join(self.tempdir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tarfile.open(path, "w") as archive:
+            for member_name, contents in members:
+                info = tarfile.TarInfo(member_name)
+                info.size = len(contents)
+                archive.addfile(info, io.BytesIO(contents))
+        return path
+
+    def test_output_dir_mirrors_inputs(self):
+        dumps = [
+            make_encrypted_eeprom(version) for version in eeprom.DECRYPT_VERSIONS[:2]
+        ]
+        paths = [
+            self.write_file(os.path.join(name, "eeprom.bin"), dump)
+            for name, dump in zip("ab", dumps)
+        ]
+
+        result = self._run(
+            "--batch", "--jobs", "1", "--output_dir", self.output_dir, *paths
+        )
+        self.assertEqual(0, result.returncode, result.stdout)
+        for name, dump in zip("ab", dumps):
+            self.assertEqual(self._edited(dump), self._read_output(name, "eeprom.bin"))
+
+    def test_archives_with_the_same_name(self):
+        dumps = [
+            make_encrypted_eeprom(version) for version in eeprom.DECRYPT_VERSIONS[:2]
+        ]
+        archives = [
+            self._write_tar(os.path.join(name, "dumps.tar"), [("eeprom.bin", dump)])
+            for name, dump in zip("ab", dumps)
+        ]
+
+        result = self._run(
+            "--archive", "--jobs", "1", "--output_dir", self.output_dir, *archives
+        )
+        self.assertEqual(0, result.returncode, result.stdout)
+        for name, dump in zip("ab", dumps):
+            self.assertEqual(
+                self._edited(dump), self._read_output(name, "dumps.tar", "eeprom.bin")
+            )
+
+        result = self._run(
+            "--archive", "--output_dir", self.output_dir, archives[0], archives[0]
+        )
+        self.assertEqual(1, result.returncode)
+        self.assertIn(b"would both be written to", result.stdout)
+
+    def test_duplicate_archive_members(self):
+        dumps = [
+            make_encrypted_eeprom(version) for version in eeprom.DECRYPT_VERSIONS[:2]
+        ]
+        archive = self._write_tar(
+            "dumps.tar", [("eeprom.bin", dumps[0]), ("./eeprom.bin", dumps[1])]
+        )
+
+        result = self._run(
+            "--archive", "--jobs", "1", "--output_dir", self.output_dir, archive
+        )
+        self.assertEqual(1, result.returncode)
+        self.assertIn(b"FAILED " + archive.encode() + b":./eeprom.bin", result.stdout)
+        self.assertIn(b"Processed 2 files: 1 succeeded, 1 failed", result.stdout)
+        # The first member's output is not overwritten by the second.
+        self.assertEqual(
+            self._edited(dumps[0]), self._read_output("dumps.tar", "eeprom.bin")
+        )
+
+    def test_journal_skips_processed_inputs(self):
+        for in_place in (False, True):
+            with self.subTest(in_place=in_place):
+                directory = os.path.join(self.tempdir, f"in_place_{in_place}")
+                paths = [
+                    self.write_file(
+                        os.path.join(directory, f"eeprom{i}.bin"),
+                        make_encrypted_eeprom(version),
+                    )
+                    for i, version in enumerate(eeprom.DECRYPT_VERSIONS)
+                ]
+                args = [
+                    "--batch",
+                    "--journal",
+                    os.path.join(directory, "job.journal"),
+                    *paths,
+                ]
+                if in_place:
+                    args.append("--in_place")
+
+                result = self._run(*args)
+                self.assertEqual(0, result.returncode, result.stdout)
+                count = len(paths)
+                self.assertIn(
+                    f"{count} succeeded, 0 failed, 0 skipped".encode(), result.stdout
+                )
+                outputs = [
+                    path if in_place else path + ".modified.bin" for path in paths
+                ]
+                contents = [self._read(path) for path in outputs]
+
+                result = self._run(*args)
+                self.assertEqual(0, result.returncode, result.stdout)
+                self.assertIn(
+                    f"Processed 0 files: 0 succeeded, 0 failed, {count} skipped".encode(),
+                    result.stdout,
+                )
+                self.assertEqual(contents, [self._read(path) for path in outputs])
+
+
+if __name__ == "__main__":
+    unittest.main()
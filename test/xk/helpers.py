@@ -0,0 +1,64 @@
+"""Fixtures shared by the xk tests."""
+
+import os
+import struct
+import tempfile
+import unittest
+
+from xk import eeprom
+from xk import sha1
+
+# Decrypted contents of the dumps returned by `make_encrypted_eeprom`.
+SERIAL = "123456789012"
+MAC = "00:50:F2:01:02:03"
+HDD_KEY = bytes(range(0x1C, 0x2C))
+
+
+def make_plaintext_eeprom() -> bytearray:
+    """Returns a decrypted dump with a North American region, the values above, and NTSC-M video."""
+    plain = bytearray(eeprom.EEPROM_SIZE)
+    for i in range(0x14, 0x2C):
+        plain[i] = i
+    plain[0x2C] = eeprom.XBE_REGION.NORTH_AMERICA.value
+    plain[0x34:0x40] = SERIAL.encode("ascii")
+    plain[0x40:0x46] = bytes.fromhex(MAC.replace(":", ""))
+    plain[0x58:0x5C] = eeprom.VIDEO_STANDARD.NTSC_M.value.to_bytes(4, "little")
+    return plain
+
+
+def make_encrypted_eeprom(version: eeprom.XBOX_VERSION) -> bytes:
+    """Returns `make_plaintext_eeprom()` encrypted for the given version."""
+    data = eeprom.EEPROMData.from_buffer_copy(make_plaintext_eeprom())
+    data._encrypted = False
+    data.encrypt(version)
+    return bytes(data)
+
+
+def reference_xbox_hmac_sha1(version: int, message: bytes) -> bytes:
+    """Hashes `message` a whole padded block at a time, as a reference for the single-block fast paths."""
+    inner = sha1.HMAC1_STATES[version]
+    padded = sha1.pad_message(message)
+    for start in range(0, len(padded), 64):
+        inner = sha1._compress_block(inner, padded[start : start + 64])
+
+    outer = sha1._compress_block(
+        sha1.HMAC2_STATES[version], sha1.pad_message(struct.pack(">5L", *inner))
+    )
+    return struct.pack(">5L", *outer)
+
+
+class TempDirTestCase(unittest.TestCase):
+    """TestCase with a temporary directory that is removed after each test."""
+
+    def setUp(self):
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.tempdir = tempdir.name
+
+    def write_file(self, name: str, contents: bytes) -> str:
+        """Writes `contents` to `name` within the temporary directory, returning its path."""
+        path = os.path.join(self.tempdir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as outfile:
+            outfile.write(contents)
+        return path
@@ -0,0 +1,75 @@
+import io
+import os
+import tarfile
+import unittest
+import zipfile
+
+from xk import archive
+from xk import eeprom
+from .helpers import TempDirTestCase
+from .helpers import make_encrypted_eeprom
+
+
+class ArchiveTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.members = {
+            "a/eeprom1.bin": make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_0),
+            "b/eeprom2.bin": make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_6),
+            "b/eeprom3.bin": make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_1) + b"x",
+            "b/short.bin": b"too short",
+            "b/readme.txt": bytes(eeprom.EEPROM_SIZE),
+        }
+        self.expected = [
+            (name, contents[: eeprom.EEPROM_SIZE])
+            for name, contents in self.members.items()
+            if name.endswith(".bin") and len(contents) >= eeprom.EEPROM_SIZE
+        ]
+
+    def _write_zip(self) -> str:
+        path = os.path.join(self.tempdir, "dumps.zip")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as outfile:
+            for name, contents in self.members.items():
+                outfile.writestr(name, contents)
+        return path
+
+    def _write_tar(self) -> str:
+        path = os.path.join(self.tempdir, "dumps.tar.gz")
+        with tarfile.open(path, "w:gz") as outfile:
+            for name, contents in self.members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(contents)
+                outfile.addfile(info, io.BytesIO(contents))
+        return path
+
+    def test_iter_dumps(self):
+        for path in (self._write_zip(), self._write_tar()):
+            with self.subTest(path=path):
+                self.assertTrue(archive.is_archive(path))
+                self.assertEqual(self.expected, list(archive.iter_dumps(path)))
+
+                name, dump = next(archive.iter_dumps(path))
+                e = eeprom.EEPROM()
+                e.read_from_buffer(dump)
+                self.assertEqual(eeprom.XBOX_VERSION.V1_0, e._version)
+
+    def test_iter_dump_batches(self):
+        batches = list(archive.iter_dump_batches(self._write_tar(), batch_size=2))
+        self.assertEqual(
+            [name for name, _ in self.expected],
+            [name for names, _ in batches for name in names],
+        )
+        self.assertEqual(
+            b"".join(dump for _, dump in self.expected),
+            b"".join(dumps for _, dumps in batches),
+        )
+
+    def test_not_an_archive(self):
+        path = self.write_file("eeprom.bin", self.expected[0][1])
+        self.assertFalse(archive.is_archive(path))
+        with self.assertRaises(ValueError):
+            archive.iter_dumps(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import unittest
+
+from xk import backend
+from xk import eeprom
+
+_VERSIONS = (
+    eeprom.XBOX_VERSION.V1_0,
+    eeprom.XBOX_VERSION.V1_1,
+    eeprom.XBOX_VERSION.V1_6,
+)
+
+
+def _make_plaintext(seed: int) -> bytes:
+    plain = bytearray((seed * 7 + i * 13) & 0xFF for i in range(eeprom.EEPROM_SIZE))
+    plain[0x2C:0x30] = eeprom.XBE_REGION.EURO_AUSTRALIA.value.to_bytes(4, "little")
+    return bytes(plain)
+
+
+def _encrypt(crypto: backend.CryptoBackend, plain: bytes, version) -> bytes:
+    data = eeprom.EEPROMData.from_buffer_copy(plain)
+    data.crypto_backend = crypto
+    data._encrypted = False
+    data.encrypt(version)
+    return bytes(data)
+
+
+class BackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.reference = backend.get_backend("python")
+
+    def test_registry(self):
+        self.assertIn("python", backend.available_backends())
+        self.assertIsInstance(backend.get_backend(), backend.CryptoBackend)
+        with self.assertRaises(ValueError):
+            backend.get_backend("does_not_exist")
+        with self.assertRaises(TypeError):
+            backend.CryptoBackend()  # pylint: disable=abstract-class-instantiated
+
+    @unittest.skipIf("XK_CRYPTO_BACKEND" in os.environ, "default backend overridden")
+    def test_default_is_python(self):
+        self.assertIs(self.reference, backend.get_backend())
+
+    def test_backends_match_reference(self):
+        for name in backend.available_backends():
+            crypto = backend.get_backend(name)
+            with self.subTest(backend=name):
+                for length in (0, 20, 28, 55, 56, 64, 100):
+                    message = bytes(range(length))
+                    for version in (9, *_VERSIONS):
+                        self.assertEqual(
+                            self.reference.xbox_hmac_sha1(version, message),
+                            crypto.xbox_hmac_sha1(version, message),
+                        )
+
+                key = bytes(range(20))
+                self.assertEqual(
+                    self.reference.rc4(key, bytes(28)), crypto.rc4(key, bytes(28))
+                )
+
+                for seed, version in enumerate(_VERSIONS):
+                    plain = _make_plaintext(seed)
+                    encrypted = _encrypt(crypto, plain, version)
+                    self.assertEqual(
+                        _encrypt(self.reference, plain, version), encrypted
+                    )
+
+                    data = eeprom.EEPROMData.from_buffer_copy(encrypted)
+                    data.crypto_backend = crypto
+                    self.assertEqual(version, data.decrypt())
+                    self.assertEqual(
+                        plain[slice(*eeprom.SECRET_RANGE)],
+                        bytes(data)[slice(*eeprom.SECRET_RANGE)],
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
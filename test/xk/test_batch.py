@@ -0,0 +1,55 @@
+import os
+import unittest
+
+try:
+    import numpy as np
+
+    from xk import batch
+except ImportError:
+    np = None
+
+from xk import eeprom
+from .helpers import make_encrypted_eeprom
+
+_VERSIONS = (
+    eeprom.XBOX_VERSION.V1_0,
+    eeprom.XBOX_VERSION.V1_6,
+    eeprom.XBOX_VERSION.V1_1,
+    eeprom.XBOX_VERSION.V1_0,
+)
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dumps = [make_encrypted_eeprom(version) for version in _VERSIONS]
+        self.dumps.append(os.urandom(eeprom.EEPROM_SIZE))
+
+    def test_decrypt_many(self):
+        records, versions = batch.decrypt_many(b"".join(self.dumps))
+
+        self.assertEqual([*_VERSIONS, eeprom.XBOX_VERSION.V_NONE], versions.tolist())
+        for record, dump in zip(records[:-1], self.dumps):
+            data = eeprom.EEPROMData.from_buffer_copy(dump)
+            data.decrypt()
+            self.assertEqual(bytes(data), record.tobytes())
+        self.assertEqual(self.dumps[-1], records[-1].tobytes())
+
+    def test_encrypt_many_round_trip(self):
+        records, versions = batch.decrypt_many(b"".join(self.dumps))
+        encrypted = batch.encrypt_many(records, versions)
+        self.assertEqual(b"".join(self.dumps), encrypted.tobytes())
+
+        # Re-encrypting as a different version matches the scalar implementation.
+        records["VideoStandard"][0] = eeprom.VIDEO_STANDARD.PAL_I.value
+        encrypted = batch.encrypt_many(records[:1], eeprom.XBOX_VERSION.V1_6)
+
+        data = eeprom.EEPROMData.from_buffer_copy(self.dumps[0])
+        data.decrypt()
+        data.VideoStandard = eeprom.VIDEO_STANDARD.PAL_I.value
+        data.encrypt(eeprom.XBOX_VERSION.V1_6)
+        self.assertEqual(bytes(data), encrypted.tobytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
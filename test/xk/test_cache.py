@@ -0,0 +1,87 @@
+import os
+import unittest
+from unittest import mock
+
+from xk import cache
+from xk import eeprom
+from .helpers import TempDirTestCase
+from .helpers import make_encrypted_eeprom
+
+
+class DecryptCacheTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def _create_cache(self, **kwargs) -> cache.DecryptCache:
+        decrypt_cache = cache.DecryptCache(self.tempdir, **kwargs)
+        self.addCleanup(decrypt_cache.close)
+        return decrypt_cache
+
+    def test_hit_and_miss(self):
+        decrypt_cache = self._create_cache()
+        header = bytes(range(0x30))
+
+        self.assertIsNone(decrypt_cache.get(header))
+        decrypt_cache.put(header, 0x0C, b"secret")
+        self.assertEqual((0x0C, b"secret"), decrypt_cache.get(header))
+        self.assertEqual({"hits": 1, "misses": 1, "entries": 1}, decrypt_cache.stats())
+
+        # Entries persist across instances.
+        decrypt_cache.close()
+        self.assertEqual((0x0C, b"secret"), self._create_cache().get(header))
+
+    def test_lru_eviction(self):
+        decrypt_cache = self._create_cache(max_entries=10)
+        headers = [bytes([i]) * 0x30 for i in range(11)]
+        for i, header in enumerate(headers[:10]):
+            decrypt_cache.put(header, 0x0A, bytes([i]))
+
+        # Touch the oldest entry so that the second oldest is evicted instead.
+        self.assertIsNotNone(decrypt_cache.get(headers[0]))
+        decrypt_cache.put(headers[10], 0x0A, b"new")
+
+        self.assertIsNotNone(decrypt_cache.get(headers[0]))
+        self.assertIsNone(decrypt_cache.get(headers[1]))
+        self.assertIsNotNone(decrypt_cache.get(headers[10]))
+        self.assertLessEqual(decrypt_cache.stats()["entries"], 10)
+
+    def test_disabled_by_environment(self):
+        with mock.patch.dict(os.environ, {"XK_DISABLE_DECRYPT_CACHE": "1"}):
+            decrypt_cache = self._create_cache()
+        header = bytes(0x30)
+        decrypt_cache.put(header, 0x0A, b"secret")
+        self.assertIsNone(decrypt_cache.get(header))
+        self.assertFalse(os.path.exists(decrypt_cache.path))
+
+    def test_eeprom_uses_cache(self):
+        original = make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_0)
+        path = self.write_file("eeprom.bin", original)
+
+        decrypt_cache = self._create_cache()
+        results = []
+        for _ in range(2):
+            e = eeprom.EEPROM(decrypt_cache=decrypt_cache)
+            e.read_from_bin_file(path)
+            e.dts_flag = True
+            results.append(bytes(e.encrypt()))
+
+        self.assertEqual(1, decrypt_cache.hits)
+        self.assertEqual(1, decrypt_cache.misses)
+        self.assertEqual(results[0], results[1])
+
+    def test_private_file(self):
+        path = os.path.join(self.tempdir, "sub", "private.sqlite3")
+        cache.create_private_file(path)
+        self.assertEqual(0o700, os.stat(os.path.dirname(path)).st_mode & 0o777)
+        self.assertEqual(0o600, os.stat(path).st_mode & 0o777)
+
+    def test_create_eeprom_shares_cache(self):
+        first = eeprom.create_eeprom(decrypt_cache_dir=self.tempdir)
+        second = eeprom.create_eeprom(True, decrypt_cache_dir=self.tempdir)
+        self.addCleanup(first._decrypt_cache.close)
+        self.assertIs(first._decrypt_cache, second._decrypt_cache)
+        self.assertIsNone(eeprom.create_eeprom()._decrypt_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
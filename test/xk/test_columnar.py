@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+
+    from xk import columnar
+except ImportError:
+    np = None
+
+from xk import crc
+from xk import eeprom
+from .helpers import make_encrypted_eeprom
+
+
+def _make_dumps():
+    dumps = []
+    for i in range(4):
+        data = eeprom.EEPROMData.from_buffer_copy(
+            make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_0)
+        )
+        data.SerialNumber[11] = ord("0") + i
+        data.MACAddress[5] = i % 3
+        data.VideoStandard = (
+            eeprom.VIDEO_STANDARD.PAL_I.value
+            if i % 2
+            else eeprom.VIDEO_STANDARD.NTSC_M.value
+        )
+        data.dts_flag = i == 2
+        dumps.append(bytes(data))
+    return dumps
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class ColumnarTestCase(unittest.TestCase):
+    def test_dtype_matches_structure(self):
+        self.assertEqual(eeprom.EEPROM_SIZE, columnar.EEPROM_DTYPE.itemsize)
+        for name, _ in eeprom.EEPROMData._fields_:
+            field = getattr(eeprom.EEPROMData, name)
+            dtype, offset = columnar.EEPROM_DTYPE.fields[name]
+            self.assertEqual(field.offset, offset)
+            self.assertEqual(field.size, dtype.itemsize)
+
+    def test_from_buffer(self):
+        dumps = _make_dumps()
+        buffer = bytearray(b"".join(dumps))
+        records = columnar.from_buffer(buffer)
+
+        self.assertEqual(len(dumps), len(records))
+        self.assertTrue(np.shares_memory(records, np.frombuffer(buffer, np.uint8)))
+        for record, dump in zip(records, dumps):
+            data = eeprom.EEPROMData.from_buffer_copy(dump)
+            self.assertEqual(data.VideoStandard, record["VideoStandard"])
+            self.assertEqual(bytes(data.SerialNumber), record["SerialNumber"].tobytes())
+            self.assertEqual(
+                bytes(data.HMAC_SHA1_Hash), record["HMAC_SHA1_Hash"].tobytes()
+            )
+        self.assertEqual(dumps[1], columnar.as_bytes(records)[1].tobytes())
+
+    def test_queries(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "dumps.bin")
+            with open(path, "wb") as outfile:
+                outfile.write(b"".join(_make_dumps()))
+
+            records = columnar.load(path)
+            self.assertEqual(
+                {
+                    eeprom.VIDEO_STANDARD.NTSC_M.value: 2,
+                    eeprom.VIDEO_STANDARD.PAL_I.value: 2,
+                },
+                columnar.count_by(records, "VideoStandard"),
+            )
+            self.assertEqual(
+                [False, False, True, False],
+                columnar.has_audio_flag(records, "DTS").tolist(),
+            )
+            self.assertEqual(
+                [True, False, False, True],
+                columnar.duplicate_mask(records, "MACAddress").tolist(),
+            )
+            self.assertEqual(
+                2,
+                columnar.count_by(records, "MACAddress")[
+                    bytes(records[0]["MACAddress"])
+                ],
+            )
+            del records
+
+    def test_verify_checksums(self):
+        dumps = []
+        for dump in _make_dumps():
+            data = eeprom.EEPROMData.from_buffer_copy(dump)
+            data._update_checksums()
+            dumps.append(bytes(data))
+        corrupted = bytearray(dumps[1])
+        corrupted[0x70] ^= 0x01
+        dumps[1] = bytes(corrupted)
+        dumps.append(bytes(eeprom.EEPROM_SIZE))
+
+        checksum2, checksum3 = columnar.compute_checksums(b"".join(dumps))
+        for i, dump in enumerate(dumps):
+            self.assertEqual(
+                crc.quick_crc(dump[slice(*eeprom.CHECKSUM2_RANGE)])[0], checksum2[i]
+            )
+            self.assertEqual(
+                crc.quick_crc(dump[slice(*eeprom.CHECKSUM3_RANGE)])[0], checksum3[i]
+            )
+
+        records = columnar.from_buffer(b"".join(dumps))
+        self.assertEqual(
+            [True, False, True, True, False],
+            columnar.verify_checksums(records).tolist(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import unittest
+
+from xk import corpus
+from xk import eeprom
+from .helpers import MAC
+from .helpers import TempDirTestCase
+from .helpers import make_encrypted_eeprom
+
+
+def _make_dumps():
+    dumps = []
+    for i in range(40):
+        data = eeprom.EEPROMData.from_buffer_copy(
+            make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_1)
+        )
+        data.SerialNumber[:] = b"%012d" % (i * 7919 % 40)
+        data.MACAddress[5] = i % 16
+        dumps.append(bytes(data))
+    return dumps
+
+
+class CorpusTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tempdir, "dumps.corpus")
+
+    def _open(self) -> corpus.Corpus:
+        packed = corpus.Corpus(self.path)
+        self.addCleanup(packed.close)
+        return packed
+
+    def test_round_trip(self):
+        dumps = _make_dumps()
+        self.assertEqual(len(dumps), corpus.build(self.path, dumps))
+
+        packed = self._open()
+        self.assertEqual(len(dumps), len(packed))
+        self.assertEqual(dumps, list(packed))
+        self.assertEqual(dumps[7], packed.record(7))
+        self.assertEqual(b"".join(dumps), bytes(packed.records()))
+        with self.assertRaises(IndexError):
+            packed.record(len(dumps))
+
+    def test_lookups(self):
+        dumps = _make_dumps()
+        corpus.build(self.path, dumps)
+        packed = self._open()
+
+        for i, dump in enumerate(dumps):
+            data = eeprom.EEPROMData.from_buffer_copy(dump)
+            self.assertEqual([i], packed.find_serial(bytes(data.SerialNumber)))
+            expected = [j for j in range(len(dumps)) if j % 16 == data.MACAddress[5]]
+            self.assertEqual(expected, packed.find_mac(bytes(data.MACAddress)))
+
+        self.assertEqual([0], packed.find_serial("000000000000"))
+        self.assertEqual([3, 19, 35], packed.find_mac(MAC))
+        self.assertEqual([], packed.find_serial("999999999999"))
+        self.assertEqual([], packed.find_mac(bytes(6)))
+
+    def test_open_eeprom(self):
+        dumps = _make_dumps()
+        corpus.build(self.path, dumps)
+        packed = self._open()
+
+        e = packed.open_eeprom(5)
+        self.addCleanup(e.close)
+        self.assertEqual(eeprom.XBOX_VERSION.V1_1, e._version)
+        e.dts_flag = True
+        e.encrypt()
+        e.flush()
+        self.assertEqual(dumps[5], packed.record(5))
+
+    def test_open_eeprom_failure(self):
+        corpus.build(self.path, [bytes(eeprom.EEPROM_SIZE)])
+        packed = self._open()
+
+        e = eeprom.EEPROM()
+        with self.assertRaises(Exception):
+            packed.open_eeprom(0, e)
+        self.assertIsNone(e._mapping)
+
+    def test_build_from_directory(self):
+        dumps = _make_dumps()[:3]
+        for name, dump in zip(("b/2.bin", "a.bin", "b/1.bin"), dumps):
+            self.write_file(os.path.join("dumps", name), dump)
+        self.write_file("dumps/short.bin", b"short")
+        source = os.path.join(self.tempdir, "dumps")
+
+        corpus.build(self.path, corpus.iter_directory_dumps(source))
+        self.assertEqual([dumps[1], dumps[2], dumps[0]], list(self._open()))
+
+    def test_invalid(self):
+        with open(self.path, "wb") as outfile:
+            outfile.write(bytes(eeprom.EEPROM_SIZE))
+        with self.assertRaises(ValueError):
+            corpus.Corpus(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
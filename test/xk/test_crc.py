@@ -1,5 +1,11 @@
+import os
 import unittest
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from xk import crc
 
 
@@ -25,6 +31,38 @@ class CRCCase(unittest.TestCase):
         val, _ = crc.quick_crc(buffer[8:], state)
         self.assertEqual(0xC8CDD2D7, val)
 
+    def test_region_checksum_replace(self):
+        buffer = bytearray(range(20))
+        checksum = crc.RegionChecksum.from_buffer(buffer, 4, 20)
+
+        old = bytes(buffer[8:12])
+        buffer[8:12] = b"\xff\xff\xff\xff"
+        checksum.replace_bytes(old, buffer[8:12])
+        self.assertEqual(crc.quick_crc(buffer[4:20]), (checksum.value, checksum.state))
+
+        checksum.replace(0xFFFFFFFF, 0x01020304)
+        buffer[8:12] = (0x01020304).to_bytes(4, "little")
+        self.assertEqual(crc.quick_crc(buffer[4:20]), (checksum.value, checksum.state))
+
+    def test_region_checksum_carry(self):
+        buffer = b"\xff" * 16
+        checksum = crc.RegionChecksum.from_buffer(buffer)
+        self.assertEqual((3, 0xFFFFFFFC), checksum.state)
+        self.assertEqual(0, checksum.value)
+
+        _, state = crc.quick_crc(buffer[:8], checksum.state)
+        self.assertEqual((5, 0xFFFFFFFA), state)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_batch_region_checksums(self):
+        buffers = [os.urandom(64) for _ in range(8)]
+        buffers.append(b"\xff" * 64)
+        dumps = np.frombuffer(b"".join(buffers), dtype=np.uint8).reshape(-1, 64)
+
+        result = crc.batch_region_checksums(dumps, 4, 60)
+        expected = [crc.quick_crc(buffer[4:60])[0] for buffer in buffers]
+        self.assertEqual(expected, result.tolist())
+
 
 if __name__ == "__main__":
     unittest.main()
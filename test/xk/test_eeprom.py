@@ -0,0 +1,256 @@
+import concurrent.futures
+import ctypes
+import os
+import unittest
+from typing import Tuple
+
+from xk import crc
+from xk import eeprom
+from .helpers import TempDirTestCase
+from .helpers import make_encrypted_eeprom
+
+
+class EEPROMTestCase(TempDirTestCase):
+    def _write_dump(self, contents: bytes) -> str:
+        return self.write_file("eeprom.bin", contents)
+
+    def test_round_trip(self):
+        for version in (
+            eeprom.XBOX_VERSION.V1_0,
+            eeprom.XBOX_VERSION.V1_1,
+            eeprom.XBOX_VERSION.V1_6,
+        ):
+            original = make_encrypted_eeprom(version)
+            path = self._write_dump(original)
+
+            e = eeprom.EEPROM()
+            e.read_from_bin_file(path)
+            self.assertEqual(version, e._version)
+            self.assertEqual(original, bytes(e.encrypt()))
+
+    def test_settings_only_matches_full_encrypt(self):
+        path = self._write_dump(make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_6))
+
+        full = eeprom.EEPROM()
+        full.read_from_bin_file(path)
+        full.audio_mode = eeprom.AudioMode.SURROUND
+        full.dts_flag = True
+        expected = full.encrypt()
+
+        settings_only = eeprom.EEPROM(settings_only=True)
+        settings_only.read_from_bin_file(path)
+        settings_only.audio_mode = eeprom.AudioMode.SURROUND
+        settings_only.dts_flag = True
+        result = settings_only.encrypt()
+
+        self.assertIsNone(settings_only._version)
+        self.assertEqual(expected, result)
+
+    def test_settings_only_rejects_factory_edits(self):
+        path = self._write_dump(make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_1))
+
+        e = eeprom.EEPROM(settings_only=True)
+        e.read_from_bin_file(path)
+        e.dts_flag = True
+        e.encrypt()
+        # Encrypting again (with Checksum3 already updated) is still allowed.
+        e.encrypt()
+
+        e.data.SerialNumber[0] ^= 0xFF
+        with self.assertRaises(ValueError):
+            e.encrypt()
+
+    def _assert_incremental_matches_full(self, modify):
+        original = make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_1)
+
+        incremental = eeprom.EEPROMData.from_buffer_copy(original)
+        version = incremental.decrypt()
+        modify(incremental)
+
+        full = eeprom.EEPROMData.from_buffer_copy(original)
+        full.decrypt()
+        modify(full)
+
+        incremental.encrypt(version)
+        full.encrypt(version, full=True)
+        self.assertEqual(bytes(full), bytes(incremental))
+
+    def test_incremental_encrypt_unmodified(self):
+        self._assert_incremental_matches_full(lambda data: None)
+
+    def test_incremental_encrypt_settings(self):
+        def modify(data):
+            data.dolby_digital_flag = True
+            self.assertEqual(
+                [eeprom._FIELD_RANGES["AudioFlags"]], data.modified_ranges()
+            )
+
+        self._assert_incremental_matches_full(modify)
+
+    def test_incremental_encrypt_factory_fields(self):
+        def modify(data):
+            data.SerialNumber[0] = ord("9")
+
+        self._assert_incremental_matches_full(modify)
+
+    def test_incremental_encrypt_secrets(self):
+        def modify(data):
+            data.HDDKey[3] ^= 0xFF
+            data.XBERegion = eeprom.XBE_REGION.JAPAN.value
+
+        self._assert_incremental_matches_full(modify)
+
+    def test_checksums_match_recompute(self):
+        data = eeprom.EEPROMData.from_buffer_copy(
+            make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_6)
+        )
+        version = data.decrypt()
+        data.audio_mode = eeprom.AudioMode.MONO
+        data.MACAddress = (eeprom.EEPROMData.MACAddress.size * ctypes.c_uint8)(
+            1, 2, 3, 4, 5, 6
+        )
+        data.LanguageID = 3
+        data.encrypt(version)
+
+        raw = bytes(data)
+        self.assertEqual(
+            crc.quick_crc(raw[slice(*eeprom.CHECKSUM2_RANGE)])[0], data.Checksum2
+        )
+        self.assertEqual(
+            crc.quick_crc(raw[slice(*eeprom.CHECKSUM3_RANGE)])[0], data.Checksum3
+        )
+
+    def test_reference_dump(self):
+        # A v1.1 dump with serial 123456789012, MAC 00:50:F2:01:02:03, NTSC-M video, LanguageID 1 and AudioFlags
+        # 0x00010001. Checksum2 is the complement of the sum of the 11 words at 0x34-0x5F:
+        #   0x34333231 + 0x38373635 + 0x32313039 + 0x01F25000 + 0x00000302 + 0x00400100 = 0xA0CDECA1
+        # which includes the word at 0x44 holding the last two MAC bytes (older releases skipped it, giving 0x5F321660).
+        # Checksum3 is the complement of 0x00000001 + 0x00010001.
+        reference = bytes.fromhex(
+            "D335D82AB1898A98098A63A1B70AE752885ADA4D85A6D5FD0F6A6FAA4284BC12"
+            "41E74E29A10A3E65AD7A3828F7C7662B5E13325F313233343536373839303132"
+            "0050F20102030000000000000000000000000000000000000001400000000000"
+            "FDFFFEFF00000000000000000000000000000000000000000000000000000000"
+            "0000000000000000000000000000000001000000000000000100010000000000"
+        ) + bytes(0x60)
+
+        data = eeprom.EEPROMData.from_buffer_copy(reference)
+        self.assertEqual(eeprom.XBOX_VERSION.V1_1, data.decrypt())
+        self.assertEqual(0x5F32135E, data.Checksum2)
+        self.assertEqual(0xFFFEFFFD, data.Checksum3)
+
+        data.Checksum2 = 0
+        data.Checksum3 = 0
+        data.encrypt(eeprom.XBOX_VERSION.V1_1, full=True)
+        self.assertEqual(reference, bytes(data))
+
+    def _expected_edit(self, original: bytes, settings_only: bool) -> bytes:
+        expected = eeprom.EEPROM(settings_only=settings_only)
+        expected.read_from_bin_file(self._write_dump(original))
+        expected.dts_flag = True
+        return bytes(expected.encrypt())
+
+    def _write_image(self, dump: bytes, offset: int) -> Tuple[str, bytes]:
+        image = os.urandom(offset) + dump + os.urandom(0x1000)
+        return self.write_file("flash.bin", image), image
+
+    def test_mapped_in_place(self):
+        original = make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_1)
+        offset = 0x2040
+        for settings_only in (False, True):
+            expected = self._expected_edit(original, settings_only)
+            path, image = self._write_image(original, offset)
+
+            e = eeprom.EEPROM(settings_only=settings_only)
+            e.open_mapped(path, offset)
+            e.dts_flag = True
+            self.assertEqual(expected, bytes(e.encrypt()))
+            e.flush()
+            e.close()
+
+            with open(path, "rb") as infile:
+                result = infile.read()
+            self.assertEqual(image[:offset], result[:offset])
+            self.assertEqual(expected, result[offset : offset + eeprom.EEPROM_SIZE])
+            self.assertEqual(
+                image[offset + eeprom.EEPROM_SIZE :],
+                result[offset + eeprom.EEPROM_SIZE :],
+            )
+
+    def test_mapped_copy_on_write(self):
+        original = make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_0)
+        expected = self._expected_edit(original, False)
+        path, image = self._write_image(original, 0x100)
+
+        e = eeprom.EEPROM()
+        e.open_mapped(path, 0x100, copy_on_write=True)
+        e.dts_flag = True
+        self.assertEqual(expected, bytes(e.encrypt()))
+        e.flush()
+        e.close()
+
+        with open(path, "rb") as infile:
+            self.assertEqual(image, infile.read())
+
+        with self.assertRaises(ValueError):
+            eeprom.EEPROM().open_mapped(path, len(image) - 0x10)
+
+
+class VersionProbeTestCase(unittest.TestCase):
+    def test_hint_and_most_recent(self):
+        probe = eeprom.VersionProbe()
+        self.assertEqual(list(eeprom.DECRYPT_VERSIONS), probe.order())
+        self.assertEqual(
+            eeprom.XBOX_VERSION.V1_6, probe.order(eeprom.XBOX_VERSION.V1_6)[0]
+        )
+
+        data = eeprom.EEPROMData.from_buffer_copy(
+            make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_6)
+        )
+        self.assertEqual(eeprom.XBOX_VERSION.V1_6, data.decrypt(probe=probe))
+        self.assertEqual(eeprom.XBOX_VERSION.V1_6, probe.order()[0])
+
+        counts = probe.counts()
+        self.assertEqual(1, counts[eeprom.XBOX_VERSION.V1_0]["attempts"])
+        self.assertEqual(1, counts[eeprom.XBOX_VERSION.V1_6]["successes"])
+
+        # The learned ordering means the next 1.6 unit needs a single attempt.
+        data = eeprom.EEPROMData.from_buffer_copy(
+            make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_6)
+        )
+        data.decrypt(probe=probe)
+        self.assertEqual(1, probe.counts()[eeprom.XBOX_VERSION.V1_0]["attempts"])
+
+    def test_frequency(self):
+        probe = eeprom.VersionProbe(
+            "frequency",
+            fleet_counts={eeprom.XBOX_VERSION.V1_1: 5, eeprom.XBOX_VERSION.V1_6: 10},
+        )
+        self.assertEqual(
+            [
+                eeprom.XBOX_VERSION.V1_6,
+                eeprom.XBOX_VERSION.V1_1,
+                eeprom.XBOX_VERSION.V1_0,
+            ],
+            probe.order(),
+        )
+        self.assertEqual(0, probe.counts()[eeprom.XBOX_VERSION.V1_6]["successes"])
+
+    def test_concurrent_probe(self):
+        for executor_type in (
+            concurrent.futures.ThreadPoolExecutor,
+            concurrent.futures.ProcessPoolExecutor,
+        ):
+            probe = eeprom.VersionProbe("fixed")
+            data = eeprom.EEPROMData.from_buffer_copy(
+                make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_1)
+            )
+            with executor_type(max_workers=3) as executor:
+                version = data.decrypt(probe=probe, executor=executor)
+            self.assertEqual(eeprom.XBOX_VERSION.V1_1, version)
+            for counts in probe.counts().values():
+                self.assertEqual(1, counts["attempts"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import concurrent.futures
+import os
+import unittest
+
+from xk import engine
+from xk import eeprom
+from xk import rc4
+from xk import sha1
+from .helpers import HDD_KEY
+from .helpers import make_encrypted_eeprom
+from .helpers import reference_xbox_hmac_sha1
+
+
+class ReentrancyTestCase(unittest.TestCase):
+    def test_stateless_functions_match_classes(self):
+        for length in (20, 28, 55, 56, 100):
+            message = bytes(range(length))
+            for version in (9, 10, 11, 12):
+                self.assertEqual(
+                    reference_xbox_hmac_sha1(version, message),
+                    sha1.xbox_hmac_sha1(version, message),
+                )
+            self.assertEqual(
+                rc4.RC4(message[:20]).apply(message), rc4.crypt(message[:20], message)
+            )
+
+    def test_concurrent_calls(self):
+        messages = [os.urandom(28) for _ in range(64)]
+
+        def work(message):
+            key = sha1.xbox_hmac_sha1(0x0B, message)
+            return key, rc4.crypt(key, message)
+
+        expected = [work(message) for message in messages]
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            self.assertEqual(expected, list(executor.map(work, messages)))
+
+    def test_buffer_round_trip(self):
+        original = make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_6)
+        version, decrypted = eeprom.decrypt_buffer(original)
+        self.assertEqual(eeprom.XBOX_VERSION.V1_6, version)
+        self.assertEqual(HDD_KEY, decrypted[0x1C:0x2C])
+        self.assertEqual(original, eeprom.encrypt_buffer(decrypted, version))
+
+
+class EngineTestCase(unittest.TestCase):
+    def test_modes(self):
+        dumps = [make_encrypted_eeprom(version) for version in eeprom.DECRYPT_VERSIONS]
+        dumps.insert(1, bytes(eeprom.EEPROM_SIZE))
+
+        for mode in ("thread", "process"):
+            with self.subTest(mode=mode), engine.Engine(2, mode, chunk_size=2) as e:
+                self.assertEqual(mode, e.mode)
+                results = list(e.decrypt(dumps))
+                self.assertEqual(
+                    [eeprom.XBOX_VERSION.V_NONE] + list(eeprom.DECRYPT_VERSIONS),
+                    sorted(version for version, _ in results),
+                )
+                self.assertEqual((eeprom.XBOX_VERSION.V_NONE, None), results[1])
+
+                decrypted = [result for result in results if result[1] is not None]
+                self.assertEqual(
+                    [dump for dump in dumps if any(dump)],
+                    list(e.encrypt((dump, version) for version, dump in decrypted)),
+                )
+
+    def test_auto_mode(self):
+        with engine.Engine(1) as e:
+            self.assertEqual("thread" if engine.FREE_THREADED else "process", e.mode)
+        with self.assertRaises(ValueError):
+            engine.Engine(1, "fibers")
+
+    def test_map_chunks_is_bounded(self):
+        pulled = []
+
+        def items():
+            for i in range(20):
+                pulled.append(i)
+                yield i
+
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            results = engine.map_chunks(executor, list, items(), 3, 1)
+            self.assertEqual(0, next(results))
+            # Only the chunks allowed in flight for a single worker have been read.
+            self.assertEqual(6, len(pulled))
+            self.assertEqual(list(range(1, 20)), list(results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import unittest
+
+from xk import eeprom
+from xk import inventory
+from .helpers import HDD_KEY
+from .helpers import MAC
+from .helpers import SERIAL
+from .helpers import TempDirTestCase
+from .helpers import make_encrypted_eeprom
+
+
+class InventoryTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.inventory = inventory.Inventory(
+            os.path.join(self.tempdir, "inventory.sqlite3")
+        )
+        self.addCleanup(self.inventory.close)
+
+    def _write_dump(self, name: str, contents: bytes) -> str:
+        return os.path.realpath(self.write_file(name, contents))
+
+    def test_lookups(self):
+        v1_0 = self._write_dump(
+            "a.bin", make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_0)
+        )
+        v1_6 = self._write_dump(
+            "b.bin", make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_6)
+        )
+        garbage = self._write_dump("c.bin", bytes(eeprom.EEPROM_SIZE))
+
+        self.assertEqual(
+            {"indexed": 2, "unchanged": 0, "failed": 1},
+            self.inventory.update([v1_0, v1_6, garbage]),
+        )
+        self.assertEqual(3, len(self.inventory))
+
+        entries = self.inventory.find_serial(SERIAL)
+        self.assertEqual([v1_0, v1_6], [entry["path"] for entry in entries])
+        self.assertEqual(MAC, entries[0]["mac"])
+        self.assertEqual(eeprom.XBE_REGION.NORTH_AMERICA.value, entries[0]["region"])
+        self.assertEqual(HDD_KEY.hex().upper(), entries[0]["hdd_key"])
+
+        self.assertEqual(2, len(self.inventory.find_mac("0050f2010203")))
+        self.assertEqual(
+            2, len(self.inventory.find_mac(bytes([0, 0x50, 0xF2, 1, 2, 3])))
+        )
+        self.assertEqual(
+            [v1_6],
+            [e["path"] for e in self.inventory.find_version(eeprom.XBOX_VERSION.V1_6)],
+        )
+        failures = self.inventory.find_version(eeprom.XBOX_VERSION.V_NONE)
+        self.assertEqual([garbage], [e["path"] for e in failures])
+        self.assertTrue(failures[0]["error"])
+        self.assertEqual([], self.inventory.find_serial("nope"))
+
+    def test_unreadable_paths(self):
+        path = self._write_dump(
+            "a.bin", make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_0)
+        )
+        missing = os.path.join(self.tempdir, "missing.bin")
+
+        with self.assertLogs(inventory.logger, "WARNING"):
+            counts = self.inventory.update([path, missing, self.tempdir])
+        self.assertEqual({"indexed": 1, "unchanged": 0, "failed": 2}, counts)
+        self.assertEqual(
+            [path], [e["path"] for e in self.inventory.find_serial(SERIAL)]
+        )
+        self.assertEqual(1, len(self.inventory))
+
+    def test_incremental_update(self):
+        path = self._write_dump(
+            "a.bin", make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_0)
+        )
+        self.inventory.update([path])
+        self.assertEqual(
+            {"indexed": 0, "unchanged": 1, "failed": 0}, self.inventory.update([path])
+        )
+
+        # Touching the file without changing it only refreshes its metadata.
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        self.assertEqual(
+            {"indexed": 0, "unchanged": 1, "failed": 0}, self.inventory.update([path])
+        )
+
+        self._write_dump("a.bin", make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_1))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2000000))
+        self.assertEqual(
+            {"indexed": 1, "unchanged": 0, "failed": 0}, self.inventory.update([path])
+        )
+        self.assertEqual(
+            eeprom.XBOX_VERSION.V1_1,
+            self.inventory.find_serial(SERIAL)[0]["version"],
+        )
+
+        os.unlink(path)
+        self.assertEqual(1, self.inventory.prune())
+        self.assertEqual(0, len(self.inventory))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import stat
+import unittest
+from unittest import mock
+
+from xk import jobs
+from .helpers import TempDirTestCase
+
+
+class JournalTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tempdir, "job.journal")
+
+    def test_resume(self):
+        keys = [jobs.Journal.key(f"out{i}.bin", bytes([i]) * 256) for i in range(5)]
+        self.assertEqual(len(set(keys)), len(keys))
+
+        journal = jobs.Journal(self.path, b"edits", checkpoint_interval=2)
+        for key in keys[:3]:
+            journal.record(key)
+        # Simulate a crash: only the first checkpoint reached the disk.
+        journal._file.close()
+
+        journal = jobs.Journal(self.path, b"edits")
+        self.assertEqual(2, len(journal))
+        self.assertIn(keys[0], journal)
+        self.assertNotIn(keys[2], journal)
+        for key in keys[2:]:
+            journal.record(key)
+        journal.close()
+
+        journal = jobs.Journal(self.path, b"edits")
+        self.assertTrue(all(key in journal for key in keys))
+        journal.close()
+
+    def test_partial_entry_is_discarded(self):
+        key = jobs.Journal.key("out.bin", b"contents")
+        journal = jobs.Journal(self.path)
+        journal.record(key)
+        journal.close()
+        with open(self.path, "ab") as outfile:
+            outfile.write(b"\x01\x02\x03")
+
+        journal = jobs.Journal(self.path)
+        self.assertEqual(1, len(journal))
+        journal.record(jobs.Journal.key("out2.bin", b"contents"))
+        journal.close()
+
+        journal = jobs.Journal(self.path)
+        self.addCleanup(journal.close)
+        self.assertEqual(2, len(journal))
+
+    def test_fingerprint_mismatch(self):
+        jobs.Journal(self.path, jobs.fingerprint({"dts_flag": True})).close()
+        with self.assertRaises(ValueError):
+            jobs.Journal(self.path, jobs.fingerprint({"dts_flag": False}))
+
+    def test_atomic_write(self):
+        path = os.path.join(self.tempdir, "sub", "out.bin")
+        jobs.atomic_write(path, b"old")
+
+        with mock.patch("os.replace", side_effect=OSError("interrupted")):
+            with self.assertRaises(OSError):
+                jobs.atomic_write(path, b"new")
+
+        with open(path, "rb") as infile:
+            self.assertEqual(b"old", infile.read())
+        self.assertEqual(["out.bin"], os.listdir(os.path.dirname(path)))
+
+    def test_atomic_write_mode(self):
+        path = os.path.join(self.tempdir, "out.bin")
+        jobs.atomic_write(path, b"new")
+        self.assertEqual(0o666 & ~jobs._UMASK, stat.S_IMODE(os.stat(path).st_mode))
+
+        os.chmod(path, 0o640)
+        jobs.atomic_write(path, b"replaced")
+        self.assertEqual(0o640, stat.S_IMODE(os.stat(path).st_mode))
+
+
+if __name__ == "__main__":
+    unittest.main()
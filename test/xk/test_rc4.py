@@ -1,6 +1,12 @@
 import binascii
+import os
 import unittest
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from xk import rc4
 
 
@@ -29,6 +35,33 @@ class RC4TestCase(unittest.TestCase):
 
         self.assertEqual(binascii.hexlify(expected), binascii.hexlify(result))
 
+    def test_keystream_continues_across_calls(self):
+        key_hash = bytearray(range(20))
+        data = bytearray(range(28))
+
+        expected = rc4.RC4(key_hash).apply(data)
+
+        encrypter = rc4.RC4(key_hash)
+        result = encrypter.apply(data[:8]) + encrypter.apply(data[8:])
+        self.assertEqual(binascii.hexlify(expected), binascii.hexlify(result))
+
+        keystream = rc4.RC4(key_hash).keystream(len(data))
+        self.assertEqual(expected, rc4.xor_bytes(data, keystream))
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_batch_matches_scalar(self):
+        keys = [bytes(20), bytes(range(20))] + [os.urandom(20) for _ in range(30)]
+        key_array = np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(-1, 20)
+
+        keystreams = rc4.batch_keystream(key_array, 300)
+        for key, keystream in zip(keys, keystreams):
+            self.assertEqual(rc4.RC4(key).keystream(300), keystream.tobytes())
+
+        data = np.frombuffer(os.urandom(28 * len(keys)), dtype=np.uint8).reshape(-1, 28)
+        result = rc4.batch_apply(key_array, data)
+        for key, row, encrypted in zip(keys, data, result):
+            self.assertEqual(rc4.RC4(key).apply(row.tobytes()), encrypted.tobytes())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+
+    from xk import scanner
+except ImportError:
+    np = None
+
+from xk import eeprom
+from .helpers import make_encrypted_eeprom
+
+
+def _make_image():
+    """Returns (image, expected matches) with EEPROMs at aligned and unaligned offsets."""
+    image = bytearray(b"\xff" * 0x3000)
+    expected = []
+    for offset, version in (
+        (0x100, eeprom.XBOX_VERSION.V1_0),
+        (0x7F8, eeprom.XBOX_VERSION.V1_6),
+        (0x1003, eeprom.XBOX_VERSION.V1_1),
+    ):
+        image[offset : offset + eeprom.EEPROM_SIZE] = make_encrypted_eeprom(version)
+        expected.append((offset, version))
+
+    # Valid checksums and video standard, but an HMAC that does not confirm.
+    decoy = eeprom.EEPROMData.from_buffer_copy(
+        make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_0)
+    )
+    decoy.HMAC_SHA1_Hash[0] ^= 0xFF
+    image[0x2000 : 0x2000 + eeprom.EEPROM_SIZE] = bytes(decoy)
+    return bytes(image), expected
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class ScannerTestCase(unittest.TestCase):
+    def test_scan_buffer(self):
+        image, expected = _make_image()
+        self.assertEqual(expected, scanner.scan_buffer(image, alignment=1))
+        self.assertEqual(expected[:2], scanner.scan_buffer(image))
+
+    def test_scan_file_chunks(self):
+        image, expected = _make_image()
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "image.bin")
+            with open(path, "wb") as outfile:
+                outfile.write(image)
+
+            for jobs in (1, 2):
+                with self.subTest(jobs=jobs):
+                    # The second EEPROM straddles the boundary between the first two chunks.
+                    result = scanner.scan_file(
+                        path, alignment=1, chunk_size=0x800, jobs=jobs
+                    )
+                    self.assertEqual(expected, list(result))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+import unittest
+
+import xbeeprom_client
+from xk import eeprom
+from xk import service
+from .helpers import HDD_KEY
+from .helpers import MAC
+from .helpers import SERIAL
+from .helpers import TempDirTestCase
+from .helpers import make_encrypted_eeprom
+
+
+class LatencyHistogramTestCase(unittest.TestCase):
+    def test_cumulative(self):
+        histogram = service.LatencyHistogram()
+        for seconds in (0.0001, 0.001, 0.003, 60):
+            histogram.observe(seconds)
+
+        buckets = dict(histogram.cumulative())
+        self.assertEqual(1, buckets[0.0005])
+        self.assertEqual(2, buckets[0.001])
+        self.assertEqual(3, buckets[0.005])
+        self.assertEqual(3, buckets[10.0])
+        self.assertEqual(4, buckets[float("inf")])
+        self.assertEqual(4, histogram.count)
+
+
+class ServiceTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.socket_path = os.path.join(self.tempdir, "service.sock")
+
+        # Threads stand in for the worker processes to keep the test fast.
+        executor = concurrent.futures.ThreadPoolExecutor(2)
+        self.addCleanup(executor.shutdown)
+        self.service = service.Service(workers=2, executor=executor)
+
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self.service.start_unix(self.socket_path))
+        thread = threading.Thread(target=self.loop.run_forever)
+        thread.start()
+
+        def stop():
+            asyncio.run_coroutine_threadsafe(self.service.close(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            thread.join()
+            self.loop.close()
+
+        self.addCleanup(stop)
+        self.client = xbeeprom_client.ServiceClient(self.socket_path)
+        self.addCleanup(self.client.close)
+
+    def test_socket_permissions(self):
+        self.assertEqual(0o600, os.stat(self.socket_path).st_mode & 0o777)
+
+    def test_operations(self):
+        original = make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_1)
+
+        info = self.client.inspect(original)
+        self.assertEqual("1.1", info["version"])
+        self.assertEqual(SERIAL, info["serial"])
+        self.assertEqual(MAC, info["mac"])
+        self.assertEqual("NORTH_AMERICA", info["region"])
+        self.assertEqual(HDD_KEY.hex().upper(), info["hdd_key"])
+        self.assertNotIn("hdd_key", self.client.inspect(original, settings_only=True))
+
+        version, decrypted = self.client.decrypt(original, version_hint="1.6")
+        self.assertEqual("1.1", version)
+        self.assertEqual(HDD_KEY, decrypted[0x1C:0x2C])
+        self.assertEqual(original, self.client.encrypt(decrypted, "1.1"))
+
+        edited = self.client.edit(
+            original, {"audio_mode": "surround", "dts_flag": True}
+        )
+        e = eeprom.EEPROM()
+        e.read_from_buffer(edited)
+        self.assertEqual(eeprom.AudioMode.SURROUND, e.audio_mode)
+        self.assertTrue(e.dts_flag)
+
+        metrics = self.client.metrics()
+        self.assertIn('xk_request_duration_seconds_count{op="inspect"} 2', metrics)
+        self.assertIn('xk_request_duration_seconds_count{op="edit"} 1', metrics)
+        self.assertIn('xk_request_errors_total{op="edit"} 0', metrics)
+
+    def test_errors(self):
+        with self.assertRaisesRegex(Exception, "^400 .*256 bytes"):
+            self.client.inspect(b"\0" * 16)
+        with self.assertRaisesRegex(Exception, "^400 .*Unsupported edit"):
+            self.client.edit(bytes(eeprom.EEPROM_SIZE), {"hdd_key": "00"})
+        with self.assertRaisesRegex(Exception, "^422 .*Failed to decrypt"):
+            self.client.decrypt(bytes(eeprom.EEPROM_SIZE))
+
+        # The connection remains usable after errors.
+        self.assertEqual(
+            "1.0",
+            self.client.inspect(make_encrypted_eeprom(eeprom.XBOX_VERSION.V1_0))[
+                "version"
+            ],
+        )
+        self.assertIn('xk_request_errors_total{op="decrypt"} 1', self.client.metrics())
+
+
+if __name__ == "__main__":
+    unittest.main()
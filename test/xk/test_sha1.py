@@ -1,7 +1,14 @@
 import binascii
+import os
 import unittest
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from xk import sha1
+from .helpers import reference_xbox_hmac_sha1
 
 class SHA1TestCase(unittest.TestCase):
     _VERSIONS = {0x0A, 0x0B, 0x0C}
@@ -41,6 +48,53 @@ class SHA1TestCase(unittest.TestCase):
             result = s.xbox_hmac_sha1(v, test, test2)
             self.assertEqual(binascii.hexlify(expected[v]), binascii.hexlify(result))
 
+    def test_single_block_matches_reference(self):
+        fields = [
+            (bytearray(range(20)),),
+            (bytearray(range(8)), bytearray(range(16)), b"\x01\x00\x00\x00"),
+        ]
+        for v in self._VERSIONS:
+            for args in fields:
+                expected = reference_xbox_hmac_sha1(v, b"".join(args))
+                result = sha1.SHA1().xbox_hmac_sha1(v, *args)
+                self.assertEqual(binascii.hexlify(expected), binascii.hexlify(result))
+
+    def test_generic_matches_reference(self):
+        for length in (0, 19, 32, 55, 56, 64, 100, 130):
+            message = bytes(range(length))
+            for v in self._VERSIONS:
+                self.assertEqual(
+                    reference_xbox_hmac_sha1(v, message),
+                    sha1.SHA1().xbox_hmac_sha1(v, message[:7], message[7:]),
+                )
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_batch_matches_scalar(self):
+        for length in (20, 28):
+            messages = [os.urandom(length) for _ in range(16)]
+            batch = np.frombuffer(b"".join(messages), dtype=np.uint8).reshape(
+                -1, length
+            )
+
+            for v in self._VERSIONS:
+                result = sha1.batch_xbox_hmac_sha1(v, batch)
+                for message, digest in zip(messages, result):
+                    expected = sha1.SHA1().xbox_hmac_sha1(v, message)
+                    self.assertEqual(
+                        binascii.hexlify(expected), binascii.hexlify(digest.tobytes())
+                    )
+
+            versions = np.array([9, 10, 11, 12] * 4)
+            result = sha1.batch_xbox_hmac_sha1(versions, batch)
+            for v, message, digest in zip(versions, messages, result):
+                expected = sha1.SHA1().xbox_hmac_sha1(int(v), message)
+                self.assertEqual(
+                    binascii.hexlify(expected), binascii.hexlify(digest.tobytes())
+                )
+
+        with self.assertRaises(Exception):
+            sha1.batch_xbox_hmac_sha1(13, np.zeros((1, 20), dtype=np.uint8))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,64 @@
+import io
+import unittest
+from unittest import mock
+
+from xk import eeprom
+from xk import stream
+from .helpers import make_encrypted_eeprom
+
+_EDITS = {"audio_mode": eeprom.AudioMode.SURROUND, "dts_flag": True}
+
+
+def _expected(dump: bytes) -> bytes:
+    e = eeprom.EEPROM(settings_only=True)
+    e.read_from_buffer(dump)
+    for name, value in _EDITS.items():
+        setattr(e, name, value)
+    return bytes(e.encrypt())
+
+
+class StreamTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dumps = [
+            make_encrypted_eeprom(version) for version in eeprom.DECRYPT_VERSIONS
+        ]
+
+    def test_settings_patch(self):
+        patch = stream.SettingsPatch(_EDITS)
+        expected = b"".join(_expected(dump) for dump in self.dumps)
+
+        records = bytearray(b"".join(self.dumps))
+        patch.apply(records)
+        self.assertEqual(expected, records)
+
+        with mock.patch.object(stream, "np", None):
+            records = bytearray(b"".join(self.dumps))
+            patch.apply(records)
+            self.assertEqual(expected, records)
+
+    def test_settings_patch_rejects_other_fields(self):
+        with self.assertRaises(ValueError):
+            stream.SettingsPatch({"VideoStandard": eeprom.VIDEO_STANDARD.PAL_I.value})
+
+    def test_iter_record_chunks(self):
+        data = b"".join(self.dumps)
+        chunks = list(stream.iter_record_chunks(io.BytesIO(data), chunk_records=2))
+        self.assertEqual([2, 1], [len(chunk) // eeprom.EEPROM_SIZE for chunk in chunks])
+        self.assertEqual(data, b"".join(chunks))
+
+        chunks = []
+        with self.assertRaises(ValueError):
+            for chunk in stream.iter_record_chunks(io.BytesIO(data + b"x"), 2):
+                chunks.append(chunk)
+        self.assertEqual(data, b"".join(chunks))
+
+    def test_iter_null_delimited_paths(self):
+        paths = ["a.bin", "dir/b c.bin", "c.bin"]
+        infile = io.BytesIO("\0".join(paths).encode() + b"\0")
+        self.assertEqual(
+            paths, list(stream.iter_null_delimited_paths(infile, chunk_size=3))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
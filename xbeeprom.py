@@ -6,19 +6,640 @@ Based on https://github.com/mborgerson/xbeeprom
 """
 import argparse
 import binascii
+import concurrent.futures
+import fnmatch
+import glob
 import logging
 import os
 import sys
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
 
 import xk
+import xk.backend
 
 logger = logging.getLogger(__name__)
 
-_AUDIO_MODES = {
-    "mono": xk.AudioMode.MONO,
-    "stereo": xk.AudioMode.STEREO,
-    "surround": xk.AudioMode.SURROUND,
-}
+_OUTPUT_SUFFIX = ".modified.bin"
+
+
+def _edits_from_args(args) -> dict:
+    """Returns the settings changes requested on the command line as a picklable dict."""
+    edits = {}
+    if args.audio_mode is not None:
+        edits["audio_mode"] = xk.eeprom.AUDIO_MODES_BY_NAME[args.audio_mode]
+
+    if args.enable_dolby_digital:
+        edits["dolby_digital_flag"] = True
+    if args.disable_dolby_digital:
+        edits["dolby_digital_flag"] = False
+
+    if args.enable_dts:
+        edits["dts_flag"] = True
+    if args.disable_dts:
+        edits["dts_flag"] = False
+    return edits
+
+
+def _apply_edits(eeprom: xk.EEPROM, edits: dict) -> bool:
+    """Applies the given edits to `eeprom`, returning True if anything was changed."""
+    for name, value in edits.items():
+        setattr(eeprom, name, value)
+    return bool(edits)
+
+
+def _eeprom_options_from_args(args) -> dict:
+    """Returns the picklable options used to construct an EEPROM via `_create_eeprom`."""
+    return {
+        "settings_only": args.settings_only,
+        "crypto_backend": args.crypto_backend,
+        "decrypt_cache": args.decrypt_cache,
+        "version_hint": xk.eeprom.VERSIONS_BY_NAME.get(args.version_hint),
+        "offset": args.offset,
+        "in_place": args.in_place,
+    }
+
+
+def _create_eeprom(options: dict) -> xk.EEPROM:
+    return xk.eeprom.create_eeprom(
+        options["settings_only"], options["crypto_backend"], options["decrypt_cache"]
+    )
+
+
+def _read_eeprom(
+    eeprom: xk.EEPROM, path: str, options: dict, data: Optional[bytes] = None
+):
+    """Loads `path` into `eeprom`, memory mapping it if an offset or in-place editing was requested.
+
+    If `data` is given (e.g., a dump read from an archive), it is used instead of reading `path`.
+    """
+    if data is not None:
+        eeprom.read_from_buffer(data, version_hint=options["version_hint"])
+    elif options["in_place"] or options["offset"]:
+        eeprom.open_mapped(
+            path,
+            options["offset"],
+            copy_on_write=not options["in_place"],
+            version_hint=options["version_hint"],
+        )
+    else:
+        eeprom.read_from_bin_file(path, version_hint=options["version_hint"])
+
+
+def _process_file(job) -> Tuple[str, Optional[str], Optional[str]]:
+    """Batch worker that processes a single EEPROM file.
+
+    `job` is (input_path, output_path, edits, options, data), where `data` holds the dump's contents if it was not
+    read from `input_path` directly. Returns (input_path, output_path, error).
+    """
+    import xk.jobs  # pylint: disable=import-outside-toplevel
+
+    input_path, output_path, edits, options, data = job
+    eeprom = _create_eeprom(options)
+    try:
+        _read_eeprom(eeprom, input_path, options, data)
+        if not _apply_edits(eeprom, edits):
+            return input_path, None, None
+
+        encrypted = eeprom.encrypt()
+        if options["in_place"]:
+            eeprom.flush()
+            return input_path, input_path, None
+
+        xk.jobs.atomic_write(output_path, encrypted)
+        return input_path, output_path, None
+    except Exception as err:  # pylint: disable=broad-except
+        return input_path, None, str(err)
+    finally:
+        eeprom.close()
+
+
+def _expand_batch_inputs(inputs: List[str], pattern: str) -> List[str]:
+    """Expands the given directories, globs, and files into a list of distinct real paths.
+
+    An input of "-" reads additional newline-separated paths from stdin.
+    """
+    ret = []
+    seen = set()
+
+    def add_file(path):
+        if path.endswith(_OUTPUT_SUFFIX) or path in seen:
+            return
+        seen.add(path)
+        ret.append(path)
+
+    for entry in inputs:
+        if entry == "-":
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    add_file(os.path.realpath(os.path.expanduser(line)))
+            continue
+
+        entry = os.path.expanduser(entry)
+        if os.path.isdir(entry):
+            root = os.path.realpath(entry)
+            for dirpath, _, filenames in os.walk(root):
+                for filename in sorted(fnmatch.filter(filenames, pattern)):
+                    add_file(os.path.join(dirpath, filename))
+            continue
+
+        # Unmatched entries are kept so that they are reported as failures.
+        for match in sorted(glob.glob(entry, recursive=True)) or [entry]:
+            add_file(os.path.realpath(match))
+
+    return ret
+
+
+def _batch_output_paths(paths: List[str], output_dir: Optional[str]) -> List[str]:
+    """Returns the output path of each input, mirroring the inputs under `output_dir` relative to their common root.
+
+    Raises ValueError if two inputs would be written to the same output.
+    """
+    if not output_dir:
+        return [path + _OUTPUT_SUFFIX for path in paths]
+
+    root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    outputs = [os.path.join(output_dir, os.path.relpath(path, root)) for path in paths]
+    seen = {}
+    for path, output_path in zip(paths, outputs):
+        if output_path in seen:
+            raise ValueError(
+                f"{seen[output_path]} and {path} would both be written to {output_path}"
+            )
+        seen[output_path] = path
+    return outputs
+
+
+def _archive_output_roots(archives: List[str], output_dir: Optional[str]) -> List[str]:
+    """Returns the directory that each archive's members are written under, mirrored like `_batch_output_paths`.
+
+    Raises ValueError if two archives would be written to the same directory.
+    """
+    if not output_dir:
+        return [path + ".modified" for path in archives]
+    return _batch_output_paths(archives, output_dir)
+
+
+def _iter_archive_inputs(
+    archives: List[str], roots: List[str], pattern: str
+) -> Iterator[Tuple[str, str, Optional[str], bytes]]:
+    """Yields (label, output path, error, dump) for each matching member of the given archives.
+
+    A member whose output path was already used by an earlier member (e.g., a duplicate tar entry) is yielded with
+    an error describing the conflict instead of overwriting that output.
+    """
+    import xk.archive  # pylint: disable=import-outside-toplevel
+
+    seen = {}
+    for path, root in zip(archives, roots):
+        for name, dump in xk.archive.iter_dumps(path, pattern):
+            # Drop absolute and parent components so that outputs always stay under `root`.
+            parts = [part for part in name.split("/") if part not in ("", ".", "..")]
+            label = f"{path}:{name}"
+            output_path = os.path.join(root, *parts)
+            if output_path in seen:
+                error = f"{seen[output_path]} and {label} would both be written to {output_path}"
+                yield label, output_path, error, dump
+                continue
+            seen[output_path] = label
+            yield label, output_path, None, dump
+
+
+def _read_input(path: str, options: dict) -> bytes:
+    with open(path, "rb") as infile:
+        infile.seek(options["offset"])
+        return infile.read(xk.eeprom.EEPROM_SIZE)
+
+
+def _process_chunk(jobs: list) -> list:
+    """Batch worker that runs `_process_file` on each (job, journal key) in a chunk, returning (result, key) pairs."""
+    return [(_process_file(job), key) for job, key in jobs]
+
+
+def _run_batch(args, edits: dict) -> int:
+    import xk.engine  # pylint: disable=import-outside-toplevel
+    import xk.jobs  # pylint: disable=import-outside-toplevel
+
+    output_dir = None
+    if args.output_dir:
+        output_dir = os.path.realpath(os.path.expanduser(args.output_dir))
+
+    options = _eeprom_options_from_args(args)
+    conflicts = 0
+    if args.archive:
+        archives = [
+            os.path.realpath(os.path.expanduser(entry)) for entry in args.eeprom_file
+        ]
+        try:
+            roots = _archive_output_roots(archives, output_dir)
+        except ValueError as err:
+            print(f"FAILED: {err}")
+            return 1
+
+        def archive_jobs():
+            """Yields the job for each archive member, failing members whose output path is already taken."""
+            nonlocal conflicts
+            # Members are read from the archives only as workers become free for them.
+            for label, output_path, error, dump in _iter_archive_inputs(
+                archives, roots, args.pattern
+            ):
+                if error:
+                    conflicts += 1
+                    print(f"FAILED {label}: {error}")
+                    continue
+                yield label, output_path, edits, options, dump
+
+        jobs = archive_jobs()
+    else:
+        paths = _expand_batch_inputs(args.eeprom_file, args.pattern)
+        try:
+            output_paths = _batch_output_paths(paths, output_dir) if paths else []
+        except ValueError as err:
+            print(f"FAILED: {err}")
+            return 1
+        jobs = (
+            (path, output_path, edits, options, None)
+            for path, output_path in zip(paths, output_paths)
+        )
+
+    journal = None
+    if args.journal:
+        try:
+            journal = xk.jobs.Journal(
+                os.path.realpath(os.path.expanduser(args.journal)),
+                xk.jobs.fingerprint(sorted(edits.items()), options["offset"]),
+            )
+        except ValueError as err:
+            print(f"FAILED: {err}")
+            return 1
+    skipped = 0
+
+    def pending_jobs():
+        """Yields (job, journal key) for each job the journal does not record as already processed."""
+        nonlocal skipped
+        for job in jobs:
+            if journal is None:
+                yield job, None
+                continue
+
+            input_path, output_path, _, _, data = job
+            try:
+                contents = (
+                    data if data is not None else _read_input(input_path, options)
+                )
+            except OSError:
+                # Let the worker report the failure.
+                yield job, None
+                continue
+
+            # In-place edits are keyed on the input path and are recorded under the edited contents (see below), since
+            # that is what a resumed run reads back.
+            key = xk.jobs.Journal.key(
+                input_path if options["in_place"] else output_path, contents
+            )
+            if key in journal:
+                skipped += 1
+                continue
+            # Mapped inputs must still be opened by the worker.
+            if not (options["in_place"] or options["offset"]):
+                job = (*job[:4], contents)
+            yield job, key
+
+    if args.jobs == 1:
+        results = ((_process_file(job), key) for job, key in pending_jobs())
+        executor = None
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs)
+        results = xk.engine.map_chunks(
+            executor, _process_chunk, pending_jobs(), args.chunk_size, args.jobs
+        )
+
+    processed = 0
+    failures = 0
+    try:
+        for (input_path, output_path, error), key in results:
+            processed += 1
+            if error:
+                failures += 1
+                print(f"FAILED {input_path}: {error}")
+                continue
+
+            if journal is not None and key and options["in_place"] and output_path:
+                # The file was edited, so record it under its new contents.
+                try:
+                    contents = _read_input(input_path, options)
+                    key = xk.jobs.Journal.key(input_path, contents)
+                except OSError:
+                    key = None
+            if journal is not None and key:
+                journal.record(key)
+            if output_path:
+                print(f"OK {input_path} -> {output_path}")
+            else:
+                print(f"OK {input_path}")
+    finally:
+        if executor:
+            executor.shutdown()
+        if journal is not None:
+            journal.close()
+
+    processed += conflicts
+    failures += conflicts
+    summary = f"Processed {processed} files: {processed - failures} succeeded, {failures} failed"
+    if journal is not None:
+        summary += f", {skipped} skipped as already processed"
+    print(summary)
+    return 1 if failures else 0
+
+
+def _run_scan(args) -> int:
+    import xk.scanner  # pylint: disable=import-outside-toplevel
+
+    found = 0
+    for image in args.eeprom_file:
+        path = os.path.realpath(os.path.expanduser(image))
+        for offset, version in xk.scanner.scan_file(
+            path, alignment=args.scan_alignment, jobs=args.jobs
+        ):
+            found += 1
+            print(f"{path}: {offset:#x} {version.name}")
+    print(f"Found {found} EEPROMs")
+    return 0 if found else 1
+
+
+def _run_build_corpus(args) -> int:
+    import xk.corpus  # pylint: disable=import-outside-toplevel
+
+    def dumps():
+        for path in _expand_batch_inputs(args.eeprom_file, args.pattern):
+            with open(path, "rb") as infile:
+                dump = infile.read(xk.eeprom.EEPROM_SIZE)
+            if len(dump) == xk.eeprom.EEPROM_SIZE:
+                yield dump
+            else:
+                print(f"SKIPPED {path}: not an EEPROM dump")
+
+    output = os.path.realpath(os.path.expanduser(args.build_corpus))
+    count = xk.corpus.build(output, dumps())
+    print(f"Wrote {count} records to {output}")
+    return 0
+
+
+def _print_inventory_entry(entry: dict):
+    version = xk.XBOX_VERSION(entry["version"]).name
+    if entry["error"]:
+        print(
+            f"{entry['path']}: serial={entry['serial']} mac={entry['mac']} error={entry['error']}"
+        )
+        return
+    try:
+        region = xk.eeprom.XBE_REGION(entry["region"]).name
+    except ValueError:
+        region = hex(entry["region"])
+    print(
+        f"{entry['path']}: serial={entry['serial']} mac={entry['mac']} version={version} region={region} "
+        f"hdd_key={entry['hdd_key']}"
+    )
+
+
+def _index_main(argv: List[str]) -> int:
+    """Implements the `index` subcommand, which maintains and queries the fleet inventory."""
+    import xk.inventory  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(
+        prog="xbeeprom.py index",
+        description="Decrypt EEPROM dumps once into a persistent inventory and look units up by serial number, MAC "
+        "address, version, or region.",
+    )
+    parser.add_argument(
+        "--db",
+        metavar="filename",
+        help="Inventory database (defaults to $XK_INVENTORY or a database under $XDG_DATA_HOME). Note that the "
+        "inventory contains decrypted HDD keys.",
+    )
+    parser.add_argument(
+        "--crypto_backend",
+        choices=["auto"] + xk.backend.registered_backends(),
+        help="Implementation to use for SHA1/RC4 (defaults to $XK_CRYPTO_BACKEND or 'python').",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update = subparsers.add_parser(
+        "update", help="Add or refresh dumps. Only new or changed files are decrypted."
+    )
+    update.add_argument(
+        "paths",
+        nargs="+",
+        help="Files, directories, or globs; '-' reads newline-separated paths from stdin.",
+    )
+    update.add_argument(
+        "--pattern",
+        default="*.bin",
+        help="Filename pattern used when searching directories.",
+    )
+    update.add_argument(
+        "--prune",
+        action="store_true",
+        help="Remove entries for files that no longer exist.",
+    )
+
+    lookup = subparsers.add_parser("lookup", help="Find units in the inventory.")
+    key = lookup.add_mutually_exclusive_group(required=True)
+    key.add_argument("--serial", help="Serial number to look up.")
+    key.add_argument("--mac", help="MAC address to look up, e.g., 00:50:F2:01:02:03.")
+    key.add_argument(
+        "--version",
+        choices=list(xk.eeprom.VERSIONS_BY_NAME.keys()) + ["none"],
+        help="List the units of the given version, or those that failed to decrypt.",
+    )
+    key.add_argument(
+        "--region",
+        choices=[region.name for region in xk.eeprom.XBE_REGION],
+        help="List the units of the given region.",
+    )
+
+    args = parser.parse_args(argv)
+    inventory = xk.inventory.Inventory(args.db, crypto_backend=args.crypto_backend)
+    try:
+        if args.command == "update":
+            paths = _expand_batch_inputs(args.paths, args.pattern)
+            counts = inventory.update(paths)
+            if args.prune:
+                counts["pruned"] = inventory.prune()
+            print(", ".join(f"{count} {name}" for name, count in counts.items()))
+            return 1 if counts["failed"] else 0
+
+        if args.serial:
+            entries = inventory.find_serial(args.serial)
+        elif args.mac:
+            entries = inventory.find_mac(args.mac)
+        elif args.version:
+            entries = inventory.find_version(
+                xk.eeprom.VERSIONS_BY_NAME.get(args.version, xk.XBOX_VERSION.V_NONE)
+            )
+        else:
+            entries = inventory.find_region(xk.eeprom.XBE_REGION[args.region].value)
+        for entry in entries:
+            _print_inventory_entry(entry)
+        return 0 if entries else 1
+    finally:
+        inventory.close()
+
+
+def _serve_main(argv: List[str]) -> int:
+    """Implements the `serve` subcommand, which runs the long-lived EEPROM service used by xbeeprom_client.py."""
+    import xk.service  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(
+        prog="xbeeprom.py serve",
+        description="Serve decrypt, inspect, edit, and encrypt requests over HTTP on a Unix domain socket or a "
+        "loopback TCP port. Note that any local user able to connect can retrieve decrypted HDD keys.",
+    )
+    address = parser.add_mutually_exclusive_group()
+    address.add_argument(
+        "--socket",
+        metavar="filename",
+        help="Unix domain socket to listen on (defaults to $XK_SERVICE_SOCKET or a socket under $XDG_RUNTIME_DIR).",
+    )
+    address.add_argument(
+        "--port",
+        type=int,
+        help="Listen on this 127.0.0.1 TCP port instead of a Unix domain socket.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes that perform the cryptography.",
+    )
+    parser.add_argument(
+        "--max_pending",
+        type=int,
+        help="Number of requests that may be in progress at once before new ones are rejected (defaults to "
+        f"{xk.service.DEFAULT_PENDING_PER_WORKER} per job).",
+    )
+    parser.add_argument(
+        "--crypto_backend",
+        choices=["auto"] + xk.backend.registered_backends(),
+        help="Implementation to use for SHA1/RC4 (defaults to $XK_CRYPTO_BACKEND or 'python').",
+    )
+    parser.add_argument(
+        "--decrypt_cache",
+        metavar="directory",
+        help="Cache decryption results in the given directory. Note that the cache contains decrypted HDD keys.",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1 or (args.max_pending is not None and args.max_pending < 1):
+        parser.error("--jobs and --max_pending must be positive")
+
+    logging.basicConfig(level=logging.INFO)
+    xk.service.serve(
+        socket_path=args.socket,
+        port=args.port,
+        workers=args.jobs,
+        max_pending=args.max_pending,
+        crypto_backend=args.crypto_backend,
+        decrypt_cache=args.decrypt_cache,
+    )
+    return 0
+
+
+def _iter_stream_chunks(args) -> Iterator[Tuple[bytearray, int]]:
+    """Yields (chunk, skipped) for bounded chunks of records read from stdin, directly or from NUL-delimited paths.
+
+    `skipped` counts the paths that could not be read as a dump since the previous chunk. Their records are left out of
+    the output entirely, so the final chunk may be empty if only skipped paths follow the last full one.
+    """
+    import xk.stream  # pylint: disable=import-outside-toplevel
+
+    stdin = sys.stdin.buffer
+    if not args.null:
+        for chunk in xk.stream.iter_record_chunks(stdin):
+            yield chunk, 0
+        return
+
+    chunk = bytearray()
+    skipped = 0
+    for path in xk.stream.iter_null_delimited_paths(stdin):
+        try:
+            with open(path, "rb") as infile:
+                dump = infile.read(xk.eeprom.EEPROM_SIZE)
+        except OSError as err:
+            logger.error("FAILED %s: %s", path, err)
+            skipped += 1
+            continue
+        if len(dump) != xk.eeprom.EEPROM_SIZE:
+            logger.error("FAILED %s: not an EEPROM dump", path)
+            skipped += 1
+            continue
+        chunk += dump
+        if len(chunk) == xk.stream.DEFAULT_CHUNK_RECORDS * xk.eeprom.EEPROM_SIZE:
+            yield chunk, skipped
+            chunk = bytearray()
+            skipped = 0
+    if chunk or skipped:
+        yield chunk, skipped
+
+
+def _run_stream(args, edits: dict) -> int:
+    """Applies `edits` to a stream of records on stdin, writing the re-encrypted records to stdout.
+
+    Records that cannot be processed are reported on stderr and written through unchanged. With --null, paths that
+    cannot be read as a dump are reported on stderr and have no record in the output. Either way, the exit status is
+    non-zero.
+    """
+    import xk.stream  # pylint: disable=import-outside-toplevel
+
+    options = _eeprom_options_from_args(args)
+    patch = None
+    if args.settings_only:
+        try:
+            patch = xk.stream.SettingsPatch(edits)
+        except ValueError as err:
+            logger.error("%s", err)
+            return 1
+
+    stdout = sys.stdout.buffer
+    failures = 0
+    index = 0
+    try:
+        for chunk, skipped in _iter_stream_chunks(args):
+            failures += skipped
+            if patch:
+                patch.apply(chunk)
+            else:
+                for offset in range(0, len(chunk), xk.eeprom.EEPROM_SIZE):
+                    eeprom = _create_eeprom(options)
+                    try:
+                        eeprom.read_from_buffer(
+                            chunk[offset : offset + xk.eeprom.EEPROM_SIZE],
+                            version_hint=options["version_hint"],
+                        )
+                        _apply_edits(eeprom, edits)
+                        chunk[offset : offset + xk.eeprom.EEPROM_SIZE] = (
+                            eeprom.encrypt()
+                        )
+                    except Exception as err:  # pylint: disable=broad-except
+                        failures += 1
+                        logger.error(
+                            "FAILED record %d: %s",
+                            index + offset // xk.eeprom.EEPROM_SIZE,
+                            err,
+                        )
+            index += len(chunk) // xk.eeprom.EEPROM_SIZE
+            # Blocking writes to a full pipe throttle reading from stdin.
+            stdout.write(chunk)
+            stdout.flush()
+    except ValueError as err:
+        logger.error("%s", err)
+        return 1
+    except BrokenPipeError:
+        return 1
+    return 1 if failures else 0
 
 
 def _main(args):
@@ -29,41 +650,43 @@ def _main(args):
 
     logging.basicConfig(level=log_level)
 
-    eeprom = xk.EEPROM()
-    eeprom.read_from_bin_file(os.path.realpath(os.path.expanduser(args.eeprom_file)))
+    if args.scan:
+        return _run_scan(args)
+    if args.build_corpus:
+        return _run_build_corpus(args)
 
-    modified = False
-    if args.audio_mode is not None:
-        modified = True
-        eeprom.audio_mode = _AUDIO_MODES[args.audio_mode]
+    edits = _edits_from_args(args)
+    if args.stream:
+        return _run_stream(args, edits)
+    if args.batch or args.archive:
+        return _run_batch(args, edits)
 
-    if args.enable_dolby_digital:
-        modified = True
-        eeprom.dolby_digital_flag = True
-    if args.disable_dolby_digital:
-        modified = True
-        eeprom.dolby_digital_flag = False
+    import xk.jobs  # pylint: disable=import-outside-toplevel
 
-    if args.enable_dts:
-        modified = True
-        eeprom.dts_flag = True
-    if args.disable_dts:
-        modified = True
-        eeprom.dts_flag = False
+    eeprom_file = args.eeprom_file[0]
+    options = _eeprom_options_from_args(args)
+    eeprom = _create_eeprom(options)
+    try:
+        _read_eeprom(eeprom, os.path.realpath(os.path.expanduser(eeprom_file)), options)
+        logger.debug("Version probe counts: %s", xk.eeprom.VERSION_PROBE.counts())
 
-    if not modified:
-        eeprom.log_info()
-        return
+        if not _apply_edits(eeprom, edits):
+            eeprom.log_info()
+            return
 
-    encrypted = eeprom.encrypt()
-    outfile_name = args.output
-    if not outfile_name:
-        outfile_name = args.eeprom_file + ".modified.bin"
-    outfile_name = os.path.realpath(os.path.expanduser(outfile_name))
-    with open(outfile_name, "wb") as outfile:
-        outfile.write(encrypted)
+        encrypted = eeprom.encrypt()
+        if args.in_place:
+            eeprom.flush()
+        else:
+            outfile_name = args.output
+            if not outfile_name:
+                outfile_name = eeprom_file + _OUTPUT_SUFFIX
+            outfile_name = os.path.realpath(os.path.expanduser(outfile_name))
+            xk.jobs.atomic_write(outfile_name, encrypted)
 
-    eeprom.log_info()
+        eeprom.log_info()
+    finally:
+        eeprom.close()
 
 
 if __name__ == "__main__":
@@ -73,7 +696,98 @@ if __name__ == "__main__":
 
         parser.add_argument(
             "eeprom_file",
-            help="The EEPROM file to operate on.",
+            nargs="*",
+            help="The EEPROM file to operate on. In --batch mode, any number of files, directories, or globs; '-' "
+            "reads newline-separated paths from stdin. In --archive and --scan modes, any number of archives or "
+            "images. Omitted in --stream mode.",
+        )
+
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            help="Process many EEPROM files across a pool of worker processes.",
+        )
+
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="Read a stream of 256 byte records from stdin and write the edited records to stdout. With "
+            "--settings_only, only Checksum3 is recomputed and no decryption is done.",
+        )
+
+        parser.add_argument(
+            "-0",
+            "--null",
+            action="store_true",
+            help="In --stream mode, read NUL-delimited paths of dumps (e.g., from `find -print0`) from stdin instead "
+            "of the records themselves. Paths that cannot be read as a dump are reported, left out of the output, and "
+            "make the exit status non-zero.",
+        )
+
+        parser.add_argument(
+            "--archive",
+            action="store_true",
+            help="Treat the inputs as zip or tar(.gz) archives and process the EEPROMs inside them, selected by "
+            "--pattern, without extracting them. Implies --batch. Modified dumps are written under --output_dir, "
+            "or next to each archive in '<archive>.modified'.",
+        )
+
+        parser.add_argument(
+            "--build_corpus",
+            metavar="filename",
+            help="Pack the given files, directories (searched with --pattern), or globs into a single indexed corpus "
+            "file for fast random access and lookups by serial number or MAC address.",
+        )
+
+        parser.add_argument(
+            "--scan",
+            action="store_true",
+            help="Search the given raw images (e.g., full flash or HDD images) for EEPROMs and report their offsets "
+            "and versions. Requires numpy.",
+        )
+
+        parser.add_argument(
+            "--scan_alignment",
+            type=int,
+            default=4,
+            help="Only consider offsets that are multiples of this value in --scan mode.",
+        )
+
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes to use in --batch and --scan modes.",
+        )
+
+        parser.add_argument(
+            "--chunk_size",
+            type=int,
+            default=16,
+            help="Number of files handed to a worker at a time in --batch mode.",
+        )
+
+        parser.add_argument(
+            "--output_dir",
+            metavar="directory",
+            help="In --batch mode, write modified files here instead of next to the inputs, mirroring their paths "
+            "relative to the directory that contains all of them.",
+        )
+
+        parser.add_argument(
+            "--journal",
+            metavar="filename",
+            help="In --batch and --archive modes, record completed inputs in this journal so that an interrupted run "
+            "can be resumed. Inputs whose contents were already processed into the same output are skipped, as are "
+            "--in_place inputs that already hold the edited contents.",
+        )
+
+        parser.add_argument(
+            "--pattern",
+            default="*.bin",
+            help="Filename pattern used when searching directories in --batch and --build_corpus modes, and "
+            "archives in --archive mode.",
         )
 
         parser.add_argument(
@@ -90,9 +804,47 @@ if __name__ == "__main__":
             action="store_true",
         )
 
+        parser.add_argument(
+            "--settings_only",
+            action="store_true",
+            help="Do not decrypt the EEPROM header. Only user settings may be modified, skipping all SHA1/RC4 work.",
+        )
+
+        parser.add_argument(
+            "--crypto_backend",
+            choices=["auto"] + xk.backend.registered_backends(),
+            help="Implementation to use for SHA1/RC4 (defaults to $XK_CRYPTO_BACKEND or 'python').",
+        )
+
+        parser.add_argument(
+            "--decrypt_cache",
+            metavar="directory",
+            help="Cache decryption results in the given directory. Note that the cache contains decrypted HDD keys.",
+        )
+
+        parser.add_argument(
+            "--version_hint",
+            choices=xk.eeprom.VERSIONS_BY_NAME.keys(),
+            help="XBOX version to try first when decrypting.",
+        )
+
+        parser.add_argument(
+            "--offset",
+            type=lambda value: int(value, 0),
+            default=0,
+            help="Byte offset of the EEPROM within each input file, e.g., for full flash images. The input is memory "
+            "mapped and never modified; the 256 byte EEPROM is written to the output.",
+        )
+
+        parser.add_argument(
+            "--in_place",
+            action="store_true",
+            help="Edit the EEPROM directly within each input file via a memory mapping, flushing only modified bytes.",
+        )
+
         parser.add_argument(
             "--audio_mode",
-            choices=_AUDIO_MODES.keys(),
+            choices=xk.eeprom.AUDIO_MODES_BY_NAME.keys(),
             help="Set the audio mode",
         )
 
@@ -120,6 +872,42 @@ if __name__ == "__main__":
             help="Disable Dolby Digital",
         )
 
-        return parser.parse_args()
+        args = parser.parse_args()
+        if args.stream:
+            if args.eeprom_file:
+                parser.error("eeprom_file may not be given with --stream")
+        elif not args.eeprom_file:
+            parser.error("the following arguments are required: eeprom_file")
+        elif (
+            not (args.batch or args.archive or args.scan or args.build_corpus)
+            and len(args.eeprom_file) != 1
+        ):
+            parser.error(
+                "exactly one eeprom_file may be given unless --batch, --archive, --scan, or --build_corpus is "
+                "used"
+            )
+        if args.jobs < 1 or args.chunk_size < 1 or args.scan_alignment < 1:
+            parser.error("--jobs, --chunk_size, and --scan_alignment must be positive")
+        if args.offset < 0:
+            parser.error("--offset must not be negative")
+        if args.null and not args.stream:
+            parser.error("--null requires --stream")
+        if args.stream and (args.batch or args.archive or args.in_place or args.offset):
+            parser.error(
+                "--stream cannot be combined with --batch, --archive, --in_place, or --offset"
+            )
+        if args.journal and not (args.batch or args.archive):
+            parser.error("--journal requires --batch or --archive")
+        if args.archive and (args.in_place or args.offset):
+            parser.error("--archive cannot be combined with --in_place or --offset")
+        if args.in_place and (args.output or args.output_dir):
+            parser.error("--in_place cannot be combined with --output or --output_dir")
+        return args
+
+    # Subcommands are dispatched before the EEPROM editing arguments are parsed.
+    if len(sys.argv) > 1 and sys.argv[1] == "index":
+        sys.exit(_index_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        sys.exit(_serve_main(sys.argv[2:]))
 
     sys.exit(_main(_parse_args()))
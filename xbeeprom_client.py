@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Lightweight client for the EEPROM service started by `xbeeprom.py serve`
+
+Only the standard library is imported, so each invocation avoids the startup cost of loading xk and its crypto
+backends; the work is done by the long-running service.
+"""
+import argparse
+import base64
+import http.client
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import Optional
+
+_OUTPUT_SUFFIX = ".modified.bin"
+
+
+def default_socket_path() -> str:
+    """Returns the socket path used by `xk.service.default_socket_path`, which this module cannot import."""
+    path = os.environ.get("XK_SERVICE_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "pyxbeeprom.sock")
+    return os.path.join("/tmp", f"pyxbeeprom-{os.getuid()}.sock")
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self._path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class ServiceClient:
+    """Synchronous client for the EEPROM service that reuses a single persistent connection."""
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        port: Optional[int] = None,
+        timeout: float = 60,
+    ):
+        """Connects to the service on the loopback `port` if one is given, or on the Unix domain socket `socket_path`
+        (or `default_socket_path()`) otherwise."""
+        if port is not None:
+            self._connection = http.client.HTTPConnection(
+                "127.0.0.1", port, timeout=timeout
+            )
+        else:
+            self._connection = _UnixHTTPConnection(
+                socket_path or default_socket_path(), timeout
+            )
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None) -> bytes:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload else {}
+        try:
+            self._connection.request(method, path, payload, headers)
+            response = self._connection.getresponse()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            # The service closed an idle persistent connection; retry once on a new one.
+            self._connection.close()
+            self._connection.request(method, path, payload, headers)
+            response = self._connection.getresponse()
+        content = response.read()
+        if response.status != 200:
+            try:
+                message = json.loads(content)["error"]
+            except (ValueError, KeyError, TypeError):
+                message = content.decode("utf-8", errors="replace")
+            raise Exception(f"{response.status} {response.reason}: {message}")
+        return content
+
+    def call(self, operation: str, dump: bytes, **fields) -> dict:
+        """Sends `dump` to the service's `operation` endpoint along with any additional request fields."""
+        request = {"eeprom": base64.b64encode(bytes(dump)).decode("ascii")}
+        request.update(
+            {name: value for name, value in fields.items() if value is not None}
+        )
+        return json.loads(self._request("POST", f"/{operation}", request))
+
+    def inspect(
+        self,
+        dump: bytes,
+        version_hint: Optional[str] = None,
+        settings_only: bool = False,
+    ) -> dict:
+        """Returns the version, serial number, MAC address, settings, and (unless `settings_only`) region and HDD key
+        of an encrypted dump."""
+        return self.call(
+            "inspect", dump, version_hint=version_hint, settings_only=settings_only
+        )
+
+    def decrypt(self, dump: bytes, version_hint: Optional[str] = None):
+        """Returns (version, decrypted dump) for an encrypted dump."""
+        response = self.call("decrypt", dump, version_hint=version_hint)
+        return response["version"], base64.b64decode(response["eeprom"])
+
+    def edit(
+        self,
+        dump: bytes,
+        edits: dict,
+        version_hint: Optional[str] = None,
+        settings_only: bool = False,
+    ) -> bytes:
+        """Applies `edits` (e.g., {"audio_mode": "surround", "dts_flag": True}) and returns the re-encrypted dump."""
+        response = self.call(
+            "edit",
+            dump,
+            edits=edits,
+            version_hint=version_hint,
+            settings_only=settings_only,
+        )
+        return base64.b64decode(response["eeprom"])
+
+    def encrypt(self, dump: bytes, version: str) -> bytes:
+        """Encrypts a decrypted dump for the given XBOX version ("1.0", "1.1", or "1.6")."""
+        return base64.b64decode(self.call("encrypt", dump, version=version)["eeprom"])
+
+    def metrics(self) -> str:
+        """Returns the service's request counters and latency histograms in the Prometheus text format."""
+        return self._request("GET", "/metrics").decode("utf-8")
+
+
+def _write_output(path: str, data: bytes):
+    """Writes `data` to `path` via a temporary file that is renamed into place, like `xk.jobs.atomic_write`."""
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), prefix=".xk-", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as outfile:
+            outfile.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _edits_from_args(args) -> dict:
+    edits = {}
+    if args.audio_mode is not None:
+        edits["audio_mode"] = args.audio_mode
+    if args.enable_dolby_digital:
+        edits["dolby_digital_flag"] = True
+    if args.disable_dolby_digital:
+        edits["dolby_digital_flag"] = False
+    if args.enable_dts:
+        edits["dts_flag"] = True
+    if args.disable_dts:
+        edits["dts_flag"] = False
+    return edits
+
+
+def _main(args) -> int:
+    client = ServiceClient(args.socket, args.port)
+    try:
+        if args.metrics:
+            sys.stdout.write(client.metrics())
+            return 0
+
+        with open(os.path.expanduser(args.eeprom_file), "rb") as infile:
+            dump = infile.read(256)
+
+        edits = _edits_from_args(args)
+        if edits:
+            encrypted = client.edit(dump, edits, args.version_hint, args.settings_only)
+            _write_output(args.output or args.eeprom_file + _OUTPUT_SUFFIX, encrypted)
+            dump = encrypted
+
+        info = client.inspect(dump, args.version_hint, args.settings_only)
+        for name, value in info.items():
+            print(f"{name}: {value}")
+        return 0
+    except Exception as err:  # pylint: disable=broad-except
+        print(f"FAILED: {err}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+
+    def _parse_args():
+        parser = argparse.ArgumentParser(
+            description="Inspect or edit an EEPROM dump via the service started by `xbeeprom.py serve`."
+        )
+        parser.add_argument(
+            "eeprom_file",
+            nargs="?",
+            help="The EEPROM file to operate on. Without edits, its contents are printed.",
+        )
+        address = parser.add_mutually_exclusive_group()
+        address.add_argument(
+            "--socket",
+            metavar="filename",
+            help="Unix domain socket of the service (defaults to $XK_SERVICE_SOCKET or a socket under "
+            "$XDG_RUNTIME_DIR).",
+        )
+        address.add_argument(
+            "--port",
+            type=int,
+            help="Connect to the service on this loopback TCP port instead.",
+        )
+        parser.add_argument(
+            "--metrics",
+            action="store_true",
+            help="Print the service's request latency histograms instead.",
+        )
+        parser.add_argument(
+            "-o",
+            "--output",
+            metavar="filename",
+            help="Filename to write modified contents to.",
+        )
+        parser.add_argument(
+            "--settings_only",
+            action="store_true",
+            help="Do not decrypt the EEPROM header. Only user settings may be modified.",
+        )
+        parser.add_argument(
+            "--version_hint",
+            choices=["1.0", "1.1", "1.6"],
+            help="XBOX version to try first when decrypting.",
+        )
+        parser.add_argument(
+            "--audio_mode",
+            choices=["mono", "stereo", "surround"],
+            help="Set the audio mode",
+        )
+        parser.add_argument("--enable_dts", action="store_true", help="Enable DTS")
+        parser.add_argument("--disable_dts", action="store_true", help="Disable DTS")
+        parser.add_argument(
+            "--enable_dolby_digital", action="store_true", help="Enable Dolby Digital"
+        )
+        parser.add_argument(
+            "--disable_dolby_digital",
+            action="store_true",
+            help="Disable Dolby Digital",
+        )
+
+        args = parser.parse_args()
+        if not args.metrics and not args.eeprom_file:
+            parser.error("the following arguments are required: eeprom_file")
+        return args
+
+    sys.exit(_main(_parse_args()))
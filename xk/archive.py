@@ -0,0 +1,83 @@
+"""Streams EEPROM dumps directly out of zip and tar archives.
+
+Members are read one at a time and only their first EEPROM_SIZE bytes are kept, so archives are never extracted to
+disk or loaded into memory as a whole. Tar archives, including compressed ones, are read as a stream.
+"""
+
+import fnmatch
+import posixpath
+import tarfile
+import zipfile
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from .eeprom import EEPROM_SIZE
+
+DEFAULT_PATTERN = "*.bin"
+
+
+def is_archive(path: str) -> bool:
+    """Returns True if `path` is a zip or tar archive."""
+    return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+
+
+def _matches(name: str, pattern: str) -> bool:
+    return fnmatch.fnmatch(posixpath.basename(name), pattern)
+
+
+def _iter_zip(path: str, pattern: str) -> Iterator[Tuple[str, bytes]]:
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or info.file_size < EEPROM_SIZE:
+                continue
+            if not _matches(info.filename, pattern):
+                continue
+            with archive.open(info) as member:
+                yield info.filename, member.read(EEPROM_SIZE)
+
+
+def _iter_tar(path: str, pattern: str) -> Iterator[Tuple[str, bytes]]:
+    # "r|*" reads the archive strictly sequentially, transparently decompressing it.
+    with tarfile.open(path, "r|*") as archive:
+        for info in archive:
+            if not info.isfile() or info.size < EEPROM_SIZE:
+                continue
+            if not _matches(info.name, pattern):
+                continue
+            member = archive.extractfile(info)
+            yield info.name, member.read(EEPROM_SIZE)
+
+
+def iter_dumps(
+    path: str, pattern: str = DEFAULT_PATTERN
+) -> Iterator[Tuple[str, bytes]]:
+    """Yields (member name, dump) for each file in the zip or tar archive at `path` whose name matches `pattern`.
+
+    Members smaller than EEPROM_SIZE are skipped.
+    """
+    if zipfile.is_zipfile(path):
+        return _iter_zip(path, pattern)
+    if tarfile.is_tarfile(path):
+        return _iter_tar(path, pattern)
+    raise ValueError(f"{path} is not a zip or tar archive")
+
+
+def iter_dump_batches(
+    path: str, batch_size: int = 4096, pattern: str = DEFAULT_PATTERN
+) -> Iterator[Tuple[List[str], bytes]]:
+    """Yields (member names, concatenated dumps) for up to `batch_size` dumps at a time.
+
+    The concatenated dumps may be passed directly to, e.g., xk.batch.decrypt_many or xk.columnar.from_buffer.
+    """
+    names = []
+    dumps = []
+    for name, dump in iter_dumps(path, pattern):
+        names.append(name)
+        dumps.append(dump)
+        if len(names) == batch_size:
+            yield names, b"".join(dumps)
+            names = []
+            dumps = []
+    if names:
+        yield names, b"".join(dumps)
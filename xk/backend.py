@@ -0,0 +1,208 @@
+"""Pluggable implementations of the cryptographic primitives used by EEPROMData.
+
+The pure-Python backend is the reference implementation. The "libcrypto" backend uses the system OpenSSL library via
+ctypes when it is present, seeding SHA1_Transform with the Xbox-specific intermediate hashes and using the native RC4.
+
+The pure-Python backend is the default. Another may be chosen at import time via the XK_CRYPTO_BACKEND environment
+variable, with `set_default_backend`, or per EEPROM; "auto" selects libcrypto if it can be loaded and falls back to the
+pure-Python implementation otherwise.
+"""
+
+import abc
+import ctypes
+import ctypes.util
+import os
+import struct
+import threading
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from . import rc4
+from . import sha1
+
+_DIGEST = struct.Struct(">5L")
+
+
+class BackendUnavailableError(Exception):
+    """Raised when a backend cannot be used on this system."""
+
+
+class CryptoBackend(abc.ABC):
+    """Interface for the primitives needed to encrypt and decrypt an EEPROM."""
+
+    name = ""
+
+    def __reduce__(self):
+        # Backends are shared per process and may hold unpicklable library handles, so pickle them by name.
+        return get_backend, (self.name,)
+
+    @abc.abstractmethod
+    def xbox_hmac_sha1(self, version: int, message: bytes) -> bytes:
+        """Computes the Xbox HMAC_SHA1 of `message` for the given XBOX version."""
+
+    @abc.abstractmethod
+    def rc4(self, key: bytes, data: bytes) -> bytes:
+        """Encrypts (or decrypts) `data` with a fresh RC4 stream keyed with `key`."""
+
+
+class PythonBackend(CryptoBackend):
+    """Reference implementation built on xk.sha1 and xk.rc4."""
+
+    name = "python"
+
+    def xbox_hmac_sha1(self, version: int, message: bytes) -> bytes:
+        return sha1.xbox_hmac_sha1(version, message)
+
+    def rc4(self, key: bytes, data: bytes) -> bytes:
+        return bytes(rc4.crypt(key, data))
+
+
+class _SHA_CTX(ctypes.Structure):
+    _fields_ = [
+        ("h", ctypes.c_uint32 * 5),
+        ("Nl", ctypes.c_uint32),
+        ("Nh", ctypes.c_uint32),
+        ("data", ctypes.c_uint32 * 16),
+        ("num", ctypes.c_uint),
+    ]
+
+
+# RC4_KEY is two RC4_INTs followed by 256 more; RC4_INT is at most 8 bytes wide in any OpenSSL configuration.
+_RC4_KEY_SIZE = 258 * 8
+
+
+class LibCryptoBackend(CryptoBackend):
+    """Accelerated implementation using the system OpenSSL libcrypto."""
+
+    name = "libcrypto"
+
+    def __init__(self, library: Optional[str] = None):
+        if not library:
+            library = ctypes.util.find_library("crypto")
+        if not library:
+            raise BackendUnavailableError("libcrypto could not be found")
+
+        try:
+            lib = ctypes.CDLL(library)
+            self._sha1_transform = lib.SHA1_Transform
+            self._rc4_set_key = lib.RC4_set_key
+            self._rc4 = lib.RC4
+        except (OSError, AttributeError) as err:
+            raise BackendUnavailableError(f"Failed to load {library}: {err}") from err
+
+        self._sha1_transform.argtypes = [ctypes.POINTER(_SHA_CTX), ctypes.c_char_p]
+        self._sha1_transform.restype = None
+        self._rc4_set_key.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_char_p]
+        self._rc4_set_key.restype = None
+        self._rc4.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_char_p,
+            ctypes.c_void_p,
+        ]
+        self._rc4.restype = None
+
+    def _hash(self, state, message: bytes) -> bytes:
+        ctx = _SHA_CTX()
+        ctx.h[:] = state
+        padded = sha1.pad_message(message)
+        for start in range(0, len(padded), 64):
+            self._sha1_transform(ctx, padded[start : start + 64])
+        return _DIGEST.pack(*ctx.h)
+
+    def xbox_hmac_sha1(self, version: int, message: bytes) -> bytes:
+        if version not in sha1.HMAC1_STATES:
+            raise Exception(f"Invalid `version` parameter {version} < 9 || > 12")
+
+        inner = self._hash(sha1.HMAC1_STATES[version], bytes(message))
+        return self._hash(sha1.HMAC2_STATES[version], inner)
+
+    def rc4(self, key: bytes, data: bytes) -> bytes:
+        key = bytes(key)
+        data = bytes(data)
+        rc4_key = ctypes.create_string_buffer(_RC4_KEY_SIZE)
+        result = ctypes.create_string_buffer(len(data))
+        self._rc4_set_key(rc4_key, len(key), key)
+        self._rc4(rc4_key, len(data), data, result)
+        return result.raw
+
+
+_BACKEND_FACTORIES: Dict[str, Callable[[], CryptoBackend]] = {
+    PythonBackend.name: PythonBackend,
+    LibCryptoBackend.name: LibCryptoBackend,
+}
+_AUTO_PREFERENCE = [LibCryptoBackend.name, PythonBackend.name]
+
+_backends: Dict[str, CryptoBackend] = {}
+_unavailable: Dict[str, BackendUnavailableError] = {}
+_backends_lock = threading.Lock()
+_default_backend_name = os.environ.get("XK_CRYPTO_BACKEND", PythonBackend.name)
+
+
+def register_backend(name: str, factory: Callable[[], CryptoBackend]):
+    """Registers a backend factory under the given name.
+
+    The factory should raise BackendUnavailableError if the backend cannot be used on this system.
+    """
+    with _backends_lock:
+        _BACKEND_FACTORIES[name] = factory
+        _backends.pop(name, None)
+        _unavailable.pop(name, None)
+
+
+def registered_backends() -> List[str]:
+    """Returns the names of all registered backends."""
+    return list(_BACKEND_FACTORIES)
+
+
+def available_backends() -> List[str]:
+    """Returns the names of the registered backends that can be used on this system."""
+    ret = []
+    for name in _BACKEND_FACTORIES:
+        try:
+            get_backend(name)
+        except BackendUnavailableError:
+            continue
+        ret.append(name)
+    return ret
+
+
+def get_backend(name: Optional[str] = None) -> CryptoBackend:
+    """Returns the (shared) backend with the given name, or the default backend if no name is given."""
+    if not name:
+        name = _default_backend_name
+
+    if name == "auto":
+        for candidate in _AUTO_PREFERENCE:
+            try:
+                return get_backend(candidate)
+            except BackendUnavailableError:
+                continue
+
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend:
+            return backend
+        if name in _unavailable:
+            raise _unavailable[name]
+
+        factory = _BACKEND_FACTORIES.get(name)
+        if not factory:
+            raise ValueError(f"Unknown crypto backend '{name}'")
+        try:
+            backend = factory()
+        except BackendUnavailableError as err:
+            _unavailable[name] = err
+            raise
+        _backends[name] = backend
+        return backend
+
+
+def set_default_backend(name: str):
+    """Sets the backend returned by `get_backend()` when no name is given."""
+    global _default_backend_name  # pylint: disable=global-statement
+    if name != "auto":
+        get_backend(name)
+    _default_backend_name = name
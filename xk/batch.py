@@ -0,0 +1,88 @@
+"""Vectorized decryption and encryption of many EEPROM dumps at once.
+
+Version detection, RC4, and HMAC confirmation run for every dump in a handful of NumPy passes (see
+sha1.batch_xbox_hmac_sha1 and rc4.batch_keystream) rather than one EEPROMData at a time.
+
+Requires numpy.
+"""
+
+from typing import Iterable
+from typing import Tuple
+
+import numpy as np
+
+from . import columnar
+from . import crc
+from . import eeprom
+from . import rc4
+from . import sha1
+
+_HMAC_RANGE = (0x00, 0x14)
+_CHECKSUM2_WORD = eeprom.EEPROMData.Checksum2.offset // 4
+_CHECKSUM3_WORD = eeprom.EEPROMData.Checksum3.offset // 4
+
+
+def _records(dumps: np.ndarray) -> np.ndarray:
+    return dumps.view(columnar.EEPROM_DTYPE)[:, 0]
+
+
+def decrypt_many(
+    buffers, candidates: Iterable[eeprom.XBOX_VERSION] = eeprom.DECRYPT_VERSIONS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Decrypts many dumps, given as anything accepted by columnar.as_byte_matrix.
+
+    Returns (records, versions): a new (N,) record array with the Confounder, HDDKey, and XBERegion of each
+    successfully decrypted dump in plain text, and an (N,) uint8 array of the detected XBOX_VERSION for each row.
+    Rows that do not decrypt with any of the `candidates` are left untouched and marked XBOX_VERSION.V_NONE.
+    """
+    dumps = np.array(columnar.as_byte_matrix(buffers), dtype=np.uint8)
+    versions = np.full(len(dumps), eeprom.XBOX_VERSION.V_NONE, dtype=np.uint8)
+
+    pending = np.arange(len(dumps))
+    for xbox_version in candidates:
+        if not pending.size:
+            break
+        hmac = dumps[pending, slice(*_HMAC_RANGE)]
+        key_hash = sha1.batch_xbox_hmac_sha1(xbox_version, hmac)
+        secrets = rc4.batch_apply(key_hash, dumps[pending, slice(*eeprom.SECRET_RANGE)])
+        confirmed = (sha1.batch_xbox_hmac_sha1(xbox_version, secrets) == hmac).all(
+            axis=1
+        )
+
+        decrypted = pending[confirmed]
+        dumps[decrypted, slice(*eeprom.SECRET_RANGE)] = secrets[confirmed]
+        versions[decrypted] = xbox_version
+        pending = pending[~confirmed]
+
+    return _records(dumps), versions
+
+
+def encrypt_many(records, versions) -> np.ndarray:
+    """Encrypts many decrypted dumps, returning a new (N,) record array with fresh HMACs and checksums.
+
+    `versions` is a single XBOX_VERSION or one per row. Rows whose version is XBOX_VERSION.V_NONE (e.g., those that
+    decrypt_many failed to decrypt) are returned untouched.
+    """
+    dumps = np.array(columnar.as_byte_matrix(records), dtype=np.uint8)
+    versions = np.broadcast_to(np.asarray(versions, dtype=np.uint8), len(dumps))
+
+    rows = np.flatnonzero(versions != eeprom.XBOX_VERSION.V_NONE)
+    if not rows.size:
+        return _records(dumps)
+
+    lane_versions = versions[rows]
+    secrets = dumps[rows, slice(*eeprom.SECRET_RANGE)]
+    hmac = sha1.batch_xbox_hmac_sha1(lane_versions, secrets)
+    key_hash = sha1.batch_xbox_hmac_sha1(lane_versions, hmac)
+    dumps[rows, slice(*_HMAC_RANGE)] = hmac
+    dumps[rows, slice(*eeprom.SECRET_RANGE)] = rc4.batch_apply(key_hash, secrets)
+
+    encrypted = dumps[rows]
+    words = dumps.view("<u4")
+    words[rows, _CHECKSUM2_WORD] = crc.batch_region_checksums(
+        encrypted, *eeprom.CHECKSUM2_RANGE
+    )
+    words[rows, _CHECKSUM3_WORD] = crc.batch_region_checksums(
+        encrypted, *eeprom.CHECKSUM3_RANGE
+    )
+    return _records(dumps)
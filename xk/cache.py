@@ -0,0 +1,176 @@
+"""Persistent cache of decrypted EEPROM headers.
+
+Decrypting an EEPROM requires probing each XBOX version with several HMAC_SHA1 and RC4 passes. The result depends only
+on the 0x30 byte encrypted header (the HMAC and the encrypted Confounder, HDDKey, and XBERegion), so it can be cached
+on disk keyed by a digest of that header.
+
+The cache holds decrypted HDD keys. Its database is created with owner-only permissions, and caching can be disabled
+regardless of what callers request by setting the XK_DISABLE_DECRYPT_CACHE environment variable to a non-empty value
+other than "0".
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+DEFAULT_MAX_ENTRIES = 100000
+_DATABASE_NAME = "decrypt_cache.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    digest BLOB PRIMARY KEY,
+    version INTEGER NOT NULL,
+    secrets BLOB NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+"""
+
+
+def default_cache_directory() -> str:
+    """Returns $XK_DECRYPT_CACHE_DIR, falling back to a directory under the user's cache directory."""
+    directory = os.environ.get("XK_DECRYPT_CACHE_DIR")
+    if directory:
+        return directory
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+    return os.path.join(os.path.expanduser(base), "pyxbeeprom")
+
+
+def create_private_file(path: str):
+    """Creates `path` and its directory if they do not exist, so that they are only accessible by their owner."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+    os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+
+
+def cache_disabled_by_environment() -> bool:
+    """Returns True if the XK_DISABLE_DECRYPT_CACHE environment variable forbids caching."""
+    return os.environ.get("XK_DISABLE_DECRYPT_CACHE", "0") not in ("", "0")
+
+
+class DecryptCache:
+    """Size-bounded LRU cache mapping encrypted EEPROM headers to their decrypted contents."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        enabled: bool = True,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+
+        self.directory = os.path.expanduser(directory or default_cache_directory())
+        self.max_entries = max_entries
+        self.enabled = enabled and not cache_disabled_by_environment()
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._clock = 0
+        self._entries = 0
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, _DATABASE_NAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection:
+            return self._connection
+
+        create_private_file(self.path)
+
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.executescript(_SCHEMA)
+        self._clock, self._entries = connection.execute(
+            "SELECT COALESCE(MAX(last_used), 0), COUNT(*) FROM entries"
+        ).fetchone()
+        self._connection = connection
+        return connection
+
+    @staticmethod
+    def _digest(header: bytes) -> bytes:
+        return hashlib.sha256(bytes(header)).digest()
+
+    def get(self, header: bytes) -> Optional[Tuple[int, bytes]]:
+        """Returns (version, decrypted secrets) for the given encrypted header, or None."""
+        if not self.enabled:
+            return None
+
+        digest = self._digest(header)
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT version, secrets FROM entries WHERE digest = ?", (digest,)
+            ).fetchone()
+            if not row:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._clock += 1
+            with connection:
+                connection.execute(
+                    "UPDATE entries SET last_used = ? WHERE digest = ?",
+                    (self._clock, digest),
+                )
+        return row[0], bytes(row[1])
+
+    def put(self, header: bytes, version: int, secrets: bytes):
+        """Records the decrypted secrets for the given encrypted header, evicting the least recently used entries."""
+        if not self.enabled:
+            return
+
+        digest = self._digest(header)
+        with self._lock:
+            connection = self._connect()
+            self._clock += 1
+            with connection:
+                inserted = connection.execute(
+                    "INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?)",
+                    (digest, int(version), bytes(secrets), self._clock),
+                ).rowcount
+                self._entries += inserted
+                if self._entries > self.max_entries:
+                    self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection):
+        # Other processes may share the database, so refresh the count before trimming. Trimming to below the
+        # limit keeps this from running on every insertion.
+        (self._entries,) = connection.execute("SELECT COUNT(*) FROM entries").fetchone()
+        target = self.max_entries - self.max_entries // 10
+        excess = self._entries - target
+        if excess <= 0:
+            return
+        connection.execute(
+            "DELETE FROM entries WHERE digest IN "
+            "(SELECT digest FROM entries ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._entries -= excess
+
+    def clear(self):
+        """Removes all entries and resets the hit/miss counters."""
+        self.hits = 0
+        self.misses = 0
+        if not self.enabled:
+            return
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM entries")
+            self._entries = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit/miss counters for this instance along with the current number of entries."""
+        return {"hits": self.hits, "misses": self.misses, "entries": self._entries}
+
+    def close(self):
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
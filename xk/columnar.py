@@ -0,0 +1,143 @@
+"""Columnar NumPy views over many EEPROM dumps.
+
+EEPROM_DTYPE is a structured dtype mirroring the EEPROMData layout exactly, so N concatenated 256-byte dumps can be
+viewed as an (N,) record array without copying and queried with vectorized operations.
+
+Note that the HMAC, Confounder, HDDKey, and XBERegion fields are encrypted in raw dumps; queries on them are only
+meaningful for decrypted records.
+
+Requires numpy.
+"""
+
+import ctypes
+from typing import Dict
+from typing import Tuple
+
+import numpy as np
+
+from . import crc
+from . import eeprom
+
+_SCALAR_TYPES = {
+    ctypes.c_uint8: "u1",
+    ctypes.c_uint32: "<u4",
+}
+
+
+def _field_format(ctype):
+    if issubclass(ctype, ctypes.Array):
+        return _SCALAR_TYPES[ctype._type_], (ctype._length_,)
+    return _SCALAR_TYPES[ctype]
+
+
+def _build_dtype() -> np.dtype:
+    names = []
+    formats = []
+    offsets = []
+    for name, ctype in eeprom.EEPROMData._fields_:
+        names.append(name)
+        formats.append(_field_format(ctype))
+        offsets.append(getattr(eeprom.EEPROMData, name).offset)
+    return np.dtype(
+        {
+            "names": names,
+            "formats": formats,
+            "offsets": offsets,
+            "itemsize": ctypes.sizeof(eeprom.EEPROMData),
+        }
+    )
+
+
+EEPROM_DTYPE = _build_dtype()
+
+
+def _audio_flag(name: str) -> int:
+    settings = eeprom.AudioSettings(0)
+    setattr(settings, name, 1)
+    return int.from_bytes(bytes(settings), "little")
+
+
+# Bit masks within AudioFlags, derived from the AudioSettings layout.
+AUDIO_FLAGS = {name: _audio_flag(name) for name in ("Mono", "Surround", "AC3", "DTS")}
+
+
+def from_buffer(buffer) -> np.ndarray:
+    """Returns a zero-copy (N,) record array over N concatenated dumps in `buffer`."""
+    return np.frombuffer(buffer, dtype=EEPROM_DTYPE)
+
+
+def load(path: str, mode: str = "r") -> np.ndarray:
+    """Memory maps a file of N concatenated dumps as an (N,) record array.
+
+    `mode` is passed to numpy.memmap; use "r+" to edit the file in place or "c" for copy-on-write.
+    """
+    return np.memmap(path, dtype=EEPROM_DTYPE, mode=mode)
+
+
+def as_bytes(records: np.ndarray) -> np.ndarray:
+    """Returns a zero-copy (N, 256) uint8 view of the given records."""
+    return records.view(np.uint8).reshape(len(records), EEPROM_DTYPE.itemsize)
+
+
+def as_byte_matrix(dumps) -> np.ndarray:
+    """Returns an (N, 256) uint8 view of a record array, uint8 array, or bytes-like object of concatenated dumps."""
+    if isinstance(dumps, np.ndarray) and dumps.dtype == EEPROM_DTYPE:
+        return as_bytes(dumps)
+    if not isinstance(dumps, np.ndarray):
+        dumps = np.frombuffer(dumps, dtype=np.uint8)
+    return dumps.reshape(-1, EEPROM_DTYPE.itemsize)
+
+
+def compute_checksums(dumps) -> Tuple[np.ndarray, np.ndarray]:
+    """Computes (Checksum2, Checksum3) for every dump at once, returning two (N,) uint32 arrays."""
+    dumps = as_byte_matrix(dumps)
+    return (
+        crc.batch_region_checksums(dumps, *eeprom.CHECKSUM2_RANGE),
+        crc.batch_region_checksums(dumps, *eeprom.CHECKSUM3_RANGE),
+    )
+
+
+def verify_checksums(dumps) -> np.ndarray:
+    """Returns a boolean mask of the dumps whose stored Checksum2 and Checksum3 are both valid.
+
+    This is a cheap integrity check that does not require decryption.
+    """
+    dumps = as_byte_matrix(dumps)
+    checksum2, checksum3 = compute_checksums(dumps)
+    words = np.ascontiguousarray(dumps).view("<u4")
+    stored2 = words[:, eeprom.EEPROMData.Checksum2.offset // 4]
+    stored3 = words[:, eeprom.EEPROMData.Checksum3.offset // 4]
+    return (stored2 == checksum2) & (stored3 == checksum3)
+
+
+def _as_keys(column: np.ndarray) -> np.ndarray:
+    """Returns a 1D array with one hashable/sortable element per row of `column`."""
+    if column.ndim == 1:
+        return column
+    width = column.shape[1] * column.dtype.itemsize
+    return np.ascontiguousarray(column).view(f"V{width}").ravel()
+
+
+def count_by(records: np.ndarray, field: str) -> Dict:
+    """Returns a map of each distinct value of `field` to the number of records having it.
+
+    Array fields (e.g., MACAddress) are keyed by their bytes.
+    """
+    values, counts = np.unique(_as_keys(records[field]), return_counts=True)
+    return {
+        (value.tobytes() if isinstance(value, np.void) else value.item()): int(count)
+        for value, count in zip(values, counts)
+    }
+
+
+def has_audio_flag(records: np.ndarray, flag: str) -> np.ndarray:
+    """Returns a boolean mask of the records with the given AUDIO_FLAGS bit set."""
+    return (records["AudioFlags"] & AUDIO_FLAGS[flag]) != 0
+
+
+def duplicate_mask(records: np.ndarray, field: str) -> np.ndarray:
+    """Returns a boolean mask of the records whose `field` value also appears in another record."""
+    _, inverse, counts = np.unique(
+        _as_keys(records[field]), return_inverse=True, return_counts=True
+    )
+    return counts[inverse.ravel()] > 1
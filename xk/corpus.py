@@ -0,0 +1,257 @@
+"""Packed corpus of many EEPROM dumps with indexes by serial number and MAC address.
+
+Millions of 256 byte files are slow to store and read, so a corpus packs them into a single file:
+
+  header:        CORPUS_HEADER, padded to EEPROM_SIZE bytes
+  records:       `count` raw dumps of EEPROM_SIZE bytes each, in insertion order
+  serial index:  `count` (SerialNumber, record index) entries sorted by serial number
+  MAC index:     `count` (MACAddress, record index) entries sorted by MAC address
+
+The serial number and MAC address are not encrypted, so building a corpus does not require decryption. Lookups
+bisect the memory mapped indexes in O(log n), and iterating over all records is a single sequential read.
+"""
+
+import bisect
+import fnmatch
+import mmap
+import os
+import struct
+import tempfile
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Union
+
+from .eeprom import EEPROM
+from .eeprom import EEPROM_SIZE
+from .eeprom import EEPROMData
+
+MAGIC = b"XKCORPUS"
+FORMAT_VERSION = 1
+
+# magic, format version, record size, record count, and the offsets of the records, serial index, and MAC index.
+CORPUS_HEADER = struct.Struct("<8sHHQQQQ")
+
+_SERIAL_FIELD = EEPROMData.SerialNumber
+_MAC_FIELD = EEPROMData.MACAddress
+_SERIAL_ENTRY = struct.Struct(f"<{_SERIAL_FIELD.size}sL")
+_MAC_ENTRY = struct.Struct(f"<{_MAC_FIELD.size}s2xL")
+
+
+class _IndexKeys:
+    """Read-only sequence view of the keys of a sorted index, for use with `bisect`."""
+
+    def __init__(
+        self, mapping: mmap.mmap, offset: int, entry: struct.Struct, count: int
+    ):
+        self._mapping = mapping
+        self._offset = offset
+        self._entry = entry
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> bytes:
+        return self._entry.unpack_from(
+            self._mapping, self._offset + i * self._entry.size
+        )[0]
+
+    def find(self, key: bytes) -> List[int]:
+        """Returns the record indices of all entries matching `key`."""
+        ret = []
+        i = bisect.bisect_left(self, key)
+        while i < self._count:
+            entry_key, index = self._entry.unpack_from(
+                self._mapping, self._offset + i * self._entry.size
+            )
+            if entry_key != key:
+                break
+            ret.append(index)
+            i += 1
+        return ret
+
+
+def _serial_key(serial: Union[str, bytes]) -> bytes:
+    if isinstance(serial, str):
+        serial = serial.encode("ascii")
+    return bytes(serial).ljust(_SERIAL_FIELD.size, b"\0")
+
+
+def _mac_key(mac: Union[str, bytes]) -> bytes:
+    if isinstance(mac, str):
+        mac = bytes.fromhex(mac.replace(":", "").replace("-", ""))
+    return bytes(mac)
+
+
+class Corpus:
+    """Read-only, memory mapped view of a corpus file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as infile:
+            self._mapping = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mapping) < CORPUS_HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not an EEPROM corpus")
+        (
+            magic,
+            version,
+            record_size,
+            self._count,
+            self._records_offset,
+            serial_offset,
+            mac_offset,
+        ) = CORPUS_HEADER.unpack_from(self._mapping)
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != EEPROM_SIZE:
+            self.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} EEPROM corpus")
+
+        self._serials = _IndexKeys(
+            self._mapping, serial_offset, _SERIAL_ENTRY, self._count
+        )
+        self._macs = _IndexKeys(self._mapping, mac_offset, _MAC_ENTRY, self._count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._mapping.close()
+
+    def record_offset(self, index: int) -> int:
+        """Returns the byte offset of record `index` within the corpus file."""
+        if not 0 <= index < self._count:
+            raise IndexError(f"Record {index} out of range")
+        return self._records_offset + index * EEPROM_SIZE
+
+    def record(self, index: int) -> bytes:
+        """Returns the raw dump stored as record `index`."""
+        offset = self.record_offset(index)
+        return self._mapping[offset : offset + EEPROM_SIZE]
+
+    def __iter__(self) -> Iterator[bytes]:
+        for offset in range(
+            self._records_offset,
+            self._records_offset + self._count * EEPROM_SIZE,
+            EEPROM_SIZE,
+        ):
+            yield self._mapping[offset : offset + EEPROM_SIZE]
+
+    def records(self) -> memoryview:
+        """Returns a zero-copy view of all records, e.g., for xk.columnar.from_buffer or xk.batch.decrypt_many."""
+        return memoryview(self._mapping)[
+            self._records_offset : self._records_offset + self._count * EEPROM_SIZE
+        ]
+
+    def find_serial(self, serial: Union[str, bytes]) -> List[int]:
+        """Returns the indices of the records with the given serial number."""
+        return self._serials.find(_serial_key(serial))
+
+    def find_mac(self, mac: Union[str, bytes]) -> List[int]:
+        """Returns the indices of the records with the given MAC address, given as bytes or a hex string."""
+        return self._macs.find(_mac_key(mac))
+
+    def open_eeprom(
+        self,
+        index: int,
+        eeprom: Optional[EEPROM] = None,
+        version_hint=None,
+    ) -> EEPROM:
+        """Maps record `index` into `eeprom` (a new EEPROM by default) via a copy-on-write mapping and returns it.
+
+        The corpus file itself is never modified; the caller must `close` the returned EEPROM.
+        """
+        if eeprom is None:
+            eeprom = EEPROM()
+        try:
+            eeprom.open_mapped(
+                self.path,
+                self.record_offset(index),
+                copy_on_write=True,
+                version_hint=version_hint,
+            )
+        except Exception:
+            # Decryption failures happen after the record is mapped; don't leak the mapping.
+            eeprom.close()
+            raise
+        return eeprom
+
+
+def build(path: str, dumps: Iterable[bytes]) -> int:
+    """Writes the given raw dumps to a new corpus at `path`, returning the number of records.
+
+    The corpus is written to a temporary file that replaces `path` once complete.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    serials = []
+    macs = []
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".corpus-")
+    try:
+        with os.fdopen(fd, "wb") as outfile:
+            outfile.write(bytes(EEPROM_SIZE))
+
+            for index, dump in enumerate(dumps):
+                dump = bytes(dump[:EEPROM_SIZE])
+                if len(dump) != EEPROM_SIZE:
+                    raise ValueError(f"Record {index} is not {EEPROM_SIZE} bytes")
+                outfile.write(dump)
+                serials.append(
+                    (
+                        dump[
+                            _SERIAL_FIELD.offset : _SERIAL_FIELD.offset
+                            + _SERIAL_FIELD.size
+                        ],
+                        index,
+                    )
+                )
+                macs.append(
+                    (
+                        dump[_MAC_FIELD.offset : _MAC_FIELD.offset + _MAC_FIELD.size],
+                        index,
+                    )
+                )
+
+            count = len(serials)
+            serial_offset = EEPROM_SIZE + count * EEPROM_SIZE
+            mac_offset = serial_offset + count * _SERIAL_ENTRY.size
+            serials.sort()
+            outfile.write(b"".join(_SERIAL_ENTRY.pack(*entry) for entry in serials))
+            macs.sort()
+            outfile.write(b"".join(_MAC_ENTRY.pack(*entry) for entry in macs))
+
+            outfile.seek(0)
+            outfile.write(
+                CORPUS_HEADER.pack(
+                    MAGIC,
+                    FORMAT_VERSION,
+                    EEPROM_SIZE,
+                    count,
+                    EEPROM_SIZE,
+                    serial_offset,
+                    mac_offset,
+                )
+            )
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return count
+
+
+def iter_directory_dumps(directory: str, pattern: str = "*.bin") -> Iterator[bytes]:
+    """Yields the first EEPROM_SIZE bytes of each file matching `pattern` under `directory`, in sorted order."""
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for filename in sorted(fnmatch.filter(filenames, pattern)):
+            with open(os.path.join(dirpath, filename), "rb") as infile:
+                dump = infile.read(EEPROM_SIZE)
+            if len(dump) == EEPROM_SIZE:
+                yield dump
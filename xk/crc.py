@@ -21,8 +21,32 @@ COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER I
 """
 
 import struct
+import sys
+from typing import Iterable
+from typing import Optional
 from typing import Tuple
 
+_WORD = struct.Struct("<L")
+
+# memoryview.cast("I") yields native-endian words, so it can only be used directly on little-endian hosts.
+_NATIVE_LITTLE_ENDIAN_WORDS = sys.byteorder == "little" and struct.calcsize("I") == 4
+
+
+def _iter_words(data) -> Iterable[int]:
+    """Returns the little-endian 32-bit words in `data` without copying it.
+
+    Trailing bytes that do not form a complete word are ignored.
+    """
+    view = memoryview(data).cast("B")
+    view = view[: len(view) & ~0x03]
+    if _NATIVE_LITTLE_ENDIAN_WORDS:
+        return view.cast("I")
+    return (word for (word,) in _WORD.iter_unpack(view))
+
+
+def _finalize(high: int, low: int) -> int:
+    return ~(high + low) & 0xFFFFFFFF
+
 
 def quick_crc(data: bytes, initial_state=None) -> Tuple[int, Tuple[int, int]]:
     """Performs XBOX CRC calculation on the given bytes.
@@ -31,22 +55,74 @@ def quick_crc(data: bytes, initial_state=None) -> Tuple[int, Tuple[int, int]]:
 
     Returns (crc, (state_1, state_2))
     """
-    if initial_state == None:
-        initial_state = (0, 0)
+    checksum = RegionChecksum(initial_state)
+    checksum.add(data)
+    return checksum.value, checksum.state
+
+
+class RegionChecksum:
+    """Running XBOX checksum over a region of memory.
+
+    The XBOX checksum is a 64-bit sum of the little-endian words in the region (kept as a (high, low) pair of 32-bit
+    values), so replacing a known value with a new one adjusts the state by a simple delta without revisiting the
+    rest of the region.
+    """
+
+    def __init__(self, initial_state: Optional[Tuple[int, int]] = None):
+        if initial_state is None:
+            initial_state = (0, 0)
+        self._total = (initial_state[0] << 32) + initial_state[1]
+
+    @classmethod
+    def from_buffer(cls, buffer, start: int = 0, end: Optional[int] = None):
+        """Computes the checksum of buffer[start:end] using a zero-copy view of `buffer`."""
+        checksum = cls()
+        checksum.add(memoryview(buffer).cast("B")[start:end])
+        return checksum
+
+    @property
+    def state(self) -> Tuple[int, int]:
+        """The (high, low) state, suitable for passing to `quick_crc` as `initial_state`."""
+        return (self._total >> 32) & 0xFFFFFFFF, self._total & 0xFFFFFFFF
+
+    @property
+    def value(self) -> int:
+        """The finalized checksum value."""
+        return _finalize(*self.state)
+
+    def add(self, data):
+        """Accumulates the words in `data`."""
+        self._total = (self._total + sum(_iter_words(data))) & 0xFFFFFFFFFFFFFFFF
+
+    def replace(self, old: int, new: int):
+        """Updates the state to reflect a single 32-bit word changing from `old` to `new`."""
+        self._total = (self._total - old + new) & 0xFFFFFFFFFFFFFFFF
+
+    def replace_bytes(self, old, new):
+        """Updates the state to reflect the word-aligned span `old` being replaced with `new`."""
+        delta = sum(_iter_words(new)) - sum(_iter_words(old))
+        self._total = (self._total + delta) & 0xFFFFFFFFFFFFFFFF
+
+
+def batch_region_checksums(dumps, start: int, end: int):
+    """Computes the XBOX checksum of dumps[:, start:end] for every row of an (N, M) uint8 array at once.
+
+    `start` and `end` must be word aligned. Returns an (N,) uint32 array. Requires NumPy.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
 
-    high = initial_state[0]
-    low = initial_state[1]
+    if start & 0x03 or end & 0x03:
+        raise ValueError("Checksum regions must be word aligned")
 
-    for i in range(len(data) // 4):
-        start = i * 4
-        val = struct.unpack("<L", data[start : start + 4])[0]
-        sum = (high << 32) + low
+    dumps = np.ascontiguousarray(dumps, dtype=np.uint8)
+    words = dumps.view("<u4")[:, start // 4 : end // 4]
+    return batch_finalize(words.sum(axis=1, dtype=np.uint64))
 
-        high = ((sum + val) >> 32) & 0xFFFFFFFF
-        low = (low + val) & 0xFFFFFFFF
 
-    value = ~((high + low) & 0xFFFFFFFF)
-    if value < 0:
-        value += 1 << 32
+def batch_finalize(totals):
+    """Converts an array of 64-bit word sums (mod 2**64) into uint32 checksum values. Requires NumPy."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
 
-    return value, (high, low)
+    high = totals >> np.uint64(32)
+    low = totals & np.uint64(0xFFFFFFFF)
+    return (~(high + low) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
@@ -52,17 +52,25 @@ Based on XKEEPROM from https://github.com/mborgerson/xbeeprom:
 """
 
 import binascii
+import concurrent.futures
 import ctypes
 import enum
+import itertools
 import logging
+import mmap
 import struct
 import sys
+import threading
 from typing import Any
+from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
+from typing import Union
 
+from . import backend
+from . import cache
 from . import crc
-from . import rc4
-from . import sha1
 
 logger = logging.getLogger(__name__)
 
@@ -76,6 +84,15 @@ ONLINEKEY_SIZE = 0x010
 DVDREGION_SIZE = 0x001
 VIDEOSTANDARD_SIZE = 0x004
 
+# Byte ranges covered by the HMAC/RC4 encryption and each of the checksums.
+HEADER_RANGE = (0x00, 0x30)
+SECRET_RANGE = (0x14, 0x30)
+# Checksum2 covers all 44 factory bytes after it, as in XKEEPROM. Releases before 0x34-0x5F was summed as a single
+# region skipped the partial words at 0x44-0x47 (the end of MACAddress and UNKNOWN2), so dumps where those bytes are
+# nonzero now get a different (correct) Checksum2.
+CHECKSUM2_RANGE = (0x34, 0x60)
+CHECKSUM3_RANGE = (0x64, 0xC0)
+
 
 class XBOX_VERSION(enum.IntEnum):
     V_NONE = 0x00
@@ -115,6 +132,19 @@ class AudioMode(enum.Enum):
     MONO = 3
 
 
+# Names of the XBOX versions and audio modes, as accepted on the command line and by the service.
+VERSIONS_BY_NAME = {
+    "1.0": XBOX_VERSION.V1_0,
+    "1.1": XBOX_VERSION.V1_1,
+    "1.6": XBOX_VERSION.V1_6,
+}
+AUDIO_MODES_BY_NAME = {
+    "mono": AudioMode.MONO,
+    "stereo": AudioMode.STEREO,
+    "surround": AudioMode.SURROUND,
+}
+
+
 class VideoSettings(ctypes.LittleEndianStructure):
     """Fields within the VideoFlags"""
 
@@ -170,6 +200,104 @@ class AudioSettings(ctypes.LittleEndianStructure):
         return "\n".join(elements)
 
 
+# The versions that can be detected by EEPROMData.decrypt.
+DECRYPT_VERSIONS = (XBOX_VERSION.V1_0, XBOX_VERSION.V1_1, XBOX_VERSION.V1_6)
+
+
+def _try_decrypt(
+    crypto: backend.CryptoBackend, header: bytes, xbox_version: int
+) -> Optional[bytes]:
+    """Attempts to decrypt the secrets in the given encrypted header, returning None if `xbox_version` is wrong."""
+    hmac_sha_bytes = header[:20]
+    key_hash = crypto.xbox_hmac_sha1(xbox_version, hmac_sha_bytes)
+
+    # A single keystream covers the Confounder, HDDKey, and XBERegion.
+    decrypted_secrets = crypto.rc4(key_hash, header[slice(*SECRET_RANGE)])
+
+    # re-create data_hash from decrypted data
+    confirm_hash = crypto.xbox_hmac_sha1(xbox_version, decrypted_secrets)
+    if confirm_hash != hmac_sha_bytes:
+        return None
+    return decrypted_secrets
+
+
+class VersionProbe:
+    """Chooses the order in which EEPROMData.decrypt tries each XBOX version, and counts the attempts.
+
+    Policies:
+      fixed: Always V1_0, V1_1, V1_6.
+      most_recent: The most recently successful version first.
+      frequency: The versions that have succeeded most often first. `fleet_counts` may seed the number of
+        successes per version, e.g., from statistics about the units being processed.
+    """
+
+    POLICIES = ("fixed", "most_recent", "frequency")
+
+    def __init__(
+        self,
+        policy: str = "most_recent",
+        fleet_counts: Optional[Dict[XBOX_VERSION, int]] = None,
+    ):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown probe policy '{policy}'")
+        self.policy = policy
+        self._fleet_counts = dict(fleet_counts or {})
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Resets the learned ordering and the attempt counts."""
+        with self._lock:
+            self._recent = list(DECRYPT_VERSIONS)
+            self._attempts = {version: 0 for version in DECRYPT_VERSIONS}
+            self._successes = {
+                version: self._fleet_counts.get(version, 0)
+                for version in DECRYPT_VERSIONS
+            }
+
+    def order(self, version_hint: Optional[XBOX_VERSION] = None) -> List[XBOX_VERSION]:
+        """Returns the versions to try, in order."""
+        with self._lock:
+            if self.policy == "most_recent":
+                ret = list(self._recent)
+            elif self.policy == "frequency":
+                ret = sorted(
+                    DECRYPT_VERSIONS, key=lambda version: -self._successes[version]
+                )
+            else:
+                ret = list(DECRYPT_VERSIONS)
+
+        if version_hint in ret:
+            ret.remove(version_hint)
+            ret.insert(0, XBOX_VERSION(version_hint))
+        return ret
+
+    def record(self, version: XBOX_VERSION, success: bool):
+        """Records the outcome of trying to decrypt with `version`."""
+        with self._lock:
+            self._attempts[version] += 1
+            if success:
+                self._successes[version] += 1
+                self._recent.remove(version)
+                self._recent.insert(0, version)
+
+    def counts(self) -> Dict[XBOX_VERSION, Dict[str, int]]:
+        """Returns the number of attempts and successes for each version."""
+        with self._lock:
+            return {
+                version: {
+                    "attempts": self._attempts[version],
+                    "successes": self._successes[version]
+                    - self._fleet_counts.get(version, 0),
+                }
+                for version in DECRYPT_VERSIONS
+            }
+
+
+# Process-wide probe ordering used by EEPROMData.decrypt by default.
+VERSION_PROBE = VersionProbe()
+
+
 class EEPROMData(ctypes.LittleEndianStructure):
     _pack_ = 1
 
@@ -238,10 +366,31 @@ class EEPROMData(ctypes.LittleEndianStructure):
         ("UNKNOWN6", ctypes.c_uint8 * 64),  # 0xC0 - 0xFF Unknown Codes / History ?
     ]
 
+    # Instances created via `from_buffer_copy` bypass __init__.
+    _encrypted = True
+
+    # State captured by `decrypt` so that `encrypt` can skip work for unmodified regions.
+    _decrypted_version: Optional[XBOX_VERSION] = None
+    _encrypted_header: Optional[bytes] = None
+    _clean_data: Optional[bytes] = None
+
+    # The CryptoBackend used by this instance; the default backend is used if None.
+    _crypto_backend: Optional[backend.CryptoBackend] = None
+
     def __init__(self, *args: Any, **kw: Any):
         self._encrypted = True
         super().__init__(*args, **kw)
 
+    @property
+    def crypto_backend(self) -> backend.CryptoBackend:
+        if self._crypto_backend:
+            return self._crypto_backend
+        return backend.get_backend()
+
+    @crypto_backend.setter
+    def crypto_backend(self, value: Optional[backend.CryptoBackend]):
+        self._crypto_backend = value
+
     @property
     def audio_mode(self):
         audio = AudioSettings(self.AudioFlags)
@@ -291,121 +440,180 @@ class EEPROMData(ctypes.LittleEndianStructure):
     def _update_audio_flags(self, audio_settings: AudioSettings):
         self.AudioFlags = struct.unpack("<L", bytearray(audio_settings))[0]
 
-    def decrypt(self) -> Optional[XBOX_VERSION]:
-        """Decrypt EEPROM using auto-detect by means of the SHA1 Middle Message hack."""
-        xbox_version = XBOX_VERSION.V1_0
-        raw_data = bytearray(self)
-        hmac_sha_bytes = bytearray(self.HMAC_SHA1_Hash)
-
-        while xbox_version < 13:
-            hasher = sha1.SHA1()
-
-            key_hash = hasher.xbox_hmac_sha1(xbox_version, raw_data[:20])
+    def decrypt(
+        self,
+        version_hint: Optional[XBOX_VERSION] = None,
+        probe: Optional["VersionProbe"] = None,
+        executor: Optional[concurrent.futures.Executor] = None,
+    ) -> Optional[XBOX_VERSION]:
+        """Decrypt EEPROM using auto-detect by means of the SHA1 Middle Message hack.
+
+        Versions are tried in the order chosen by `probe` (the process-wide VERSION_PROBE by default), starting with
+        `version_hint` if one is given. If an `executor` is given, all candidate versions are evaluated concurrently
+        on it.
+        """
+        if probe is None:
+            probe = VERSION_PROBE
+        header = bytes(self)[slice(*HEADER_RANGE)]
+        crypto = self.crypto_backend
+        candidates = probe.order(version_hint)
+
+        if executor:
+            results = list(
+                executor.map(
+                    _try_decrypt,
+                    itertools.repeat(crypto),
+                    itertools.repeat(header),
+                    candidates,
+                )
+            )
+        else:
+            results = []
+            for xbox_version in candidates:
+                results.append(_try_decrypt(crypto, header, xbox_version))
+                if results[-1] is not None:
+                    break
+
+        for xbox_version, decrypted_secrets in zip(candidates, results):
+            probe.record(xbox_version, decrypted_secrets is not None)
+        for xbox_version, decrypted_secrets in zip(candidates, results):
+            if decrypted_secrets is not None:
+                return self.apply_decrypted_secrets(xbox_version, decrypted_secrets)
+        raise Exception("Failed to decrypt EEPROM")
 
-            rc4_key = rc4.RC4(key_hash)
-            decrypted_confounder = rc4_key.apply(bytearray(self.Confounder))
-            decrypted_hdd_key = rc4_key.apply(bytearray(self.HDDKey))
-            decrypted_region = struct.unpack(
-                "<L", rc4_key.apply(struct.pack("<L", self.XBERegion))
-            )[0]
+    def apply_decrypted_secrets(
+        self, xbox_version: int, secrets: bytes
+    ) -> XBOX_VERSION:
+        """Completes decryption using previously decrypted Confounder, HDDKey, and XBERegion contents.
 
-            # re-create data_hash from decrypted data
-            confirm_hash = self._build_hmac_sha(
-                xbox_version, decrypted_confounder, decrypted_hdd_key, decrypted_region
-            )
+        `secrets` must be the decryption of this instance's current (encrypted) header, e.g., as returned from
+        `decrypted_secrets()` on an EEPROM with the same header.
+        """
+        self._encrypted_header = bytes(self)[slice(*HEADER_RANGE)]
+        self._encrypted = False
+        self._store_secrets(secrets)
 
-            if confirm_hash == hmac_sha_bytes:
-                self._encrypted = False
-                self.Confounder = self._CONFOUNDER_TYPE.from_buffer(
-                    decrypted_confounder
-                )
-                self.HDDKey = self._HDDKEY_TYPE.from_buffer(decrypted_hdd_key)
-                self.XBERegion = decrypted_region
-                return XBOX_VERSION(xbox_version)
+        self._decrypted_version = XBOX_VERSION(xbox_version)
+        self.mark_clean()
+        return self._decrypted_version
 
-            xbox_version += 1
-        raise Exception("Failed to decrypt EEPROM")
+    def encrypted_header(self) -> bytes:
+        """Returns the encrypted header as it was prior to decryption."""
+        if self._encrypted:
+            return bytes(self)[slice(*HEADER_RANGE)]
+        return self._encrypted_header
 
-    def _build_hmac_sha(self, xbox_version, confounder, hddkey, xberegion):
-        hasher = sha1.SHA1()
-        ret = hasher.xbox_hmac_sha1(
-            xbox_version,
-            bytearray(confounder),
-            bytearray(hddkey),
-            struct.pack("<L", xberegion),
-        )
-        return ret
+    def decrypted_secrets(self) -> bytes:
+        """Returns the decrypted Confounder, HDDKey, and XBERegion."""
+        if self._encrypted:
+            raise Exception("EEPROM has not been decrypted")
+        return bytes(self)[slice(*SECRET_RANGE)]
+
+    def _build_hmac_sha(self, xbox_version, secrets):
+        """Computes the HMAC over the decrypted Confounder, HDDKey, and XBERegion."""
+        return self.crypto_backend.xbox_hmac_sha1(xbox_version, secrets)
+
+    def _store_secrets(self, secrets: bytes):
+        """Sets the Confounder, HDDKey, and XBERegion from the contents of `secrets`."""
+        self.Confounder = self._CONFOUNDER_TYPE.from_buffer_copy(secrets, 0)
+        self.HDDKey = self._HDDKEY_TYPE.from_buffer_copy(secrets, CONFOUNDER_SIZE)
+        self.XBERegion = struct.unpack_from(
+            "<L", secrets, CONFOUNDER_SIZE + HDDKEY_SIZE
+        )[0]
 
-    def encrypt(self, xbox_version: XBOX_VERSION) -> bytearray:
+    def modified_ranges(self) -> List[Tuple[int, int]]:
+        """Returns the [start, end) byte ranges of the fields that were modified since decryption."""
+        if self._clean_data is None:
+            return [(0, EEPROM_SIZE)]
+
+        current = bytes(self)
+        clean = self._clean_data
+        return [
+            (start, end)
+            for start, end in _FIELD_RANGES.values()
+            if current[start:end] != clean[start:end]
+        ]
+
+    def _is_modified(self, byte_range: Tuple[int, int]) -> bool:
+        if self._clean_data is None:
+            return True
+        start, end = byte_range
+        return memoryview(self).cast("B")[start:end] != self._clean_data[start:end]
+
+    def encrypt(self, xbox_version: XBOX_VERSION, full: bool = False) -> bytearray:
+        """Encrypts this EEPROM in place.
+
+        Only the work needed for the regions modified since `decrypt` is performed: if the secret fields are
+        untouched and the version is unchanged, the original HMAC and ciphertext are reused, and each checksum is
+        only recomputed if its region was modified. Pass `full=True` to unconditionally regenerate everything (e.g.,
+        to repair invalid checksums in the source dump).
+        """
         if self._encrypted:
             return bytearray(self)
 
-        confounder_bytes = bytearray(self.Confounder)
-        hddkey_bytes = bytearray(self.HDDKey)
+        if (
+            full
+            or xbox_version != self._decrypted_version
+            or self._is_modified(SECRET_RANGE)
+        ):
+            self._encrypt_header(xbox_version)
+            self._update_checksums()
+        else:
+            ctypes.memmove(
+                ctypes.addressof(self),
+                self._encrypted_header,
+                len(self._encrypted_header),
+            )
+            if self._is_modified(CHECKSUM2_RANGE):
+                self._update_checksum2()
+            if self._is_modified(CHECKSUM3_RANGE):
+                self._update_checksum3()
+
+        self._encrypted = True
+        self._clean_data = None
+
+    def _encrypt_header(self, xbox_version: XBOX_VERSION):
+        secrets = bytes(self)[slice(*SECRET_RANGE)]
 
-        hmac_sha = self._build_hmac_sha(
-            xbox_version, confounder_bytes, hddkey_bytes, self.XBERegion
-        )
-        self.HMAC_SHA1_Hash = self._SHA_TYPE.from_buffer(hmac_sha)
+        hmac_sha = self._build_hmac_sha(xbox_version, secrets)
+        self.HMAC_SHA1_Hash = self._SHA_TYPE.from_buffer_copy(hmac_sha)
 
         # Calculate rc4 key initializer data from eeprom key and data_hash.
-        hasher = sha1.SHA1()
-        key_hash = hasher.xbox_hmac_sha1(xbox_version, self.HMAC_SHA1_Hash)
-
-        rc4_key = rc4.RC4(key_hash)
-        self.Confounder = self._CONFOUNDER_TYPE.from_buffer(
-            rc4_key.apply(confounder_bytes)
-        )
-        self.HDDKey = self._HDDKEY_TYPE.from_buffer(rc4_key.apply(hddkey_bytes))
-        self.XBERegion = struct.unpack(
-            "<L", rc4_key.apply(struct.pack("<L", self.XBERegion))
-        )[0]
+        key_hash = self.crypto_backend.xbox_hmac_sha1(xbox_version, hmac_sha)
 
-        self._update_checksums()
+        self._store_secrets(self.crypto_backend.rc4(key_hash, secrets))
 
-        self._encrypted = True
+    def update_settings_checksum(self):
+        """Recomputes Checksum3 without touching the (possibly still encrypted) header.
+
+        The HMAC only covers the Confounder, HDDKey, and XBERegion, so edits to the user settings beyond 0x60 only
+        need Checksum3 to be updated.
+        """
+        self._update_checksum3()
+
+    def mark_clean(self):
+        """Treats the current contents as unmodified, so that `encrypt` only redoes the work for later changes."""
+        self._clean_data = bytes(self)
 
     def _update_checksums(self):
-        def pack(val):
-            return struct.pack("<L", val)
-
-        val, state = crc.quick_crc(bytearray(self.SerialNumber))
-        val, state = crc.quick_crc(bytearray(self.MACAddress), state)
-        val, state = crc.quick_crc(bytearray(self.UNKNOWN2), state)
-        val, state = crc.quick_crc(bytearray(self.OnlineKey), state)
-        val, state = crc.quick_crc(pack(self.VideoStandard), state)
-        val, _ = crc.quick_crc(bytearray(self.UNKNOWN3), state)
-        self.Checksum2 = val
-
-        val, state = crc.quick_crc(pack(self.TimeZoneBias))
-        val, state = crc.quick_crc(pack(self.TimeZoneStdName), state)
-        val, state = crc.quick_crc(pack(self.TimeZoneDltName), state)
-        val, state = crc.quick_crc(bytearray(self.UNKNOWN4), state)
-        val, state = crc.quick_crc(pack(self.TimeZoneStdDate), state)
-        val, state = crc.quick_crc(pack(self.TimeZoneDltDate), state)
-        val, state = crc.quick_crc(bytearray(self.UNKNOWN5), state)
-        val, state = crc.quick_crc(pack(self.TimeZoneStdBias), state)
-        val, state = crc.quick_crc(pack(self.TimeZoneDltBias), state)
-        val, state = crc.quick_crc(pack(self.LanguageID), state)
-        val, state = crc.quick_crc(pack(self.VideoFlags), state)
-        val, state = crc.quick_crc(pack(self.AudioFlags), state)
-        val, state = crc.quick_crc(pack(self.ParentalControlGames), state)
-        val, state = crc.quick_crc(pack(self.ParentalControlPwd), state)
-        val, state = crc.quick_crc(pack(self.ParentalControlMovies), state)
-        val, state = crc.quick_crc(pack(self.XBOXLiveIPAddress), state)
-        val, state = crc.quick_crc(pack(self.XBOXLiveDNS), state)
-        val, state = crc.quick_crc(pack(self.XBOXLiveGateWay), state)
-        val, state = crc.quick_crc(pack(self.XBOXLiveSubNetMask), state)
-        val, state = crc.quick_crc(pack(self.OtherSettings), state)
-        val, _ = crc.quick_crc(pack(self.DVDPlaybackKitZone), state)
-        self.Checksum3 = val
+        self._update_checksum2()
+        self._update_checksum3()
+
+    def _update_checksum2(self):
+        self.Checksum2 = crc.RegionChecksum.from_buffer(self, *CHECKSUM2_RANGE).value
+
+    def _update_checksum3(self):
+        self.Checksum3 = crc.RegionChecksum.from_buffer(self, *CHECKSUM3_RANGE).value
 
     def __str__(self):
         elements = []
         elements.append(f"HMAC SHA1: {binascii.hexlify(self.HMAC_SHA1_Hash)}")
-        elements.append(f"HDD Key: {binascii.hexlify(self.HDDKey)}")
-
-        elements.append(f"Region: {XBE_REGION(self.XBERegion)}")
+        if self._encrypted:
+            elements.append("HDD Key: <encrypted>")
+            elements.append("Region: <encrypted>")
+        else:
+            elements.append(f"HDD Key: {binascii.hexlify(self.HDDKey)}")
+            elements.append(f"Region: {XBE_REGION(self.XBERegion)}")
 
         elements.append(f"Serial #: {binascii.hexlify(self.SerialNumber)}")
         elements.append(f"MAC Address: {binascii.hexlify(self.MACAddress)}")
@@ -440,40 +648,268 @@ class EEPROMData(ctypes.LittleEndianStructure):
         return "\n".join(elements)
 
 
+_FIELD_RANGES = {
+    name: (
+        getattr(EEPROMData, name).offset,
+        getattr(EEPROMData, name).offset + getattr(EEPROMData, name).size,
+    )
+    for name, *_ in EEPROMData._fields_
+}
+
+
+def _changed_span(current: bytes, other: bytes) -> Optional[Tuple[int, int]]:
+    """Returns the smallest [start, end) range covering every byte that differs between `current` and `other`."""
+    changed = [i for i, (a, b) in enumerate(zip(current, other)) if a != b]
+    if not changed:
+        return None
+    return changed[0], changed[-1] + 1
+
+
+def decrypt_buffer(
+    buffer: bytes,
+    version_hint: Optional[XBOX_VERSION] = None,
+    crypto_backend: Optional[backend.CryptoBackend] = None,
+    probe: Optional[VersionProbe] = None,
+) -> Tuple[XBOX_VERSION, bytes]:
+    """Returns the XBOX version and decrypted contents of the encrypted dump at the start of `buffer`.
+
+    `buffer` is not modified and no state is shared other than `probe`'s counters, which are updated under a lock, so
+    this may be called from many threads at once.
+    """
+    data = EEPROMData.from_buffer_copy(bytes(buffer[:EEPROM_SIZE]))
+    data.crypto_backend = crypto_backend
+    version = data.decrypt(version_hint, probe)
+    return version, bytes(data)
+
+
+def encrypt_buffer(
+    buffer: bytes,
+    xbox_version: XBOX_VERSION,
+    crypto_backend: Optional[backend.CryptoBackend] = None,
+) -> bytes:
+    """Returns the encryption of the decrypted dump at the start of `buffer`, with freshly computed checksums.
+
+    Like `decrypt_buffer`, this leaves `buffer` untouched and may be called from many threads at once.
+    """
+    data = EEPROMData.from_buffer_copy(bytes(buffer[:EEPROM_SIZE]))
+    data.crypto_backend = crypto_backend
+    data._encrypted = False
+    data.encrypt(xbox_version, full=True)
+    return bytes(data)
+
+
 class EEPROM:
     """Provides functionality to manipulate XBOX EEPROM data."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        settings_only: bool = False,
+        crypto_backend: Union[None, str, backend.CryptoBackend] = None,
+        decrypt_cache: Optional[cache.DecryptCache] = None,
+    ):
+        """Creates a new EEPROM.
+
+        If `settings_only` is True, encrypted dumps are not decrypted when read. Only the user settings (0x64 - 0xBF)
+        may then be modified, and `encrypt` will only recompute Checksum3, skipping all SHA1/RC4 work.
+
+        `crypto_backend` may be a CryptoBackend or the name of a registered backend. If None, the default backend
+        from `xk.backend` is used.
+
+        If a `decrypt_cache` is given, decryption results are looked up in and added to it.
+        """
+        if isinstance(crypto_backend, str):
+            crypto_backend = backend.get_backend(crypto_backend)
+        self._crypto_backend = crypto_backend
+        self._decrypt_cache = decrypt_cache
         self._data: Optional[EEPROMData] = None
         self._raw_data: Optional[bytes] = None
+        self._mapping: Optional[mmap.mmap] = None
+        self._mapped_offset = 0
+        self._mapped_snapshot: Optional[bytes] = None
         self._encrypted = True
         self._version = None
-
-    def read_from_bin_file(self, file: str, encrypted=True):
-        """Update the contents of this instance from the given BIN dump."""
+        self._settings_only = settings_only
+
+    def read_from_bin_file(
+        self,
+        file: str,
+        encrypted=True,
+        version_hint: Optional[XBOX_VERSION] = None,
+    ):
+        """Update the contents of this instance from the given BIN dump.
+
+        `version_hint` is tried first when detecting the XBOX version.
+        """
         with open(file, "rb") as infile:
-            self._raw_data = infile.read(EEPROM_SIZE)
-            self._data = EEPROMData.from_buffer_copy(self._raw_data)
+            self.read_from_buffer(infile.read(EEPROM_SIZE), encrypted, version_hint)
+
+    def read_from_buffer(
+        self,
+        buffer: bytes,
+        encrypted=True,
+        version_hint: Optional[XBOX_VERSION] = None,
+    ):
+        """Update the contents of this instance from the first EEPROM_SIZE bytes of `buffer`.
+
+        `version_hint` is tried first when detecting the XBOX version.
+        """
+        self.close()
+        self._raw_data = bytes(buffer[:EEPROM_SIZE])
+        self._data = EEPROMData.from_buffer_copy(self._raw_data)
+        self._data.crypto_backend = self._crypto_backend
         self._encrypted = encrypted
-        if encrypted:
-            self.decrypt()
+        self._version = None
+        if encrypted and not self._settings_only:
+            self.decrypt(version_hint)
+        else:
+            self._data._encrypted = encrypted
+            self._data.mark_clean()
+
+    def open_mapped(
+        self,
+        file: str,
+        offset: int = 0,
+        copy_on_write: bool = False,
+        encrypted=True,
+        version_hint: Optional[XBOX_VERSION] = None,
+    ):
+        """Memory maps the EEPROM located at `offset` within `file` (e.g., a full flash image) for in-place editing.
+
+        In settings-only mode, or if the dump is not encrypted, the EEPROMData sits directly on the mapping and edits
+        happen in place. Otherwise the decrypted contents are kept in a private copy so that plain text secrets never
+        reach the mapping, and `encrypt` writes back only the bytes that changed. `flush` then syncs only the pages
+        holding modified bytes.
+
+        If `copy_on_write` is True, the file is opened read-only and mapped privately: edits are visible through this
+        instance but are never written to the file.
+
+        `close` must be called to release the mapping.
+        """
+        self.close()
+        access = mmap.ACCESS_COPY if copy_on_write else mmap.ACCESS_WRITE
+        with open(file, "rb" if copy_on_write else "r+b") as infile:
+            mapping = mmap.mmap(infile.fileno(), 0, access=access)
+        if offset < 0 or offset + EEPROM_SIZE > len(mapping):
+            mapping.close()
+            raise ValueError(f"No EEPROM at offset {offset:#x} in {file}")
+
+        self._mapping = mapping
+        self._mapped_offset = offset
+        self._mapped_snapshot = self._mapped_bytes()
+        self._raw_data = None
+        if self._settings_only or not encrypted:
+            self._data = EEPROMData.from_buffer(mapping, offset)
+        else:
+            self._data = EEPROMData.from_buffer_copy(mapping, offset)
+        self._data.crypto_backend = self._crypto_backend
+        self._encrypted = encrypted
+        self._version = None
+        if encrypted and not self._settings_only:
+            self.decrypt(version_hint)
+        else:
+            self._data._encrypted = encrypted
+            self._data.mark_clean()
+
+    def _mapped_bytes(self) -> bytes:
+        return self._mapping[self._mapped_offset : self._mapped_offset + EEPROM_SIZE]
+
+    def flush(self):
+        """Writes modified bytes of a mapping opened by `open_mapped` back to the file.
+
+        Only the pages spanning the modified bytes are flushed. This is a no-op for copy-on-write mappings.
+        """
+        if not self._mapping:
+            raise Exception("EEPROM is not memory mapped")
+        span = _changed_span(self._mapped_bytes(), self._mapped_snapshot)
+        if not span:
+            return
+
+        start = self._mapped_offset + span[0]
+        end = self._mapped_offset + span[1]
+        page_start = start - start % mmap.ALLOCATIONGRANULARITY
+        self._mapping.flush(page_start, end - page_start)
+        self._mapped_snapshot = self._mapped_bytes()
+
+    def close(self):
+        """Releases the mapping opened by `open_mapped`, discarding any unflushed edits to copy-on-write mappings."""
+        if not self._mapping:
+            return
+        # The EEPROMData may hold a buffer export that prevents the mapping from being closed.
+        self._data = None
+        self._mapping.close()
+        self._mapping = None
+        self._mapped_snapshot = None
+
+    def _write_back(self, encrypted: bytearray):
+        """Copies the span of `encrypted` that differs from the mapped EEPROM into the mapping."""
+        span = _changed_span(self._mapped_bytes(), encrypted)
+        if span:
+            start, end = span
+            offset = self._mapped_offset + start
+            self._mapping[offset : offset + end - start] = encrypted[start:end]
 
     def log_info(self):
         """Dumps the EEPROMData to log output."""
-        self.decrypt()
-        logger.info(f" {self._version.name}\n{self._data}\n")
+        if not self._settings_only:
+            self.decrypt()
+        version = self._version.name if self._version else "Settings only"
+        logger.info(f" {version}\n{self._data}\n")
 
-    def decrypt(self):
+    def decrypt(self, version_hint: Optional[XBOX_VERSION] = None):
         """Decrypt EEPROM using auto-detect by means of the SHA1 Middle Message hack."""
         if not self._encrypted:
             return
-        self._version = self._data.decrypt()
+
+        header = self._data.encrypted_header()
+        cached = self._decrypt_cache.get(header) if self._decrypt_cache else None
+        if cached:
+            self._version = self._data.apply_decrypted_secrets(*cached)
+        else:
+            self._version = self._data.decrypt(version_hint)
+            if self._decrypt_cache:
+                self._decrypt_cache.put(
+                    header, self._version, self._data.decrypted_secrets()
+                )
         self._encrypted = False
 
-    def encrypt(self) -> bytearray:
-        """Encrypts the current EEPROM state and returns it in a buffer."""
+    def encrypt(self, xbox_version: Optional[XBOX_VERSION] = None) -> bytearray:
+        """Encrypts the current EEPROM state and returns it in a buffer.
+
+        `xbox_version` overrides the detected version. It is required to encrypt a dump read with `encrypted=False`.
+        In settings-only mode, a ValueError is raised if anything outside the user settings was modified.
+        """
+        if self._encrypted:
+            # The header was never decrypted, so only the settings may change; Checksum2 and the HMAC are left as is.
+            start, end = CHECKSUM3_RANGE
+            for field_start, field_end in self._data.modified_ranges():
+                if (field_start, field_end) != _FIELD_RANGES["Checksum3"] and not (
+                    start <= field_start and field_end <= end
+                ):
+                    raise ValueError(
+                        "Only the user settings may be modified in settings-only mode"
+                    )
+            self._data.update_settings_checksum()
+            return bytearray(self._data)
+
+        if xbox_version is not None:
+            self._version = XBOX_VERSION(xbox_version)
+        if self._version is None:
+            raise Exception("XBOX version is required to encrypt an unencrypted EEPROM")
         self._data.encrypt(self._version)
-        return bytearray(self._data)
+        encrypted = bytearray(self._data)
+        if self._mapping:
+            self._write_back(encrypted)
+        return encrypted
+
+    @property
+    def data(self) -> Optional[EEPROMData]:
+        """The EEPROMData of the loaded dump, decrypted unless in settings-only mode."""
+        return self._data
+
+    @property
+    def version(self) -> Optional[XBOX_VERSION]:
+        """The detected XBOX version, or None if the dump was not decrypted."""
+        return self._version
 
     @property
     def audio_mode(self):
@@ -498,3 +934,26 @@ class EEPROM:
     @dts_flag.setter
     def dts_flag(self, value):
         self._data.dts_flag = value
+
+
+# DecryptCache instances opened by this process, by directory.
+_decrypt_caches: Dict[str, cache.DecryptCache] = {}
+
+
+def create_eeprom(
+    settings_only: bool = False,
+    crypto_backend: Union[None, str, backend.CryptoBackend] = None,
+    decrypt_cache_dir: Optional[str] = None,
+) -> EEPROM:
+    """Creates an EEPROM, sharing a single DecryptCache per `decrypt_cache_dir` across this process."""
+    decrypt_cache = None
+    if decrypt_cache_dir:
+        decrypt_cache = _decrypt_caches.get(decrypt_cache_dir)
+        if not decrypt_cache:
+            decrypt_cache = cache.DecryptCache(decrypt_cache_dir)
+            _decrypt_caches[decrypt_cache_dir] = decrypt_cache
+    return EEPROM(
+        settings_only=settings_only,
+        crypto_backend=crypto_backend,
+        decrypt_cache=decrypt_cache,
+    )
@@ -0,0 +1,152 @@
+"""Parallel engine for decrypting and encrypting many EEPROM dumps.
+
+The per-dump work is done by `eeprom.decrypt_buffer` and `eeprom.encrypt_buffer`, which are reentrant: every call
+builds its own EEPROMData and SHA1/RC4 state. On free-threaded CPython builds, a thread pool therefore scales across
+cores without pickling dumps and results between processes. While the GIL is enabled, threads would take turns
+running the pure-Python crypto, so the engine falls back to a process pool. In both cases, work is handed out in
+chunks to amortize the scheduling overhead, and only a bounded number of chunks are in flight at once.
+"""
+
+import collections
+import concurrent.futures
+import itertools
+import os
+import sys
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from . import backend
+from . import eeprom
+from .eeprom import XBOX_VERSION
+
+# True when running on a free-threaded (no GIL) CPython build with the GIL disabled.
+FREE_THREADED = not getattr(sys, "_is_gil_enabled", lambda: True)()
+
+MODES = ("auto", "thread", "process")
+DEFAULT_CHUNK_SIZE = 64
+# Number of chunks submitted ahead of the results being consumed, per worker.
+_CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+def _decrypt_chunk(
+    dumps: List[bytes],
+    version_hint: Optional[XBOX_VERSION],
+    crypto_backend: backend.CryptoBackend,
+) -> List[Tuple[XBOX_VERSION, Optional[bytes]]]:
+    # A probe per chunk still learns the common version, without contending for the process-wide probe's lock.
+    probe = eeprom.VersionProbe()
+    results = []
+    for dump in dumps:
+        try:
+            results.append(
+                eeprom.decrypt_buffer(dump, version_hint, crypto_backend, probe)
+            )
+        except Exception:  # pylint: disable=broad-except
+            results.append((XBOX_VERSION.V_NONE, None))
+    return results
+
+
+def _encrypt_chunk(
+    items: List[Tuple[bytes, XBOX_VERSION]], crypto_backend: backend.CryptoBackend
+) -> List[bytes]:
+    return [
+        eeprom.encrypt_buffer(dump, version, crypto_backend) for dump, version in items
+    ]
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def map_chunks(
+    executor: concurrent.futures.Executor,
+    function,
+    items: Iterable,
+    chunk_size: int,
+    workers: int,
+    *args,
+) -> Iterator:
+    """Yields the results of function(chunk, *args) on `executor` for each `chunk_size` chunk of `items`, in order.
+
+    `function` must return a list of results for each chunk. Items are pulled from `items` only as results are
+    consumed, so that at most a few chunks per worker are in flight at once.
+    """
+    pending = collections.deque()
+    limit = workers * _CHUNKS_IN_FLIGHT_PER_WORKER
+    for chunk in _chunks(items, chunk_size):
+        pending.append(executor.submit(function, chunk, *args))
+        if len(pending) >= limit:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+class Engine:
+    """Decrypts and encrypts dumps across a pool of threads or processes."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        mode: str = "auto",
+        crypto_backend: Union[None, str, backend.CryptoBackend] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """Creates a new Engine.
+
+        `mode` is "thread", "process", or "auto", which picks threads on free-threaded builds and processes
+        otherwise. `workers` defaults to the CPU count.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown engine mode '{mode}'")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        if mode == "auto":
+            mode = "thread" if FREE_THREADED else "process"
+        if not isinstance(crypto_backend, backend.CryptoBackend):
+            crypto_backend = backend.get_backend(crypto_backend)
+
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._crypto_backend = crypto_backend
+        if mode == "thread":
+            self._executor = concurrent.futures.ThreadPoolExecutor(self.workers)
+        else:
+            self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+
+    def _map(self, function, items: Iterable, *args) -> Iterator:
+        """Yields function(chunk, *args) results for each chunk of `items`, in order."""
+        return map_chunks(
+            self._executor, function, items, self.chunk_size, self.workers, *args
+        )
+
+    def decrypt(
+        self, dumps: Iterable[bytes], version_hint: Optional[XBOX_VERSION] = None
+    ) -> Iterator[Tuple[XBOX_VERSION, Optional[bytes]]]:
+        """Yields (version, decrypted dump) for each encrypted dump, in order.
+
+        Dumps that fail to decrypt yield (XBOX_VERSION.V_NONE, None).
+        """
+        return self._map(_decrypt_chunk, dumps, version_hint, self._crypto_backend)
+
+    def encrypt(self, items: Iterable[Tuple[bytes, XBOX_VERSION]]) -> Iterator[bytes]:
+        """Yields the encryption of each (decrypted dump, version) pair, in order."""
+        return self._map(_encrypt_chunk, items, self._crypto_backend)
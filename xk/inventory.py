@@ -0,0 +1,217 @@
+"""Persistent inventory of decrypted EEPROMs for fast lookups by serial number, MAC address, version, or region.
+
+Each dump is decrypted once when it is added. Entries are keyed by file path; a file is only decrypted again if its
+size or modification time changes and its contents hash differently.
+
+The inventory holds decrypted HDD keys. Its database is created with owner-only permissions.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+
+from . import backend
+from . import cache
+from .eeprom import EEPROM_SIZE
+from .eeprom import EEPROMData
+from .eeprom import XBOX_VERSION
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    serial TEXT,
+    mac TEXT,
+    version INTEGER NOT NULL,
+    region INTEGER,
+    hdd_key TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS units_serial ON units (serial);
+CREATE INDEX IF NOT EXISTS units_mac ON units (mac);
+CREATE INDEX IF NOT EXISTS units_version ON units (version);
+CREATE INDEX IF NOT EXISTS units_region ON units (region);
+"""
+
+_COLUMNS = "path, serial, mac, version, region, hdd_key, error"
+
+
+def default_inventory_path() -> str:
+    """Returns $XK_INVENTORY, falling back to a database under the user's data directory."""
+    path = os.environ.get("XK_INVENTORY")
+    if path:
+        return path
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join("~", ".local", "share")
+    return os.path.join(os.path.expanduser(base), "pyxbeeprom", "inventory.sqlite3")
+
+
+def format_mac(mac: Union[str, bytes]) -> str:
+    """Returns the canonical "00:50:F2:01:02:03" form of a MAC address given as bytes or hex text."""
+    if isinstance(mac, str):
+        mac = bytes.fromhex(mac.replace(":", "").replace("-", ""))
+    return ":".join(f"{value:02X}" for value in mac)
+
+
+def _decode_serial(serial) -> str:
+    return bytes(serial).rstrip(b"\0").decode("ascii", errors="replace")
+
+
+class Inventory:
+    """SQLite index of decrypted EEPROM dumps."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        crypto_backend: Union[None, str, backend.CryptoBackend] = None,
+    ):
+        self.path = os.path.expanduser(path or default_inventory_path())
+        if isinstance(crypto_backend, str):
+            crypto_backend = backend.get_backend(crypto_backend)
+        self._crypto_backend = crypto_backend
+
+        cache.create_private_file(self.path)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False
+        )
+        self._connection.row_factory = sqlite3.Row
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _decrypt(self, dump: bytes) -> dict:
+        """Returns the inventory columns describing `dump`."""
+        entry = {
+            "serial": None,
+            "mac": None,
+            "version": XBOX_VERSION.V_NONE,
+            "region": None,
+            "hdd_key": None,
+            "error": None,
+        }
+        if len(dump) != EEPROM_SIZE:
+            entry["error"] = "Not an EEPROM dump"
+            return entry
+
+        data = EEPROMData.from_buffer_copy(dump)
+        data.crypto_backend = self._crypto_backend
+        entry["serial"] = _decode_serial(data.SerialNumber)
+        entry["mac"] = format_mac(bytes(data.MACAddress))
+        try:
+            entry["version"] = data.decrypt()
+        except Exception as err:  # pylint: disable=broad-except
+            entry["error"] = str(err)
+            return entry
+        entry["region"] = data.XBERegion
+        entry["hdd_key"] = bytes(data.HDDKey).hex().upper()
+        return entry
+
+    def _update_file(self, connection: sqlite3.Connection, path: str) -> Optional[dict]:
+        """Indexes `path` if it is new or changed, returning its entry, or None if it was unchanged."""
+        stat = os.stat(path)
+        row = connection.execute(
+            "SELECT mtime_ns, size, digest FROM units WHERE path = ?", (path,)
+        ).fetchone()
+        if row and row["mtime_ns"] == stat.st_mtime_ns and row["size"] == stat.st_size:
+            return None
+
+        with open(path, "rb") as infile:
+            dump = infile.read(EEPROM_SIZE)
+        digest = hashlib.sha256(dump).digest()
+        if row and row["digest"] == digest:
+            connection.execute(
+                "UPDATE units SET mtime_ns = ?, size = ? WHERE path = ?",
+                (stat.st_mtime_ns, stat.st_size, path),
+            )
+            return None
+
+        entry = self._decrypt(dump)
+        connection.execute(
+            "INSERT OR REPLACE INTO units VALUES (:path, :mtime_ns, :size, :digest, :serial, :mac, :version, "
+            ":region, :hdd_key, :error)",
+            {
+                **entry,
+                "path": path,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "digest": digest,
+                "version": int(entry["version"]),
+            },
+        )
+        return entry
+
+    def update(self, paths: Iterable[str]) -> Dict[str, int]:
+        """Adds or refreshes the given dump files, only decrypting those that are new or whose contents changed.
+
+        Returns counts of the files that were newly "indexed", "unchanged", or "failed" to decrypt. Files that cannot
+        be read are logged and counted as failed without being added, and do not prevent the others from being indexed.
+        """
+        counts = {"indexed": 0, "unchanged": 0, "failed": 0}
+        with self._lock, self._connection as connection:
+            for path in paths:
+                try:
+                    entry = self._update_file(connection, os.path.realpath(path))
+                except OSError as err:
+                    logger.warning("Failed to read %s: %s", path, err)
+                    counts["failed"] += 1
+                    continue
+                if entry is None:
+                    counts["unchanged"] += 1
+                elif entry["error"]:
+                    counts["failed"] += 1
+                else:
+                    counts["indexed"] += 1
+        return counts
+
+    def prune(self) -> int:
+        """Removes the entries for files that no longer exist, returning the number removed."""
+        with self._lock, self._connection as connection:
+            missing = [
+                (path,)
+                for (path,) in connection.execute("SELECT path FROM units")
+                if not os.path.exists(path)
+            ]
+            connection.executemany("DELETE FROM units WHERE path = ?", missing)
+        return len(missing)
+
+    def _select(self, where: str, value) -> List[dict]:
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {_COLUMNS} FROM units WHERE {where} = ? ORDER BY path",
+                (value,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def find_serial(self, serial: str) -> List[dict]:
+        """Returns the entries with the given serial number."""
+        return self._select("serial", serial)
+
+    def find_mac(self, mac: Union[str, bytes]) -> List[dict]:
+        """Returns the entries with the given MAC address, given as bytes or hex text."""
+        return self._select("mac", format_mac(mac))
+
+    def find_version(self, version: XBOX_VERSION) -> List[dict]:
+        """Returns the entries that decrypted as the given version (V_NONE for failures)."""
+        return self._select("version", int(version))
+
+    def find_region(self, region: int) -> List[dict]:
+        """Returns the entries with the given decrypted XBERegion value."""
+        return self._select("region", int(region))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM units").fetchone()[0]
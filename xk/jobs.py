@@ -0,0 +1,138 @@
+"""Helpers for resumable bulk processing.
+
+A Journal records which inputs have been processed in a compact append-only file so that an interrupted run can be
+resumed, skipping the work that was already done. Outputs written with `atomic_write` are either complete or absent,
+never half-written.
+"""
+
+import hashlib
+import os
+import stat
+import tempfile
+from typing import Set
+
+_MAGIC = b"XKJOURNAL1\n"
+_DIGEST_SIZE = 16
+DEFAULT_CHECKPOINT_INTERVAL = 1000
+
+# os.umask can only be read by setting it, which is not safe once worker threads are creating files, so read it once.
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def atomic_write(path: str, data: bytes):
+    """Writes `data` to `path` via a temporary file in the same directory that is renamed into place.
+
+    The file keeps the mode of the file it replaces, or gets the usual 0o666 less the umask if `path` is new, rather
+    than the owner-only mode of the temporary file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".xk-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as outfile:
+            os.fchmod(outfile.fileno(), mode)
+            outfile.write(data)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _digest(*values: bytes) -> bytes:
+    return hashlib.blake2b(b"\0".join(values), digest_size=_DIGEST_SIZE).digest()
+
+
+def fingerprint(*settings) -> bytes:
+    """Returns a digest identifying a job's settings (e.g., the edits being applied) by their repr()."""
+    return _digest(*(repr(setting).encode("utf-8") for setting in settings))
+
+
+class Journal:
+    """Append-only record of the inputs processed by a job.
+
+    The journal begins with the `job_fingerprint` it was created with; reopening it for a job with a different
+    fingerprint raises a ValueError, since the recorded work would not apply. Each processed input is recorded as a
+    fixed size digest of its output path and contents. Entries are buffered and written out (and fsynced) every
+    `checkpoint_interval` entries, so at most that many inputs are redone after a crash.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        job_fingerprint: bytes = b"",
+        checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+    ):
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be positive")
+
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        self._fingerprint = _digest(job_fingerprint)
+        self._completed: Set[bytes] = set()
+        self._pending = []
+
+        self._file = open(path, "a+b")  # pylint: disable=consider-using-with
+        self._file.seek(0)
+        contents = self._file.read()
+        header = _MAGIC + self._fingerprint
+        if not contents:
+            self._file.write(header)
+            self._sync()
+        elif not contents.startswith(_MAGIC):
+            self._file.close()
+            raise ValueError(f"{path} is not a job journal")
+        elif not contents.startswith(header):
+            self._file.close()
+            raise ValueError(f"{path} was created for a job with different settings")
+        else:
+            entries = memoryview(contents)[len(header) :]
+            # A partially written trailing entry from a crash is ignored and overwritten.
+            complete = len(entries) - len(entries) % _DIGEST_SIZE
+            for offset in range(0, complete, _DIGEST_SIZE):
+                self._completed.add(bytes(entries[offset : offset + _DIGEST_SIZE]))
+            self._file.truncate(len(header) + complete)
+
+    @staticmethod
+    def key(output_path: str, contents: bytes) -> bytes:
+        """Returns the journal key for processing `contents` into `output_path`."""
+        return _digest(os.fsencode(output_path), hashlib.sha256(contents).digest())
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._completed
+
+    def __len__(self) -> int:
+        return len(self._completed)
+
+    def record(self, key: bytes):
+        """Marks the input with the given key as completed."""
+        if key in self._completed:
+            return
+        self._completed.add(key)
+        self._pending.append(key)
+        if len(self._pending) >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Durably writes all recorded entries."""
+        if not self._pending:
+            return
+        self._file.write(b"".join(self._pending))
+        self._pending = []
+        self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.checkpoint()
+        self._file.close()
@@ -56,49 +56,114 @@ Based on XKRC4 from https://github.com/mborgerson/xbeeprom:
 """
 
 
+def xor_bytes(data, keystream) -> bytearray:
+    """XORs `data` with the first len(data) bytes of `keystream` in a single bulk operation."""
+    length = len(data)
+    value = int.from_bytes(data, "little") ^ int.from_bytes(
+        keystream[:length], "little"
+    )
+    return bytearray(value.to_bytes(length, "little"))
+
+
+def _schedule(key_data) -> bytearray:
+    """Runs the key-scheduling algorithm, returning the initial 256-byte state."""
+    state = bytearray(range(256))
+    key_length = len(key_data)
+
+    j = 0
+    for i in range(256):
+        value = state[i]
+        j = (j + value + key_data[i % key_length]) & 0xFF
+        state[i] = state[j]
+        state[j] = value
+    return state
+
+
+def _generate(state: bytearray, x: int, y: int, length: int):
+    """Advances `state` from position (x, y) by `length` bytes, returning (keystream, x, y)."""
+    result = bytearray(length)
+    for counter in range(length):
+        x = (x + 1) & 0xFF
+        x_value = state[x]
+        y = (y + x_value) & 0xFF
+        y_value = state[y]
+        state[x] = y_value
+        state[y] = x_value
+        result[counter] = state[(x_value + y_value) & 0xFF]
+    return result, x, y
+
+
+def crypt(key_data: bytes, data: bytes) -> bytearray:
+    """Encrypts (or decrypts) `data` with a fresh RC4 stream keyed with `key_data`.
+
+    All state is local to the call, so unlike an RC4 instance this may be used from many threads at once.
+    """
+    keystream, _, _ = _generate(_schedule(key_data), 0, 0, len(data))
+    return xor_bytes(data, keystream)
+
+
 class RC4:
-    """Provides RC4 functionality"""
+    """Provides RC4 functionality.
 
-    def __init__(self, key_data: bytes):
-        self._state = bytearray(256)
-        self._x = 0
-        self._y = 0
-        self._init_key(key_data)
+    Instances carry the stream position between calls and must not be shared between threads; see `crypt`.
+    """
 
-    def _init_key(self, key_data):
-        for i in range(256):
-            self._state[i] = i
+    def __init__(self, key_data: bytes):
+        self._state = _schedule(key_data)
         self._x = 0
         self._y = 0
 
-        index1 = 0
-        index2 = 0
-
-        for counter in range(256):
-            index2 = (key_data[index1] + self._state[counter] + index2) % 256
-            self._swap(counter, index2)
-            index1 = (index1 + 1) % len(key_data)
+    def keystream(self, length: int) -> bytearray:
+        """Returns the next `length` bytes of keystream."""
+        result, self._x, self._y = _generate(self._state, self._x, self._y, length)
+        return result
 
     def apply(self, data: bytes) -> bytearray:
         """Encrypts (or decrypts) the given bytes, returning a new bytearray."""
-        x = self._x
-        y = self._y
-
-        result = bytearray(data)
-
-        for counter in range(len(data)):
-            x = (x + 1) % 256
-            y = (self._state[x] + y) % 256
-            self._swap(x, y)
-            xor_idx = (self._state[x] + self._state[y]) % 256
-            result[counter] ^= self._state[xor_idx]
-
-        self._x = x
-        self._y = y
-
-        return result
-
-    def _swap(self, a_idx, b_idx):
-        temp = self._state[a_idx]
-        self._state[a_idx] = self._state[b_idx]
-        self._state[b_idx] = temp
+        return xor_bytes(data, self.keystream(len(data)))
+
+
+def batch_keystream(keys, length: int):
+    """Returns the first `length` keystream bytes for each row of a (K, N) uint8 array of keys as a (K, length) array.
+
+    The KSA and PRGA run for all keys at once, with each step's swaps done as gathers/scatters across the K 256-byte
+    states. Requires NumPy.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    keys = np.ascontiguousarray(keys, dtype=np.uint8)
+    count, key_length = keys.shape
+    # Index the states through a flat view so that each lane's swap is a single 1D gather/scatter.
+    state = np.tile(np.arange(256, dtype=np.uint8), count)
+    bases = np.arange(count, dtype=np.intp) * 256
+
+    j = np.zeros(count, dtype=np.intp)
+    for i in range(256):
+        x = bases + i
+        value = state[x]
+        j = (j + value + keys[:, i % key_length]) & 0xFF
+        y = bases + j
+        state[x] = state[y]
+        state[y] = value
+
+    result = np.empty((length, count), dtype=np.uint8)
+    j = np.zeros(count, dtype=np.intp)
+    for counter in range(length):
+        x = bases + ((counter + 1) & 0xFF)
+        x_value = state[x]
+        j = (j + x_value) & 0xFF
+        y = bases + j
+        y_value = state[y]
+        state[x] = y_value
+        state[y] = x_value
+        result[counter] = state[bases + ((x_value + y_value.astype(np.intp)) & 0xFF)]
+
+    return result.T.copy()
+
+
+def batch_apply(keys, data):
+    """Encrypts (or decrypts) each row of a (K, L) uint8 array with the matching row of `keys`. Requires NumPy."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    data = np.asarray(data, dtype=np.uint8)
+    return data ^ batch_keystream(keys, data.shape[1])
@@ -0,0 +1,162 @@
+"""Locates EEPROMs inside large raw images (e.g., full flash or HDD images).
+
+Every candidate offset is filtered in stages of increasing cost:
+  1. Checksum plausibility: Checksum2 and Checksum3 are verified for all offsets at once using prefix sums of the
+     image's little-endian words.
+  2. Field sanity: VideoStandard must be a known standard.
+  3. Decryption: the HMAC must be confirmed by EEPROMData.decrypt, and the decrypted XBERegion must be a known region.
+
+Images are memory mapped and processed in fixed size chunks, optionally across a pool of worker processes, so memory
+use does not grow with the size of the image.
+
+Requires numpy.
+"""
+
+import concurrent.futures
+import math
+import mmap
+import os
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from . import crc
+from . import eeprom
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+_WORDS = eeprom.EEPROM_SIZE // 4
+_CHECKSUM2_WORD = eeprom.EEPROMData.Checksum2.offset // 4
+_CHECKSUM3_WORD = eeprom.EEPROMData.Checksum3.offset // 4
+_VIDEO_STANDARD_WORD = eeprom.EEPROMData.VideoStandard.offset // 4
+
+_VIDEO_STANDARDS = [
+    standard.value
+    for standard in eeprom.VIDEO_STANDARD
+    if standard != eeprom.VIDEO_STANDARD.VID_INVALID
+]
+_XBE_REGIONS = {
+    region.value
+    for region in eeprom.XBE_REGION
+    if region != eeprom.XBE_REGION.XBE_INVALID
+}
+
+
+def _region_checksums(prefix: np.ndarray, count: int, region: Tuple[int, int]):
+    start, end = region[0] // 4, region[1] // 4
+    return crc.batch_finalize(prefix[end : end + count] - prefix[start : start + count])
+
+
+def _plausible_offsets(
+    buffer, phase: int, base_offset: int, alignment: int
+) -> np.ndarray:
+    """Returns the offsets (relative to `buffer`) congruent to `phase` mod 4 that pass stages 1 and 2."""
+    words = np.frombuffer(
+        buffer, dtype="<u4", count=(len(buffer) - phase) // 4, offset=phase
+    )
+    count = len(words) - _WORDS + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    # prefix[i] is the sum of the first i words; uint64 wraps, which matches quick_crc's 64-bit accumulator.
+    prefix = np.zeros(len(words) + 1, dtype=np.uint64)
+    np.cumsum(words, dtype=np.uint64, out=prefix[1:])
+
+    plausible = (
+        words[_CHECKSUM2_WORD : _CHECKSUM2_WORD + count]
+        == _region_checksums(prefix, count, eeprom.CHECKSUM2_RANGE)
+    ) & (
+        words[_CHECKSUM3_WORD : _CHECKSUM3_WORD + count]
+        == _region_checksums(prefix, count, eeprom.CHECKSUM3_RANGE)
+    )
+    indices = np.flatnonzero(plausible)
+    indices = indices[np.isin(words[indices + _VIDEO_STANDARD_WORD], _VIDEO_STANDARDS)]
+
+    offsets = phase + indices * 4
+    return offsets[(base_offset + offsets) % alignment == 0]
+
+
+def scan_buffer(
+    buffer, base_offset: int = 0, alignment: int = 4, limit: Optional[int] = None
+) -> List[Tuple[int, eeprom.XBOX_VERSION]]:
+    """Returns (offset, version) for each EEPROM found in `buffer`, in order of offset.
+
+    Offsets are reported relative to `base_offset`, the position of `buffer` within its image; only offsets that are
+    multiples of `alignment` are considered. If `limit` is given, only EEPROMs starting before `limit` are reported.
+    """
+    if limit is None:
+        limit = len(buffer)
+    step = math.gcd(alignment, 4)
+    candidates = np.sort(
+        np.concatenate(
+            [
+                _plausible_offsets(buffer, phase, base_offset, alignment)
+                for phase in range(4)
+                if (base_offset + phase) % step == 0
+            ]
+        )
+    )
+
+    ret = []
+    for offset in candidates[candidates < limit].tolist():
+        data = eeprom.EEPROMData.from_buffer_copy(buffer, offset)
+        try:
+            version = data.decrypt()
+        except Exception:  # pylint: disable=broad-except
+            continue
+        if data.XBERegion in _XBE_REGIONS:
+            ret.append((base_offset + offset, version))
+    return ret
+
+
+def _scan_chunk(job) -> List[Tuple[int, eeprom.XBOX_VERSION]]:
+    """Worker that maps and scans the EEPROMs starting within [start, start + length) of a file."""
+    path, start, length, alignment = job
+    with open(path, "rb") as infile:
+        size = os.fstat(infile.fileno()).st_size
+        # The mapping must begin on an allocation boundary; chunks overlap by one EEPROM so that none are missed.
+        map_start = start - start % mmap.ALLOCATIONGRANULARITY
+        map_end = min(size, start + length + eeprom.EEPROM_SIZE - 1)
+        with mmap.mmap(
+            infile.fileno(),
+            map_end - map_start,
+            access=mmap.ACCESS_READ,
+            offset=map_start,
+        ) as mapping:
+            view = memoryview(mapping)[start - map_start :]
+            try:
+                return scan_buffer(view, start, alignment, limit=length)
+            finally:
+                view.release()
+
+
+def scan_file(
+    path: str,
+    alignment: int = 4,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    jobs: int = 1,
+) -> Iterator[Tuple[int, eeprom.XBOX_VERSION]]:
+    """Yields (offset, version) for each EEPROM found in the image at `path`, in order of offset.
+
+    The image is scanned in `chunk_size` byte chunks, across `jobs` worker processes if greater than 1.
+    """
+    if alignment < 1 or chunk_size < 1:
+        raise ValueError("alignment and chunk_size must be positive")
+
+    size = os.path.getsize(path)
+    scan_jobs = [
+        (path, start, min(chunk_size, size - start), alignment)
+        for start in range(0, max(size - eeprom.EEPROM_SIZE + 1, 0), chunk_size)
+    ]
+
+    if jobs == 1:
+        for matches in map(_scan_chunk, scan_jobs):
+            yield from matches
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        for matches in executor.map(_scan_chunk, scan_jobs):
+            yield from matches
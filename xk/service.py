@@ -0,0 +1,498 @@
+"""Long-running EEPROM service.
+
+Serves decrypt, inspect, edit, and encrypt requests over HTTP/1.1 on a Unix domain socket or a loopback TCP port,
+so that callers pay for interpreter startup, imports, and cache warm-up once rather than on every invocation. The
+event loop only parses requests; the SHA1/RC4 work runs in a bounded pool of worker processes, and requests beyond
+`max_pending` are rejected with 503 rather than queued without limit.
+
+Requests are POSTed to /decrypt, /inspect, /edit, or /encrypt with a JSON object body:
+
+* "eeprom": the 256 byte dump, base64 encoded (decrypted for /encrypt, encrypted otherwise).
+* "version_hint": optional XBOX version ("1.0", "1.1", or "1.6") to try first when decrypting.
+* "settings_only": optional; if true, /inspect and /edit skip decryption as with `EEPROM(settings_only=True)`.
+* "edits": for /edit, any of {"audio_mode": "mono"|"stereo"|"surround", "dts_flag": bool, "dolby_digital_flag": bool}.
+* "version": for /encrypt, the XBOX version to encrypt with.
+
+Responses are JSON objects; failures carry an "error" message. GET /metrics returns per-operation request latency
+histograms in the Prometheus text format.
+
+Decrypted dumps and HDD keys are returned to any client that can connect. Unix sockets are created with owner-only
+permissions, and TCP listeners are always bound to the loopback interface.
+"""
+
+import asyncio
+import base64
+import binascii
+import bisect
+import concurrent.futures
+import http
+import json
+import logging
+import os
+import signal
+import stat
+import time
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from .eeprom import AUDIO_MODES_BY_NAME
+from .eeprom import EEPROM
+from .eeprom import EEPROM_SIZE
+from .eeprom import VERSIONS_BY_NAME
+from .eeprom import XBE_REGION
+from .eeprom import XBOX_VERSION
+from .eeprom import VIDEO_STANDARD
+from .eeprom import create_eeprom
+from .inventory import format_mac
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ("decrypt", "inspect", "edit", "encrypt")
+DEFAULT_PENDING_PER_WORKER = 4
+MAX_BODY_SIZE = 64 * 1024
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+_VERSION_NAMES = {version: name for name, version in VERSIONS_BY_NAME.items()}
+_AUDIO_MODE_NAMES = {mode: name for name, mode in AUDIO_MODES_BY_NAME.items()}
+
+
+def default_socket_path() -> str:
+    """Returns $XK_SERVICE_SOCKET, falling back to a socket under $XDG_RUNTIME_DIR or the temporary directory."""
+    path = os.environ.get("XK_SERVICE_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "pyxbeeprom.sock")
+    return os.path.join("/tmp", f"pyxbeeprom-{os.getuid()}.sock")
+
+
+class LatencyHistogram:
+    """Counts observed latencies into the fixed LATENCY_BUCKETS."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Returns (upper bound, number of observations <= bound) pairs, ending with an infinite bound."""
+        result = []
+        running = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+
+def _parse_version(request: dict, name: str) -> Optional[XBOX_VERSION]:
+    value = request.get(name)
+    if value is None:
+        return None
+    if value not in VERSIONS_BY_NAME:
+        raise ValueError(f"Invalid {name}: {value!r}")
+    return VERSIONS_BY_NAME[value]
+
+
+def _parse_edits(request: dict) -> dict:
+    edits = request.get("edits") or {}
+    if not isinstance(edits, dict):
+        raise ValueError("edits must be an object")
+    parsed = {}
+    for name, value in edits.items():
+        if name == "audio_mode":
+            if value not in AUDIO_MODES_BY_NAME:
+                raise ValueError(f"Invalid audio_mode: {value!r}")
+            parsed[name] = AUDIO_MODES_BY_NAME[value]
+        elif name in ("dts_flag", "dolby_digital_flag"):
+            if not isinstance(value, bool):
+                raise ValueError(f"{name} must be a boolean")
+            parsed[name] = value
+        else:
+            raise ValueError(f"Unsupported edit: {name!r}")
+    return parsed
+
+
+def _decode_dump(request: dict) -> bytes:
+    try:
+        dump = base64.b64decode(request["eeprom"], validate=True)
+    except (KeyError, TypeError, binascii.Error) as err:
+        raise ValueError("eeprom must be a base64 encoded dump") from err
+    if len(dump) != EEPROM_SIZE:
+        raise ValueError(f"eeprom must be {EEPROM_SIZE} bytes, not {len(dump)}")
+    return dump
+
+
+def _encode_dump(dump: bytes) -> str:
+    return base64.b64encode(bytes(dump)).decode("ascii")
+
+
+def _describe(eeprom: EEPROM) -> dict:
+    data = eeprom.data
+    try:
+        video_standard = VIDEO_STANDARD(data.VideoStandard).name
+    except ValueError:
+        video_standard = hex(data.VideoStandard)
+    serial = bytes(data.SerialNumber).rstrip(b"\0")
+    result = {
+        "version": _VERSION_NAMES.get(eeprom.version),
+        "serial": serial.decode("ascii", errors="replace"),
+        "mac": format_mac(bytes(data.MACAddress)),
+        "video_standard": video_standard,
+        "audio_mode": _AUDIO_MODE_NAMES[data.audio_mode],
+        "dolby_digital_flag": bool(data.dolby_digital_flag),
+        "dts_flag": bool(data.dts_flag),
+    }
+    if eeprom.version is not None:
+        try:
+            result["region"] = XBE_REGION(data.XBERegion).name
+        except ValueError:
+            result["region"] = hex(data.XBERegion)
+        result["hdd_key"] = bytes(data.HDDKey).hex().upper()
+    return result
+
+
+def execute(operation: str, request: dict, options: Optional[dict] = None) -> dict:
+    """Performs a single service operation, returning its JSON response.
+
+    This is the function run in the worker processes; it raises ValueError for malformed requests and Exception if
+    the dump cannot be decrypted. `options` may name a "crypto_backend" and a "decrypt_cache" directory.
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unsupported operation: {operation!r}")
+    dump = _decode_dump(request)
+    edits = _parse_edits(request) if operation == "edit" else {}
+    settings_only = operation in ("inspect", "edit") and bool(
+        request.get("settings_only")
+    )
+    options = options or {}
+    eeprom = create_eeprom(
+        settings_only, options.get("crypto_backend"), options.get("decrypt_cache")
+    )
+
+    if operation == "encrypt":
+        version = _parse_version(request, "version")
+        if version is None:
+            raise ValueError("version is required")
+        eeprom.read_from_buffer(dump, encrypted=False)
+        return {"eeprom": _encode_dump(eeprom.encrypt(version))}
+
+    eeprom.read_from_buffer(dump, version_hint=_parse_version(request, "version_hint"))
+    if operation == "inspect":
+        return _describe(eeprom)
+    if operation == "decrypt":
+        return {
+            "version": _VERSION_NAMES[eeprom.version],
+            "eeprom": _encode_dump(eeprom.data),
+        }
+
+    for name, value in edits.items():
+        setattr(eeprom, name, value)
+    return {
+        "version": _VERSION_NAMES.get(eeprom.version),
+        "eeprom": _encode_dump(eeprom.encrypt()),
+    }
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: http.HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Service:
+    """Asynchronous HTTP front end that runs EEPROM operations in a pool of worker processes."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        crypto_backend: Optional[str] = None,
+        decrypt_cache: Optional[str] = None,
+        executor: Optional[concurrent.futures.Executor] = None,
+    ):
+        """Creates a new Service.
+
+        `workers` bounds the worker processes (defaulting to the CPU count), and `max_pending` the number of
+        operations submitted to them at once (defaulting to DEFAULT_PENDING_PER_WORKER per worker). An `executor` may
+        be given instead of having the service create a process pool; it is not shut down by `close`.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * DEFAULT_PENDING_PER_WORKER
+        self._options = {
+            "crypto_backend": crypto_backend,
+            "decrypt_cache": decrypt_cache,
+        }
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._pending = 0
+        self._servers: List[asyncio.AbstractServer] = []
+        self._socket_paths: List[str] = []
+        self.histograms = {operation: LatencyHistogram() for operation in OPERATIONS}
+        self.errors = {operation: 0 for operation in OPERATIONS}
+        self.rejected = 0
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers
+            )
+        return self._executor
+
+    async def start_unix(self, path: Optional[str] = None) -> str:
+        """Starts listening on a Unix domain socket, replacing a stale socket file, and returns its path."""
+        path = os.path.expanduser(path or default_socket_path())
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+        # Create the socket with owner-only permissions: responses contain decrypted secrets.
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle_connection, path)
+        finally:
+            os.umask(umask)
+        self._servers.append(server)
+        self._socket_paths.append(path)
+        return path
+
+    async def start_tcp(self, port: int = 0) -> int:
+        """Starts listening on the given loopback TCP port (0 picks a free port) and returns the port."""
+        server = await asyncio.start_server(self._handle_connection, "127.0.0.1", port)
+        self._servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stops listening, waits for the servers to close, and shuts down the worker pool."""
+        for server in self._servers:
+            server.close()
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers = []
+        for path in self._socket_paths:
+            if os.path.exists(path):
+                os.unlink(path)
+        self._socket_paths = []
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def _run(self, operation: str, request: dict) -> dict:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise _HTTPError(http.HTTPStatus.SERVICE_UNAVAILABLE, "Service is busy")
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), execute, operation, request, self._options
+            )
+        except ValueError as err:
+            raise _HTTPError(http.HTTPStatus.BAD_REQUEST, str(err)) from err
+        except concurrent.futures.BrokenExecutor as err:
+            raise _HTTPError(http.HTTPStatus.INTERNAL_SERVER_ERROR, str(err)) from err
+        except Exception as err:  # pylint: disable=broad-except
+            raise _HTTPError(http.HTTPStatus.UNPROCESSABLE_ENTITY, str(err)) from err
+        finally:
+            self._pending -= 1
+
+    async def _dispatch(
+        self, method: str, target: str, body: bytes
+    ) -> Tuple[http.HTTPStatus, str, bytes]:
+        """Returns the status, content type, and body of the response to a request."""
+        path = target.split("?", 1)[0]
+        if path == "/metrics":
+            if method != "GET":
+                raise _HTTPError(http.HTTPStatus.METHOD_NOT_ALLOWED, "Use GET")
+            return (
+                http.HTTPStatus.OK,
+                "text/plain; version=0.0.4",
+                self.metrics().encode("utf-8"),
+            )
+
+        operation = path.lstrip("/")
+        if operation not in OPERATIONS:
+            raise _HTTPError(http.HTTPStatus.NOT_FOUND, f"Unknown path: {path}")
+        if method != "POST":
+            raise _HTTPError(http.HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+        try:
+            request = json.loads(body)
+        except ValueError as err:
+            raise _HTTPError(
+                http.HTTPStatus.BAD_REQUEST, "Body must be a JSON object"
+            ) from err
+        if not isinstance(request, dict):
+            raise _HTTPError(http.HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+
+        start = time.perf_counter()
+        try:
+            response = await self._run(operation, request)
+        except _HTTPError:
+            self.errors[operation] += 1
+            raise
+        finally:
+            self.histograms[operation].observe(time.perf_counter() - start)
+        return (
+            http.HTTPStatus.OK,
+            "application/json",
+            json.dumps(response).encode("utf-8"),
+        )
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """Reads a request, returning (method, target, headers, body), or None at the end of the connection."""
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split()
+        except ValueError as err:
+            raise _HTTPError(
+                http.HTTPStatus.BAD_REQUEST, "Malformed request line"
+            ) from err
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError as err:
+            raise _HTTPError(
+                http.HTTPStatus.BAD_REQUEST, "Invalid Content-Length"
+            ) from err
+        if length < 0 or length > MAX_BODY_SIZE:
+            raise _HTTPError(
+                http.HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body is too large"
+            )
+        body = await reader.readexactly(length)
+        return method, target, headers, body
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Serves requests on a persistent connection until the client closes it."""
+        try:
+            while True:
+                request = None
+                keep_alive = True
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    status, content_type, payload = await self._dispatch(
+                        method, target, body
+                    )
+                except _HTTPError as err:
+                    status = err.status
+                    content_type = "application/json"
+                    payload = json.dumps({"error": str(err)}).encode("utf-8")
+                    # The rest of a malformed request cannot be skipped reliably.
+                    keep_alive = keep_alive and request is not None
+
+                head = (
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                )
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                writer.write(head.encode("latin-1") + b"\r\n" + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def metrics(self) -> str:
+        """Returns the request counters and latency histograms in the Prometheus text format."""
+        lines = [
+            "# HELP xk_request_duration_seconds Time taken to serve EEPROM requests.",
+            "# TYPE xk_request_duration_seconds histogram",
+        ]
+        for operation, histogram in self.histograms.items():
+            for bound, count in histogram.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f'xk_request_duration_seconds_bucket{{op="{operation}",le="{le}"}} {count}'
+                )
+            lines.append(
+                f'xk_request_duration_seconds_sum{{op="{operation}"}} {histogram.total!r}'
+            )
+            lines.append(
+                f'xk_request_duration_seconds_count{{op="{operation}"}} {histogram.count}'
+            )
+
+        lines.append("# HELP xk_request_errors_total Requests that failed.")
+        lines.append("# TYPE xk_request_errors_total counter")
+        for operation, count in self.errors.items():
+            lines.append(f'xk_request_errors_total{{op="{operation}"}} {count}')
+        lines.append(
+            "# HELP xk_requests_rejected_total Requests rejected because too many were pending."
+        )
+        lines.append("# TYPE xk_requests_rejected_total counter")
+        lines.append(f"xk_requests_rejected_total {self.rejected}")
+        lines.append(
+            "# HELP xk_requests_pending Requests currently submitted to the worker pool."
+        )
+        lines.append("# TYPE xk_requests_pending gauge")
+        lines.append(f"xk_requests_pending {self._pending}")
+        return "\n".join(lines) + "\n"
+
+
+def serve(socket_path: Optional[str] = None, port: Optional[int] = None, **kwargs):
+    """Runs a Service until SIGINT or SIGTERM is received.
+
+    The service listens on `port` if one is given, and on the Unix domain socket `socket_path` (or
+    `default_socket_path()`) otherwise. Other arguments are passed to Service.
+    """
+
+    async def run():
+        service = Service(**kwargs)
+        if port is not None:
+            address = f"127.0.0.1:{await service.start_tcp(port)}"
+        else:
+            address = await service.start_unix(socket_path)
+        logger.info("Serving on %s with %d workers", address, service.workers)
+
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopped.set)
+        try:
+            await stopped.wait()
+        finally:
+            await service.close()
+
+    asyncio.run(run())
@@ -63,16 +63,296 @@ Based on XKSHA1 from https://github.com/mborgerson/xbeeprom:
 ********************************************************************************************************
 """
 import binascii
-
-
-def _circular_shift(bits, word):
-    value = (word << bits) & 0xFFFFFFFF
-    value |= (word >> (32 - bits)) & 0xFFFFFFFF
-    return value
+import struct
+from typing import Tuple
+
+# Intermediate hashes for the Xbox HMAC_SHA1 inner (`_hmac1_reset`) and outer (`_hmac2_reset`) passes, by version.
+HMAC1_STATES = {
+    9: (0x85F9E51A, 0xE04613D2, 0x6D86A50C, 0x77C32E3C, 0x4BD717A4),
+    10: (0x72127625, 0x336472B9, 0xBE609BEA, 0xF55E226B, 0x99958DAC),
+    11: (0x39B06E79, 0xC9BD25E8, 0xDBC6B498, 0x40B4389D, 0x86BBD7ED),
+    12: (0x8058763A, 0xF97D4E0E, 0x865A9762, 0x8A3D920D, 0x08995B2C),
+}
+
+HMAC2_STATES = {
+    9: (0x5D7A9C6B, 0xE1922BEB, 0xB82CCDBC, 0x3137AB34, 0x486B52B3),
+    10: (0x76441D41, 0x4DE82659, 0x2E8EF85E, 0xB256FACA, 0xC4FE2DE8),
+    11: (0x9B49BED3, 0x84B430FC, 0x6B8749CD, 0xEBFE5FE5, 0xD96E7393),
+    12: (0x01075307, 0xA2F1E037, 0x1186EEEA, 0x88DA9992, 0x168A5609),
+}
+
+_DIGEST = struct.Struct(">5L")
+
+
+def _single_block_padding(length: int) -> Tuple[int, ...]:
+    """Returns the words that complete a single block holding a `length` byte message.
+
+    The Xbox HMAC passes follow a 64-byte key block, so the encoded bit length is 512 + length * 8.
+    """
+    words = [0] * (16 - length // 4)
+    words[0] = 0x80000000
+    words[-1] = 512 + length * 8
+    return tuple(words)
+
+
+# Message lengths used by the EEPROM, which can be hashed without the generic buffering path:
+#   20 bytes: the key hash pass over the stored HMAC and the outer pass over the inner digest.
+#   28 bytes: the Confounder, HDDKey, and XBERegion.
+_SINGLE_BLOCK_MESSAGES = {
+    length: (struct.Struct(f">{length // 4}L"), _single_block_padding(length))
+    for length in (20, 28)
+}
+
+
+_BLOCK = struct.Struct(">16L")
+
+
+def _compress_block(state: Tuple[int, ...], block) -> Tuple[int, ...]:
+    """Processes a single 64-byte block, returning the new intermediate hash."""
+    return _compress(state, _BLOCK.unpack(block))
+
+
+def _compress(state: Tuple[int, ...], words: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Processes a single block, given as 16 big-endian words, returning the new intermediate hash.
+
+    The rounds are unrolled five at a time, rotating the roles of a-e rather than shuffling values between them.
+    """
+    W = [0] * 80
+    W[:16] = words
+    for t in range(16, 80):
+        x = W[t - 3] ^ W[t - 8] ^ W[t - 14] ^ W[t - 16]
+        W[t] = ((x << 1) | (x >> 31)) & 0xFFFFFFFF
+
+    a, b, c, d, e = state
+
+    for t in range(0, 20, 5):
+        e = (
+            e + ((a << 5) | (a >> 27)) + (d ^ (b & (c ^ d))) + 0x5A827999 + W[t]
+        ) & 0xFFFFFFFF
+        b = ((b << 30) | (b >> 2)) & 0xFFFFFFFF
+        d = (
+            d + ((e << 5) | (e >> 27)) + (c ^ (a & (b ^ c))) + 0x5A827999 + W[t + 1]
+        ) & 0xFFFFFFFF
+        a = ((a << 30) | (a >> 2)) & 0xFFFFFFFF
+        c = (
+            c + ((d << 5) | (d >> 27)) + (b ^ (e & (a ^ b))) + 0x5A827999 + W[t + 2]
+        ) & 0xFFFFFFFF
+        e = ((e << 30) | (e >> 2)) & 0xFFFFFFFF
+        b = (
+            b + ((c << 5) | (c >> 27)) + (a ^ (d & (e ^ a))) + 0x5A827999 + W[t + 3]
+        ) & 0xFFFFFFFF
+        d = ((d << 30) | (d >> 2)) & 0xFFFFFFFF
+        a = (
+            a + ((b << 5) | (b >> 27)) + (e ^ (c & (d ^ e))) + 0x5A827999 + W[t + 4]
+        ) & 0xFFFFFFFF
+        c = ((c << 30) | (c >> 2)) & 0xFFFFFFFF
+
+    for t in range(20, 40, 5):
+        e = (e + ((a << 5) | (a >> 27)) + (b ^ c ^ d) + 0x6ED9EBA1 + W[t]) & 0xFFFFFFFF
+        b = ((b << 30) | (b >> 2)) & 0xFFFFFFFF
+        d = (
+            d + ((e << 5) | (e >> 27)) + (a ^ b ^ c) + 0x6ED9EBA1 + W[t + 1]
+        ) & 0xFFFFFFFF
+        a = ((a << 30) | (a >> 2)) & 0xFFFFFFFF
+        c = (
+            c + ((d << 5) | (d >> 27)) + (e ^ a ^ b) + 0x6ED9EBA1 + W[t + 2]
+        ) & 0xFFFFFFFF
+        e = ((e << 30) | (e >> 2)) & 0xFFFFFFFF
+        b = (
+            b + ((c << 5) | (c >> 27)) + (d ^ e ^ a) + 0x6ED9EBA1 + W[t + 3]
+        ) & 0xFFFFFFFF
+        d = ((d << 30) | (d >> 2)) & 0xFFFFFFFF
+        a = (
+            a + ((b << 5) | (b >> 27)) + (c ^ d ^ e) + 0x6ED9EBA1 + W[t + 4]
+        ) & 0xFFFFFFFF
+        c = ((c << 30) | (c >> 2)) & 0xFFFFFFFF
+
+    for t in range(40, 60, 5):
+        e = (
+            e + ((a << 5) | (a >> 27)) + ((b & c) | (d & (b | c))) + 0x8F1BBCDC + W[t]
+        ) & 0xFFFFFFFF
+        b = ((b << 30) | (b >> 2)) & 0xFFFFFFFF
+        d = (
+            d
+            + ((e << 5) | (e >> 27))
+            + ((a & b) | (c & (a | b)))
+            + 0x8F1BBCDC
+            + W[t + 1]
+        ) & 0xFFFFFFFF
+        a = ((a << 30) | (a >> 2)) & 0xFFFFFFFF
+        c = (
+            c
+            + ((d << 5) | (d >> 27))
+            + ((e & a) | (b & (e | a)))
+            + 0x8F1BBCDC
+            + W[t + 2]
+        ) & 0xFFFFFFFF
+        e = ((e << 30) | (e >> 2)) & 0xFFFFFFFF
+        b = (
+            b
+            + ((c << 5) | (c >> 27))
+            + ((d & e) | (a & (d | e)))
+            + 0x8F1BBCDC
+            + W[t + 3]
+        ) & 0xFFFFFFFF
+        d = ((d << 30) | (d >> 2)) & 0xFFFFFFFF
+        a = (
+            a
+            + ((b << 5) | (b >> 27))
+            + ((c & d) | (e & (c | d)))
+            + 0x8F1BBCDC
+            + W[t + 4]
+        ) & 0xFFFFFFFF
+        c = ((c << 30) | (c >> 2)) & 0xFFFFFFFF
+
+    for t in range(60, 80, 5):
+        e = (e + ((a << 5) | (a >> 27)) + (b ^ c ^ d) + 0xCA62C1D6 + W[t]) & 0xFFFFFFFF
+        b = ((b << 30) | (b >> 2)) & 0xFFFFFFFF
+        d = (
+            d + ((e << 5) | (e >> 27)) + (a ^ b ^ c) + 0xCA62C1D6 + W[t + 1]
+        ) & 0xFFFFFFFF
+        a = ((a << 30) | (a >> 2)) & 0xFFFFFFFF
+        c = (
+            c + ((d << 5) | (d >> 27)) + (e ^ a ^ b) + 0xCA62C1D6 + W[t + 2]
+        ) & 0xFFFFFFFF
+        e = ((e << 30) | (e >> 2)) & 0xFFFFFFFF
+        b = (
+            b + ((c << 5) | (c >> 27)) + (d ^ e ^ a) + 0xCA62C1D6 + W[t + 3]
+        ) & 0xFFFFFFFF
+        d = ((d << 30) | (d >> 2)) & 0xFFFFFFFF
+        a = (
+            a + ((b << 5) | (b >> 27)) + (c ^ d ^ e) + 0xCA62C1D6 + W[t + 4]
+        ) & 0xFFFFFFFF
+        c = ((c << 30) | (c >> 2)) & 0xFFFFFFFF
+
+    return (
+        (state[0] + a) & 0xFFFFFFFF,
+        (state[1] + b) & 0xFFFFFFFF,
+        (state[2] + c) & 0xFFFFFFFF,
+        (state[3] + d) & 0xFFFFFFFF,
+        (state[4] + e) & 0xFFFFFFFF,
+    )
+
+
+_ROUND_CONSTANTS = (0x5A827999, 0x6ED9EBA1, 0x8F1BBCDC, 0xCA62C1D6)
+
+
+def _compress_lanes(state, words):
+    """Processes one block per lane, given as 5 state and 16 word uint32 columns, returning the new state columns.
+
+    This mirrors `_compress`; uint32 arithmetic wraps, so no masking is needed.
+    """
+    W = list(words)
+    for t in range(16, 80):
+        x = W[t - 3] ^ W[t - 8] ^ W[t - 14] ^ W[t - 16]
+        W.append((x << 1) | (x >> 31))
+
+    a, b, c, d, e = state
+    for t in range(80):
+        if t < 20:
+            f = d ^ (b & (c ^ d))
+        elif 40 <= t < 60:
+            f = (b & c) | (d & (b | c))
+        else:
+            f = b ^ c ^ d
+        temp = ((a << 5) | (a >> 27)) + f + e + _ROUND_CONSTANTS[t // 20] + W[t]
+        e = d
+        d = c
+        c = (b << 30) | (b >> 2)
+        b = a
+        a = temp
+
+    return tuple(initial + value for initial, value in zip(state, (a, b, c, d, e)))
+
+
+def _lane_states(table, versions, lanes: int):
+    """Returns the 5 intermediate hash columns for `versions`, which may be a single version or one per lane."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    versions = np.asarray(versions)
+    unknown = set(np.unique(versions).tolist()) - set(table)
+    if unknown:
+        raise Exception(f"Invalid `version` parameter {min(unknown)} < 9 || > 12")
+
+    if versions.ndim == 0:
+        return tuple(
+            np.full(lanes, value, dtype=np.uint32) for value in table[int(versions)]
+        )
+
+    lookup = np.zeros((max(table) + 1, 5), dtype=np.uint32)
+    for version, state in table.items():
+        lookup[version] = state
+    states = lookup[versions]
+    return tuple(states[:, i] for i in range(5))
+
+
+def batch_xbox_hmac_sha1(versions, messages):
+    """Computes the Xbox HMAC_SHA1 of many 20 or 28 byte messages at once.
+
+    `messages` is a (K, 20) or (K, 28) uint8 array and `versions` is a single XBOX version or a (K,) array of them.
+    Each row is hashed in its own uint32 lane. Returns a (K, 20) uint8 array of digests matching
+    SHA1.xbox_hmac_sha1 for each row. Requires NumPy.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    messages = np.ascontiguousarray(messages, dtype=np.uint8)
+    lanes, length = messages.shape
+    if length not in _SINGLE_BLOCK_MESSAGES:
+        raise ValueError(f"Unsupported batch message length {length}")
+
+    def _padding_columns(padding):
+        return [np.full(lanes, value, dtype=np.uint32) for value in padding]
+
+    words = messages.view(">u4").astype(np.uint32)
+    _, padding = _SINGLE_BLOCK_MESSAGES[length]
+    inner = _compress_lanes(
+        _lane_states(HMAC1_STATES, versions, lanes),
+        [words[:, i] for i in range(length // 4)] + _padding_columns(padding),
+    )
+
+    _, padding = _SINGLE_BLOCK_MESSAGES[20]
+    outer = _compress_lanes(
+        _lane_states(HMAC2_STATES, versions, lanes),
+        list(inner) + _padding_columns(padding),
+    )
+    digests = np.stack(outer, axis=1).astype(">u4")
+    return digests.view(np.uint8).reshape(lanes, 20)
+
+
+def pad_message(message: bytes) -> bytes:
+    """Pads `message` as the continuation of a stream that began with a 64-byte key block."""
+    bit_length = 512 + len(message) * 8
+    zeros = (55 - len(message)) % 64
+    return message + b"\x80" + bytes(zeros) + struct.pack(">Q", bit_length)
+
+
+def xbox_hmac_sha1(version: int, message: bytes) -> bytes:
+    """Computes the Xbox HMAC_SHA1 of `message` for the given XBOX version.
+
+    All state is local to the call, so unlike a SHA1 instance this may be used from many threads at once.
+    """
+    if version not in HMAC1_STATES:
+        raise Exception(f"Invalid `version` parameter {version} < 9 || > 12")
+
+    message = bytes(message)
+    single_block = _SINGLE_BLOCK_MESSAGES.get(len(message))
+    if not single_block:
+        # Other lengths fall back to the generic buffered path, using an instance local to this call.
+        return bytes(SHA1()._generic_xbox_hmac_sha1(version, message))
+
+    message_words, padding = single_block
+    inner = _compress(HMAC1_STATES[version], message_words.unpack(message) + padding)
+    _, padding = _SINGLE_BLOCK_MESSAGES[20]
+    outer = _compress(HMAC2_STATES[version], inner + padding)
+    return _DIGEST.pack(*outer)
 
 
 class SHA1:
-    """Provides SHA1 hash functionality."""
+    """Provides SHA1 hash functionality.
+
+    The buffered `_sha1_input`/`_sha1_result` path hashes the messages that `xbox_hmac_sha1` cannot handle as a single
+    block. Instances carry its state between calls and must not be shared between threads.
+    """
 
     def __init__(self):
         self._computed = False
@@ -85,6 +365,9 @@ class SHA1:
 
     def xbox_hmac_sha1(self, version: int, *args) -> bytearray:
         """Computes the HMAC_SHA1 for the given fields using the given XBOX version."""
+        return bytearray(xbox_hmac_sha1(version, b"".join(args)))
+
+    def _generic_xbox_hmac_sha1(self, version: int, *args) -> bytearray:
         self._hmac1_reset(version)
         for arg in args:
             self._sha1_input(arg)
@@ -132,80 +415,18 @@ class SHA1:
     def _hmac1_reset(self, version):
         self.reset()
 
-        if version == 9:
-            self._intermediate_hash = [
-                0x85F9E51A,
-                0xE04613D2,
-                0x6D86A50C,
-                0x77C32E3C,
-                0x4BD717A4,
-            ]
-        elif version == 10:
-            self._intermediate_hash = [
-                0x72127625,
-                0x336472B9,
-                0xBE609BEA,
-                0xF55E226B,
-                0x99958DAC,
-            ]
-        elif version == 11:
-            self._intermediate_hash = [
-                0x39B06E79,
-                0xC9BD25E8,
-                0xDBC6B498,
-                0x40B4389D,
-                0x86BBD7ED,
-            ]
-        elif version == 12:
-            self._intermediate_hash = [
-                0x8058763A,
-                0xF97D4E0E,
-                0x865A9762,
-                0x8A3D920D,
-                0x08995B2C,
-            ]
-        else:
+        if version not in HMAC1_STATES:
             raise Exception(f"Invalid `version` parameter {version} < 9 || > 12")
+        self._intermediate_hash = list(HMAC1_STATES[version])
 
         self._length_low = 512
 
     def _hmac2_reset(self, version):
         self.reset()
 
-        if version == 9:
-            self._intermediate_hash = [
-                0x5D7A9C6B,
-                0xE1922BEB,
-                0xB82CCDBC,
-                0x3137AB34,
-                0x486B52B3,
-            ]
-        elif version == 10:
-            self._intermediate_hash = [
-                0x76441D41,
-                0x4DE82659,
-                0x2E8EF85E,
-                0xB256FACA,
-                0xC4FE2DE8,
-            ]
-        elif version == 11:
-            self._intermediate_hash = [
-                0x9B49BED3,
-                0x84B430FC,
-                0x6B8749CD,
-                0xEBFE5FE5,
-                0xD96E7393,
-            ]
-        elif version == 12:
-            self._intermediate_hash = [
-                0x01075307,
-                0xA2F1E037,
-                0x1186EEEA,
-                0x88DA9992,
-                0x168A5609,
-            ]
-        else:
+        if version not in HMAC2_STATES:
             raise Exception(f"Invalid `version` parameter {version} < 9 || > 12")
+        self._intermediate_hash = list(HMAC2_STATES[version])
 
         self._length_low = 512
 
@@ -224,70 +445,9 @@ class SHA1:
         self._computed = False
 
     def _process_message_block(self):
-        K = [0x5A827999, 0x6ED9EBA1, 0x8F1BBCDC, 0xCA62C1D6]
-
-        W = []
-        for t in range(16):
-            value = (self._message_block[t * 4] << 24) & 0xFF000000
-            value |= (self._message_block[t * 4 + 1] << 16) & 0x00FF0000
-            value |= (self._message_block[t * 4 + 2] << 8) & 0x0000FF00
-            value |= (self._message_block[t * 4 + 3]) & 0x000000FF
-            W.append(value)
-
-        for t in range(16, 80):
-            W.append(_circular_shift(1, W[t - 3] ^ W[t - 8] ^ W[t - 14] ^ W[t - 16]))
-
-        A = self._intermediate_hash[0]
-        B = self._intermediate_hash[1]
-        C = self._intermediate_hash[2]
-        D = self._intermediate_hash[3]
-        E = self._intermediate_hash[4]
-
-        for t in range(20):
-            temp = _circular_shift(5, A) + ((B & C) | ((~B) & D)) + E + W[t] + K[0]
-            temp &= 0xFFFFFFFF
-            E = D
-            D = C
-            C = _circular_shift(30, B)
-
-            B = A
-            A = temp
-
-        for t in range(20, 40):
-            temp = _circular_shift(5, A) + (B ^ C ^ D) + E + W[t] + K[1]
-            temp &= 0xFFFFFFFF
-            E = D
-            D = C
-            C = _circular_shift(30, B)
-            B = A
-            A = temp
-
-        for t in range(40, 60):
-            temp = (
-                _circular_shift(5, A) + ((B & C) | (B & D) | (C & D)) + E + W[t] + K[2]
-            )
-            temp &= 0xFFFFFFFF
-            E = D
-            D = C
-            C = _circular_shift(30, B)
-            B = A
-            A = temp
-
-        for t in range(60, 80):
-            temp = _circular_shift(5, A) + (B ^ C ^ D) + E + W[t] + K[3]
-            temp &= 0xFFFFFFFF
-            E = D
-            D = C
-            C = _circular_shift(30, B)
-            B = A
-            A = temp
-
-        self._intermediate_hash[0] = (self._intermediate_hash[0] + A) & 0xFFFFFFFF
-        self._intermediate_hash[1] = (self._intermediate_hash[1] + B) & 0xFFFFFFFF
-        self._intermediate_hash[2] = (self._intermediate_hash[2] + C) & 0xFFFFFFFF
-        self._intermediate_hash[3] = (self._intermediate_hash[3] + D) & 0xFFFFFFFF
-        self._intermediate_hash[4] = (self._intermediate_hash[4] + E) & 0xFFFFFFFF
-
+        self._intermediate_hash = list(
+            _compress_block(tuple(self._intermediate_hash), self._message_block)
+        )
         self._message_block_index = 0
 
     def _pad_message(self):
@@ -0,0 +1,142 @@
+"""Streaming helpers for processing continuous sequences of EEPROM records, e.g., from a shell pipeline.
+
+Input is read in bounded chunks, so memory use is independent of the length of the stream and a slow consumer
+naturally throttles the producer.
+"""
+
+import os
+import struct
+from typing import BinaryIO
+from typing import Dict
+from typing import Iterator
+
+try:
+    import numpy as np
+except ImportError:  # NumPy only speeds up SettingsPatch.
+    np = None
+
+from . import crc
+from .eeprom import CHECKSUM3_RANGE
+from .eeprom import EEPROM_SIZE
+from .eeprom import EEPROMData
+
+DEFAULT_CHUNK_RECORDS = 1024
+
+_WORD = struct.Struct("<L")
+_CHECKSUM3_OFFSET = EEPROMData.Checksum3.offset
+
+
+class SettingsPatch:
+    """Applies settings edits to many records at once, recomputing only Checksum3.
+
+    `edits` maps EEPROMData attributes (e.g., "dts_flag") to their new values. Every edit must be confined to the
+    user settings covered by Checksum3, in which case it amounts to setting and clearing fixed bits, so neither the
+    encrypted header nor Checksum2 need to be touched. A ValueError is raised otherwise.
+    """
+
+    def __init__(self, edits: Dict):
+        zeros = EEPROMData()
+        ones = EEPROMData.from_buffer_copy(b"\xff" * EEPROM_SIZE)
+        for name, value in edits.items():
+            setattr(zeros, name, value)
+            setattr(ones, name, value)
+
+        or_mask = bytes(zeros)
+        and_mask = bytes(ones)
+        start, end = CHECKSUM3_RANGE
+        for i in range(EEPROM_SIZE):
+            if start <= i < end:
+                continue
+            if or_mask[i] != 0 or and_mask[i] != 0xFF:
+                raise ValueError("Edits modify fields outside of the user settings")
+
+        # (offset, and mask, or mask) for each word that is modified.
+        self._words = []
+        for offset in range(start, end, 4):
+            word_and = _WORD.unpack_from(and_mask, offset)[0]
+            word_or = _WORD.unpack_from(or_mask, offset)[0]
+            if word_and != 0xFFFFFFFF or word_or != 0:
+                self._words.append((offset, word_and, word_or))
+
+    def apply(self, records: bytearray):
+        """Patches every record in `records`, a buffer of concatenated dumps, in place."""
+        if not self._words:
+            return
+        if len(records) % EEPROM_SIZE:
+            raise ValueError("Records must be a multiple of EEPROM_SIZE bytes")
+
+        if np is not None:
+            self._apply_vectorized(records)
+            return
+
+        for base in range(0, len(records), EEPROM_SIZE):
+            for offset, word_and, word_or in self._words:
+                word = _WORD.unpack_from(records, base + offset)[0]
+                _WORD.pack_into(records, base + offset, (word & word_and) | word_or)
+            checksum = crc.RegionChecksum.from_buffer(
+                records, base + CHECKSUM3_RANGE[0], base + CHECKSUM3_RANGE[1]
+            )
+            _WORD.pack_into(records, base + _CHECKSUM3_OFFSET, checksum.value)
+
+    def _apply_vectorized(self, records: bytearray):
+        dumps = np.frombuffer(records, dtype=np.uint8).reshape(-1, EEPROM_SIZE)
+        words = dumps.view("<u4")
+        for offset, word_and, word_or in self._words:
+            column = words[:, offset // 4]
+            column &= np.uint32(word_and)
+            column |= np.uint32(word_or)
+        words[:, _CHECKSUM3_OFFSET // 4] = crc.batch_region_checksums(
+            dumps, *CHECKSUM3_RANGE
+        )
+
+
+def _read_full(infile: BinaryIO, buffer: memoryview) -> int:
+    """Reads into `buffer` until it is full or the input ends, returning the number of bytes read."""
+    filled = 0
+    while filled < len(buffer):
+        count = infile.readinto(buffer[filled:])
+        if not count:
+            break
+        filled += count
+    return filled
+
+
+def iter_record_chunks(
+    infile: BinaryIO, chunk_records: int = DEFAULT_CHUNK_RECORDS
+) -> Iterator[bytearray]:
+    """Yields buffers of up to `chunk_records` concatenated records read from the binary stream `infile`.
+
+    Raises a ValueError, after yielding the complete records, if the stream ends partway through a record.
+    """
+    size = chunk_records * EEPROM_SIZE
+    while True:
+        chunk = bytearray(size)
+        with memoryview(chunk) as view:
+            filled = _read_full(infile, view)
+        complete = filled - filled % EEPROM_SIZE
+        if complete:
+            del chunk[complete:]
+            yield chunk
+        if filled != complete:
+            raise ValueError(
+                f"Input ended with a partial record of {filled - complete} bytes"
+            )
+        if filled < size:
+            return
+
+
+def iter_null_delimited_paths(
+    infile: BinaryIO, chunk_size: int = 64 * 1024
+) -> Iterator[str]:
+    """Yields the NUL-delimited paths (e.g., from `find -print0`) read from the binary stream `infile`."""
+    pending = b""
+    while True:
+        chunk = infile.read(chunk_size)
+        if not chunk:
+            break
+        *paths, pending = (pending + chunk).split(b"\0")
+        for path in paths:
+            if path:
+                yield os.fsdecode(path)
+    if pending:
+        yield os.fsdecode(pending)